@@ -0,0 +1,51 @@
+"""
+End-to-end ApiClient benchmarks against the local stub server, covering signing,
+encoding, the pooled HTTP round trip, response decoding and the stub's own
+signature verification.
+"""
+from harness import PRIVATE_KEY
+from target365_sdk.api_client import ApiClient
+from target365_sdk.helpers.instrumentation import MetricsAggregator
+from target365_sdk.helpers.transports import Http2Transport, InMemoryTransport
+from target365_sdk.models.out_message import OutMessage
+from target365_sdk.testing import StubServer
+
+KEY_NAME = "BenchmarkKey"
+
+
+def cases():
+    # the server runs until run.py has measured every case of this module
+    with StubServer(client_keys={KEY_NAME: PRIVATE_KEY}) as server:
+        server.app.add_lookup({"msisdn": "+4798079008", "firstName": "Test", "lastName": "Testesen"})
+        for i in range(100):
+            server.app.keywords[str(i)] = {"keywordId": str(i), "shortNumberId": "NO-2002",
+                                           "keywordText": "HELLO%d" % i, "mode": "Text", "enabled": True}
+
+        client = ApiClient(server.base_uri, KEY_NAME, PRIVATE_KEY)
+        instrumented = ApiClient(server.base_uri, KEY_NAME, PRIVATE_KEY, observer=MetricsAggregator())
+
+        def create_out_message():
+            # a fresh message each time, the stub rejects reused transaction ids
+            client.create_out_message(OutMessage(sender="Target365", recipient="+4798079008",
+                                                 content="Hello World from SMS!"))
+
+        # the SDK's own cost per call: signing, encoding and the stub, but no sockets
+        in_memory = ApiClient(server.base_uri, KEY_NAME, PRIVATE_KEY, transport=InMemoryTransport(server.app))
+        clients = [client, instrumented, in_memory]
+
+        yield "api/ping", client.ping
+        yield "api/ping (instrumented)", instrumented.ping
+        yield "api/ping (in-memory transport)", in_memory.ping
+        try:
+            http2 = ApiClient(server.base_uri, KEY_NAME, PRIVATE_KEY, transport=Http2Transport())
+        except ImportError:
+            pass
+        else:
+            clients.append(http2)
+            yield "api/ping (httpx transport)", http2.ping
+        yield "api/lookup", lambda: client.lookup("+4798079008")
+        yield "api/create_out_message", create_out_message
+        yield "api/get_all_keywords (100 items)", lambda: client.get_all_keywords("NO-2002")
+
+        for api_client in clients:
+            api_client.close()
@@ -0,0 +1,29 @@
+"""
+Throughput of InMessageDispatcher: parsing, deduplication and handing messages to the workers.
+"""
+import itertools
+import json
+
+from target365_sdk.in_message_dispatcher import InMessageDispatcher
+
+IN_MESSAGE = {
+    "created": "2019-02-07T21:11:00+00:00",
+    "recipient": "2002",
+    "content": "HELLO",
+}
+
+
+def cases():
+    dispatcher = InMessageDispatcher(lambda message: None, workers=4)
+    counter = itertools.count()
+
+    def dispatch():
+        i = next(counter)
+        data = dict(IN_MESSAGE, transactionId=str(i), sender="+47%08d" % (i % 1000))
+        dispatcher.dispatch(json.dumps(data).encode("utf-8"))
+
+    duplicate = json.dumps(dict(IN_MESSAGE, transactionId="duplicate", sender="+4798079008")).encode("utf-8")
+    dispatcher.dispatch(duplicate)
+
+    yield "dispatcher/dispatch", dispatch
+    yield "dispatcher/dispatch duplicate", lambda: dispatcher.dispatch(duplicate)
@@ -0,0 +1,29 @@
+"""
+Request body encoding benchmarks.
+"""
+from harness import PRIVATE_KEY
+from target365_sdk.helpers.http_client import HttpClient
+from target365_sdk.helpers.json_encoder import encode
+from target365_sdk.models.out_message import OutMessage
+
+URL = "https://test.target365.io/"
+
+
+def _out_message(i):
+    out_message = OutMessage()
+    out_message.transactionId = "79f35793-6d70-423c-a7f7-%012d" % i
+    out_message.sender = "Target365"
+    out_message.recipient = "+4798079008"
+    out_message.content = "Hello World from SMS!"
+    return out_message
+
+
+def cases():
+    out_message = _out_message(0)
+    batch = [_out_message(i) for i in range(1000)]
+    client = HttpClient(URL, "BenchmarkKey", PRIVATE_KEY)
+
+    yield "encode/OutMessage", lambda: encode(out_message)
+    yield "encode/1000 OutMessages", lambda: encode(batch)
+    yield "encode/1000 OutMessages + content hash", \
+        lambda: client._get_signature("post", URL + "api/out-messages/batch", encode(batch))
@@ -0,0 +1,16 @@
+"""
+URL building and request header benchmarks.
+"""
+from harness import PRIVATE_KEY
+from target365_sdk.helpers.http_client import HttpClient, urlencode
+
+URL = "https://test.target365.io/"
+
+
+def cases():
+    client = HttpClient(URL, "BenchmarkKey", PRIVATE_KEY)
+    params = {"shortNumberId": "NO-2002", "keywordText": "HELLO", "mode": "Text"}
+
+    yield "url/_build_url", lambda: client._build_url("api/out-messages/79f35793-6d70-423c-a7f7-ae9fb1024f3b")
+    yield "url/signed query uri", lambda: (client._build_url("api/keywords") + "?" + urlencode(params)).lower()
+    yield "url/auth header (get)", lambda: client._get_auth_header("get", client._build_url("api/ping"))
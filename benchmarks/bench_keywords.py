@@ -0,0 +1,29 @@
+"""
+Keyword matching against a local KeywordRegistry index.
+"""
+from target365_sdk.keyword_registry import KeywordRegistry
+from target365_sdk.models.keyword import Keyword
+
+
+class _KeywordSource:
+    def __init__(self, keywords):
+        self.keywords = keywords
+
+    def iter_all_keywords(self, short_number_id=None):
+        return iter(self.keywords)
+
+
+KEYWORDS = [Keyword(keywordId=str(i), shortNumberId="NO-2002", keywordText="HELLO%d" % i, mode="Text",
+                    enabled=True, lastModified="2019-02-07T21:11:00+00:00") for i in range(1000)]
+KEYWORDS += [Keyword(keywordId="p%d" % i, shortNumberId="NO-2002", keywordText="PRE%d" % i, mode="StartsWith",
+                     enabled=True, lastModified="2019-02-07T21:11:00+00:00") for i in range(100)]
+
+
+def cases():
+    registry = KeywordRegistry(_KeywordSource(KEYWORDS))
+    registry.sync()
+
+    yield "keywords/match Text (1100 keywords)", lambda: registry.match("NO-2002", "hello500 how are you")
+    yield "keywords/match StartsWith (1100 keywords)", lambda: registry.match("NO-2002", "PRE42XYZ")
+    yield "keywords/match no match (1100 keywords)", lambda: registry.match("NO-2002", "nothing here")
+    yield "keywords/sync unchanged (1100 keywords)", registry.sync
@@ -0,0 +1,72 @@
+"""
+Measures memory per model instance and model constructions per second.
+
+    python benchmarks/bench_models.py [instances]
+"""
+import sys
+import tracemalloc
+
+import harness
+from target365_sdk.models.in_message import InMessage
+from target365_sdk.models.keyword import Keyword
+from target365_sdk.models.out_message import OutMessage
+
+OUT_MESSAGE = {
+    "transactionId": "79f35793-6d70-423c-a7f7-ae9fb1024f3b",
+    "sender": "Target365",
+    "recipient": "+4798079008",
+    "content": "Hello World from SMS!",
+    "sendTime": "2019-02-07T21:11:00+00:00",
+    "statusCode": "Queued",
+    "strex": {"merchantId": "mer_test", "serviceCode": "14002", "price": 10},
+}
+
+IN_MESSAGE = {
+    "transactionId": "00568c6b-7baf-4869-b083-d22afc163059",
+    "created": "2019-02-07T21:11:00+00:00",
+    "sender": "+4798079008",
+    "recipient": "2002",
+    "content": "HELLO",
+}
+
+
+KEYWORDS = [{
+    "keywordId": str(i),
+    "shortNumberId": "NO-2002",
+    "keywordText": "HELLO%d" % i,
+    "mode": "Text",
+    "forwardUrl": "https://your-site.net/api/receive-sms",
+    "enabled": True,
+    "created": "2019-02-07T21:11:00+00:00",
+    "lastModified": "2019-02-07T21:11:00+00:00",
+    "tags": ["Foo", "Bar"],
+} for i in range(100)]
+
+
+def cases():
+    yield "model/OutMessage(**data)", lambda: OutMessage(**OUT_MESSAGE)
+    yield "model/InMessage(**data)", lambda: InMessage(**IN_MESSAGE)
+    yield "model/Keyword.from_list(100 items)", lambda: Keyword.from_list(KEYWORDS)
+
+
+def memory_per_object(model, data, count):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [model(**data) for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # the list holding the instances is not part of the model cost
+    return (after - before - sys.getsizeof(instances)) / float(count)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    for model, data in ((OutMessage, OUT_MESSAGE), (InMessage, IN_MESSAGE)):
+        constructions = harness.measure(model.__name__, lambda: model(**data))
+        print("%-12s %8.0f bytes/object %12.0f objects/s" % (
+            model.__name__, memory_per_object(model, data, count), constructions.ops))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""
+Enqueueing out-messages into the durable outbox.
+"""
+import os
+import tempfile
+from target365_sdk.models.out_message import OutMessage
+from target365_sdk.outbox import Outbox
+
+_directory = tempfile.mkdtemp()
+
+
+def _message():
+    return OutMessage(sender="Target365", recipient="+4798079008", content="Your order has been shipped")
+
+
+def cases():
+    outbox = Outbox(None, os.path.join(_directory, "outbox.db"), autostart=False)
+    batch = [_message() for _ in range(100)]
+
+    def enqueue_many():
+        for message in batch:
+            message.transactionId = None
+        outbox.enqueue_many(batch)
+
+    yield "outbox/enqueue", lambda: outbox.enqueue(_message())
+    yield "outbox/enqueue_many (100 messages)", enqueue_many
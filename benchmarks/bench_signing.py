@@ -0,0 +1,80 @@
+"""
+Measures request signatures and callback verifications per second for every
+available signing backend.
+
+    python benchmarks/bench_signing.py [seconds-per-backend]
+"""
+import sys
+import time
+
+from harness import PRIVATE_KEY
+from target365_sdk.helpers.http_client import HttpClient
+from target365_sdk.helpers.signing import CryptographySigner, EcdsaSigner, create_verifier
+
+URL = "https://test.target365.io/api/out-messages"
+BODY = '{"sender": "Target365", "recipient": "+4798079008", "content": "Hello World from SMS!"}'
+
+
+def backends():
+    yield "ecdsa", lambda: EcdsaSigner(PRIVATE_KEY)
+    try:
+        CryptographySigner(PRIVATE_KEY)
+    except ImportError:
+        return
+    yield "cryptography", lambda: CryptographySigner(PRIVATE_KEY)
+
+
+def cases():
+    for name, factory in backends():
+        client = HttpClient(URL, "BenchmarkKey", PRIVATE_KEY, signer=factory())
+        yield "sign/" + name, lambda client=client: client._get_signature("post", URL, BODY)
+
+    message = BODY.encode("utf-8")
+    signature = EcdsaSigner(PRIVATE_KEY).sign(message)
+    public_key = HttpClient(URL, "BenchmarkKey", PRIVATE_KEY).publicKey.get_verifying_key().to_der()
+    for backend in sorted(set(factory().name for _, factory in backends())):
+        verifier = create_verifier(public_key, backend)
+        yield "verify/" + backend, lambda verifier=verifier: verifier.verify(signature, message)
+
+
+def measure(signer, seconds):
+    client = HttpClient(URL, "BenchmarkKey", PRIVATE_KEY, signer=signer)
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        client._get_signature("post", URL, BODY)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def measure_verify(backend, seconds):
+    client = HttpClient(URL, "BenchmarkKey", PRIVATE_KEY)
+    verifier = create_verifier(client.publicKey.get_verifying_key().to_der(), backend)
+    signature = EcdsaSigner(PRIVATE_KEY).sign(BODY.encode("utf-8"))
+    message = BODY.encode("utf-8")
+
+    count = 0
+    started = time.perf_counter()
+    deadline = started + seconds
+    while time.perf_counter() < deadline:
+        verifier.verify(signature, message)
+        count += 1
+    return count / (time.perf_counter() - started)
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+
+    for name, factory in backends():
+        started = time.perf_counter()
+        signer = factory()
+        setup = time.perf_counter() - started
+        print("%-22s %10.0f signatures/s   (setup %.1f ms)" % (name, measure(signer, seconds), setup * 1000))
+
+    for backend in sorted(set(factory().name for _, factory in backends())):
+        print("%-22s %10.0f verifications/s" % (backend, measure_verify(backend, seconds)))
+
+
+if __name__ == "__main__":
+    main()
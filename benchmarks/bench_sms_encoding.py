@@ -0,0 +1,19 @@
+"""
+Encoding and segment calculation for message texts.
+"""
+# -*- coding: utf-8 -*-
+from target365_sdk.models.out_message import OutMessage
+from target365_sdk.sms_encoding import calculate_segments, summarize
+
+GSM_TEXT = u"Hei Kari Nordmann! Din ordre #12345 er sendt og kommer fram i morgen. Hilsen Butikken AS"
+LONG_GSM_TEXT = GSM_TEXT * 4 + u" {pris: 199€}"
+UNICODE_TEXT = u"Hei Kari 😀 Din ordre #12345 er sendt ✓"
+BATCH = [OutMessage(content=GSM_TEXT + str(i)) for i in range(1000)]
+
+
+def cases():
+    yield "sms/segments GSM-7 (88 chars)", lambda: calculate_segments(GSM_TEXT)
+    yield "sms/segments GSM-7 multipart with extension", lambda: calculate_segments(LONG_GSM_TEXT)
+    yield "sms/segments UCS-2", lambda: calculate_segments(UNICODE_TEXT, True)
+    yield "sms/segments replaced", lambda: calculate_segments(UNICODE_TEXT, None)
+    yield "sms/summarize (1000 messages)", lambda: summarize(BATCH)
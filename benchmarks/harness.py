@@ -0,0 +1,132 @@
+"""
+Minimal timing harness shared by the benchmark modules.
+
+A benchmark case is a (name, func) pair where func performs one operation.
+Each case is calibrated so a round takes at least `min_time` seconds, then
+timed for a number of rounds with the garbage collector disabled, like timeit
+does. The median round is reported, together with the spread between rounds
+so noisy results are easy to spot.
+"""
+import gc
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+PRIVATE_KEY = "27683a52a4d08074a87da02255c9c4dd37a1b106229890c13e630d156ef89060"
+
+
+class Result:
+
+    def __init__(self, name, loops, round_times):
+        self.name = name
+        self.loops = loops
+        self.round_times = sorted(round_times)
+
+    @property
+    def latency(self):
+        """
+        Median seconds per operation
+        """
+        return _median(self.round_times) / self.loops
+
+    @property
+    def ops(self):
+        return 1.0 / self.latency
+
+    @property
+    def spread(self):
+        """
+        Difference between the slowest and the fastest round relative to the median
+        """
+        return (self.round_times[-1] - self.round_times[0]) / _median(self.round_times)
+
+    def to_dict(self):
+        return {"ops": self.ops, "latency": self.latency, "spread": self.spread}
+
+
+def measure(name, func, min_time=0.1, rounds=7):
+    loops = _calibrate(func, min_time)
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        round_times = [_time(func, loops) for _ in range(rounds)]
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return Result(name, loops, round_times)
+
+
+def format_result(result, baseline=None):
+    line = "%-45s %12s ops/s %12s/op  +-%4.1f%%" % (
+        result.name, _format_number(result.ops), _format_time(result.latency), result.spread * 50)
+
+    if baseline is not None and result.name in baseline:
+        change = result.ops / baseline[result.name]["ops"] - 1
+        line += "   %+6.1f%% vs baseline" % (change * 100)
+    return line
+
+
+def compare(results, baseline, threshold):
+    """
+    :return: names of the cases whose throughput dropped by more than threshold (a fraction) against the baseline
+    """
+    return [result.name for result in results
+            if result.name in baseline and result.ops < baseline[result.name]["ops"] * (1 - threshold)]
+
+
+def load_baseline(path):
+    with open(path) as file:
+        return json.load(file)["results"]
+
+
+def save_baseline(path, results):
+    data = {
+        "python": sys.version.split()[0],
+        "created": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": dict((result.name, result.to_dict()) for result in results),
+    }
+    with open(path, "w") as file:
+        json.dump(data, file, indent=2, sort_keys=True)
+
+
+def _calibrate(func, min_time):
+    loops = 1
+    while True:
+        elapsed = _time(func, loops)
+        if elapsed >= min_time:
+            return loops
+        # aim a bit above min_time so the next try usually succeeds
+        loops = max(loops * 2, int(loops * min_time * 1.2 / max(elapsed, 1e-9)))
+
+
+def _time(func, loops):
+    started = time.perf_counter()
+    for _ in range(loops):
+        func()
+    return time.perf_counter() - started
+
+
+def _median(values):
+    middle = len(values) // 2
+    if len(values) % 2:
+        return values[middle]
+    return (values[middle - 1] + values[middle]) / 2.0
+
+
+def _format_number(value):
+    for limit, suffix in ((1e9, "G"), (1e6, "M"), (1e3, "k")):
+        if value >= limit:
+            return "%.2f%s" % (value / limit, suffix)
+    return "%.1f" % value
+
+
+def _format_time(seconds):
+    for factor, unit in ((1, "s"), (1e3, "ms"), (1e6, "us")):
+        if seconds * factor >= 1:
+            return "%.2f %s" % (seconds * factor, unit)
+    return "%.0f ns" % (seconds * 1e9)
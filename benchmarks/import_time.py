@@ -0,0 +1,86 @@
+"""
+Measures the cold import time of SDK modules with `python -X importtime`.
+
+    python benchmarks/import_time.py                              # target365_sdk.api_client
+    python benchmarks/import_time.py target365_sdk.outbox -n 20   # other modules, more runs
+    python benchmarks/import_time.py --max-ms 40                  # exit with 1 when slower
+    python benchmarks/import_time.py --top 10                     # also list the slowest imports
+
+Every run is a fresh interpreter, so nothing is cached in sys.modules. The
+median of the cumulative import time reported for the module is shown, which
+leaves out interpreter start-up. Serverless functions pay this on every cold
+start, keep heavy dependencies (requests, ecdsa, cryptography, jsonpickle)
+out of it by importing them where they are first needed.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def import_times(module):
+    """
+    Imports module in a fresh interpreter
+    :return: dict of the module and everything it imported -> cumulative microseconds
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        cwd=ROOT, stderr=subprocess.PIPE, stdout=subprocess.DEVNULL, check=True,
+        universal_newlines=True).stderr
+
+    # nested imports are listed (indented) before the module that imported them
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if not cumulative.strip().isdigit():
+            continue
+        times[name.strip()] = int(cumulative)
+        if not name.startswith("  "):
+            # a top level import ends the list of the imports it made
+            if name.strip() == module:
+                return times
+            times = {}
+    raise ValueError(module + " not found in the -X importtime output")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Target365 SDK import time")
+    parser.add_argument("modules", nargs="*", default=["target365_sdk.api_client"])
+    parser.add_argument("-n", dest="runs", type=int, default=9, help="fresh interpreters per module")
+    parser.add_argument("--max-ms", type=float, help="fail when a median import takes longer")
+    parser.add_argument("--top", type=int, default=0, help="list this many of the slowest imports")
+    args = parser.parse_args()
+
+    slow = []
+    for module in args.modules:
+        runs = [import_times(module) for _ in range(args.runs)]
+        median = _median([times[module] for times in runs]) / 1000.0
+        print("%-45s %8.1f ms" % (module, median))
+
+        if args.top:
+            last = runs[-1]
+            nested = sorted((name for name in last if name != module), key=last.get, reverse=True)
+            for name in nested[:args.top]:
+                print("    %-41s %8.1f ms" % (name, last[name] / 1000.0))
+
+        if args.max_ms is not None and median > args.max_ms:
+            slow.append(module)
+
+    if slow:
+        print("\nslower than %.1f ms: %s" % (args.max_ms, ", ".join(slow)))
+        return 1
+    return 0
+
+
+def _median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+Runs the offline benchmark suite.
+
+    python benchmarks/run.py                          # run everything
+    python benchmarks/run.py -k encode -k sign        # only cases whose name contains one of the filters
+    python benchmarks/run.py --save baseline.json     # store the results as a baseline
+    python benchmarks/run.py --compare baseline.json  # show changes, exit with 1 on regressions
+
+Cases are collected from the `cases()` function of every bench_*.py module in
+this directory.
+"""
+import argparse
+import glob
+import importlib
+import os
+import sys
+
+# also puts the repository root on sys.path, so the bench modules import the SDK from this checkout
+import harness
+
+
+def collect_cases(filters):
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(directory, "bench_*.py"))):
+        module = importlib.import_module(os.path.basename(path)[:-3])
+        if not hasattr(module, "cases"):
+            continue
+        for name, func in module.cases():
+            if not filters or any(part in name for part in filters):
+                yield name, func
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Target365 SDK offline benchmarks")
+    parser.add_argument("-k", dest="filters", action="append", default=[], help="only run cases containing this text")
+    parser.add_argument("--min-time", type=float, default=0.1, help="minimum seconds per timing round")
+    parser.add_argument("--rounds", type=int, default=7, help="timing rounds per case")
+    parser.add_argument("--save", metavar="PATH", help="write the results to a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="compare the results to a baseline file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="throughput drop (fraction) counted as regression, default 0.10")
+    args = parser.parse_args()
+
+    baseline = harness.load_baseline(args.compare) if args.compare else None
+
+    results = []
+    for name, func in collect_cases(args.filters):
+        result = harness.measure(name, func, args.min_time, args.rounds)
+        results.append(result)
+        print(harness.format_result(result, baseline))
+        sys.stdout.flush()
+
+    if args.save:
+        harness.save_baseline(args.save, results)
+
+    if baseline is not None:
+        regressions = harness.compare(results, baseline, args.threshold)
+        if regressions:
+            print("\nregressions beyond %.0f%%: %s" % (args.threshold * 100, ", ".join(regressions)))
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
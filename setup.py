@@ -18,6 +18,10 @@ setuptools.setup(
           'ecdsa',
           'jsonpickle',
       ],
+    extras_require={
+          'async': ['aiohttp'],
+          'fast': ['cryptography', 'orjson'],
+      },
     classifiers=[
         'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
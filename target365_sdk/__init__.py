@@ -1,3 +1,13 @@
-from .api_client import ApiClient
+import sys
 
 name = "target365_sdk"
+
+if sys.version_info < (3, 7):
+    from .api_client import ApiClient
+else:
+    def __getattr__(attribute):
+        # loaded on first access, so importing a submodule doesn't load the HTTP client
+        if attribute == "ApiClient":
+            from .api_client import ApiClient
+            return ApiClient
+        raise AttributeError("module " + __name__ + " has no attribute " + attribute)
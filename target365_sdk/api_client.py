@@ -1,16 +1,44 @@
+import functools
+import sys
+import time
 from .helpers.http_client import HttpClient
-from .models.lookup_result import LookupResult
-from .models.keyword import Keyword
-from .models.out_message import OutMessage
-from .models.strex_merchant import StrexMerchant
-from .models.in_message import InMessage
-from .models.one_time_password import OneTimePassword
-from .models.strex_transaction import StrexTransaction
-from .models.public_key import PublicKey
+from .bulk import BulkMutator, BulkSender, _is_transient
+from .helpers.concurrency import imap_bounded
+from .helpers.json_stream import iter_json_array
+from . import models
 
 
 name = "target365_sdk"
 
+# models this module used to import eagerly, still importable from here
+_MODELS = ("LookupResult", "Keyword", "OutMessage", "StrexMerchant", "InMessage", "OneTimePassword",
+           "StrexTransaction", "PublicKey")
+
+if sys.version_info < (3, 7):
+    # modules can't have __getattr__ before Python 3.7
+    for _model in _MODELS:
+        globals()[_model] = getattr(models, _model)
+else:
+    def __getattr__(attribute):
+        if attribute in _MODELS:
+            value = getattr(models, attribute)
+            globals()[attribute] = value
+            return value
+        raise AttributeError("module " + __name__ + " has no attribute " + attribute)
+
+
+def _decodes(method):
+    """
+    Counts the time a method spends turning the response into models as decode time of its request
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.client.observer is None:
+            return method(self, *args, **kwargs)
+        with self.client.decoding():
+            return method(self, *args, **kwargs)
+    return wrapper
+
 
 class ApiClient:
     PING = "api/ping"
@@ -27,8 +55,24 @@ class ApiClient:
 
     NOT_FOUND = 404
 
-    def __init__(self, base_uri, key_name, private_key):
-        self.client = HttpClient(base_uri, key_name, private_key)
+    DEFAULT_DEDUP_WINDOW = 100000
+    STREAM_CHUNK_SIZE = 64 * 1024
+
+    def __init__(self, base_uri, key_name, private_key, lookup_cache=None, **client_options):
+        """
+        :param lookup_cache: optional helpers.cache.LookupCache used by lookup()
+        :param client_options: connection options passed on to HttpClient
+            (pool_connections, pool_maxsize, pool_block, pool_idle_timeout, signer, rate_limiter, observer,
+            transport)
+        """
+        self.client = HttpClient(base_uri, key_name, private_key, **client_options)
+        self.lookup_cache = lookup_cache
+
+    def close(self):
+        """
+        Closes the pooled connections held by this client
+        """
+        self.client.close()
 
     ###  Ping controller  ###
 
@@ -46,6 +90,7 @@ class ApiClient:
 
     ###  Lookup controller  ###
 
+    @_decodes
     def lookup(self, msisdn):
         """
         GET /api/lookup
@@ -56,16 +101,63 @@ class ApiClient:
 
         if msisdn is None:
             raise ValueError("msisdn")
+
+        if self.lookup_cache is not None:
+            found, result = self.lookup_cache.get(msisdn)
+            if found:
+                return None if result is None else models.LookupResult(**result)
+
         payload = {"msisdn": msisdn}
         response = self.client.get_with_params(self.LOOKUP, payload)
         if response.status_code == self.NOT_FOUND:
+            if self.lookup_cache is not None:
+                self.lookup_cache.put(msisdn, None)
             return None
 
         response.raise_for_status()
 
-        lookup_result = LookupResult(**response.json())
+        result = response.json()
+        if self.lookup_cache is not None:
+            self.lookup_cache.put(msisdn, result)
+
+        lookup_result = models.LookupResult(**result)
         return lookup_result
 
+    def lookup_many(self, msisdns, max_workers=8, max_retries=3, retry_delay=0.5, on_error=None,
+                    dedup_window=DEFAULT_DEDUP_WINDOW):
+        """
+        GET /api/lookup (repeatedly)
+        Looks up many mobile phone numbers concurrently. The input is consumed
+        lazily and a number repeated within the last dedup_window distinct
+        numbers is only looked up once. Transient failures (connection errors,
+        408, 429, 5xx) are retried with exponential backoff. A lookup failing
+        for good does not stop the others, it yields the exception instead of a
+        result, so it can't be taken for an unknown number (None), and the error
+        is passed to on_error.
+        :msisdns: iterable of mobile phone numbers
+        :max_workers: maximum number of lookups in flight
+        :max_retries: times a lookup failing with a transient error is retried
+        :retry_delay: seconds before the first retry, doubled for every further retry
+        :on_error: called with (msisdn, error) for every lookup that failed
+        :dedup_window: number of distinct recent numbers remembered to skip duplicates
+        :return: generator of (msisdn, LookupResult, None or Exception) pairs in completion order
+        """
+        if msisdns is None:
+            raise ValueError("msisdns")
+
+        def lookup(msisdn):
+            attempt = 1
+            while True:
+                try:
+                    return self.lookup(msisdn)
+                except Exception as error:
+                    if attempt > max_retries or not _is_transient(error):
+                        raise
+                time.sleep(retry_delay * 2 ** (attempt - 1))
+                attempt += 1
+
+        return _lookup_results(imap_bounded(lookup, _unique(msisdns, dedup_window), max_workers), on_error)
+
     ###  Keyword controller  ###
 
     def create_keyword(self, keyword):
@@ -88,6 +180,14 @@ class ApiClient:
         Gets all keywords.
         :return: Keyword[]
         """
+        return list(self.iter_all_keywords(short_number_id, keyword, mode, tag))
+
+    def iter_all_keywords(self, short_number_id=None, keyword=None, mode=None, tag=None):
+        """
+        GET /api/keywords
+        Gets all keywords, parsing the response while it is downloaded.
+        :return: iterator of Keyword
+        """
         params = {}
         if short_number_id is not None:
             params["shortNumberId"] = short_number_id
@@ -98,10 +198,10 @@ class ApiClient:
         if tag is not None:
             params["tag"] = tag
 
-        response = self.client.get_with_params(self.KEYWORDS, params)
-        response.raise_for_status()
-        return Keyword.from_list(response.json())
+        response = self.client.get_with_params(self.KEYWORDS, params, stream=True)
+        return self._iter_models(response, models.Keyword)
 
+    @_decodes
     def get_keyword(self, keyword_id):
         """
         GET /api/keywords/{keywordId}
@@ -118,7 +218,7 @@ class ApiClient:
 
         response.raise_for_status()
         
-        return Keyword(**response.json())
+        return models.Keyword(**response.json())
 
     def update_keyword(self, keyword):
         """
@@ -188,6 +288,51 @@ class ApiClient:
         response = self.client.post(self.OUT_MESSAGES + "/batch", out_messages)
         response.raise_for_status()
 
+    def create_out_message_bulk(self, out_messages, batch_size=BulkSender.DEFAULT_BATCH_SIZE,
+                                max_workers=BulkSender.DEFAULT_MAX_WORKERS):
+        """
+        POST /api/out-messages/batch (repeatedly)
+        Sends any number of out-messages as concurrent batches. Messages without
+        transactionId get a random one, set on the given OutMessage objects. Failed
+        batches are not retried, except throttled ones (429, 503) when the client
+        has a rate_limiter.
+        :messages: iterable of OutMessage, consumed lazily
+        :batch_size: messages per batch request
+        :max_workers: batches posted in parallel
+        :return: BulkSendResult with the outcome per batch and per transactionId
+        """
+        if out_messages is None:
+            raise ValueError("messages")
+
+        return BulkSender(self, batch_size, max_workers).send(out_messages)
+
+    def update_out_messages(self, out_messages, max_workers=BulkMutator.DEFAULT_MAX_WORKERS):
+        """
+        PUT /api/out-messages/{transactionId} (repeatedly)
+        Updates any number of future scheduled out-messages concurrently, retrying transient failures.
+        :messages: iterable of OutMessage with transactionId set, consumed lazily (ValueError otherwise)
+        :max_workers: calls in parallel
+        :return: BulkMutationResult with the outcome per transactionId
+        """
+        if out_messages is None:
+            raise ValueError("messages")
+
+        return BulkMutator(self, max_workers).update(out_messages)
+
+    def delete_out_messages(self, transaction_ids, max_workers=BulkMutator.DEFAULT_MAX_WORKERS):
+        """
+        DELETE /api/out-messages/{transactionId} (repeatedly)
+        Deletes any number of future scheduled out-messages concurrently, retrying transient failures.
+        :transactionIds: iterable of string, consumed lazily
+        :max_workers: calls in parallel
+        :return: BulkMutationResult with the outcome per transactionId
+        """
+        if transaction_ids is None:
+            raise ValueError("transactionIds")
+
+        return BulkMutator(self, max_workers).delete(transaction_ids)
+
+    @_decodes
     def get_out_message(self, transaction_id):
         """
         GET /api/out-messages/batch/{transactionId}
@@ -204,7 +349,7 @@ class ApiClient:
 
         response.raise_for_status()
 
-        return OutMessage(**response.json())
+        return models.OutMessage(**response.json())
 
     def update_out_message(self, out_message):
         """
@@ -235,6 +380,7 @@ class ApiClient:
 
     ###  InMessages controller  ###
 
+    @_decodes
     def get_in_message(self, short_number_id, transaction_id):
         """
         GET /api/in-messages/{shortNumberId}/{transactionId}
@@ -249,7 +395,7 @@ class ApiClient:
         response = self.client.get(self.IN_MESSAGES + "/" + short_number_id + "/" + transaction_id)
         response.raise_for_status()
 
-        return InMessage(**response.json())
+        return models.InMessage(**response.json())
 
 
     ###  StrexMerchants controller  ###
@@ -260,10 +406,18 @@ class ApiClient:
         Gets all merchant ids.
         :return: StrexMerchant[]
         """
-        response = self.client.get(self.STREX_MERCHANTS)
-        response.raise_for_status()
-        return StrexMerchant.from_list(response.json())
+        return list(self.iter_strex_merchants())
 
+    def iter_strex_merchants(self):
+        """
+        GET /api/strex/merchants
+        Gets all merchant ids, parsing the response while it is downloaded.
+        :return: iterator of StrexMerchant
+        """
+        response = self.client.get(self.STREX_MERCHANTS, stream=True)
+        return self._iter_models(response, models.StrexMerchant)
+
+    @_decodes
     def get_strex_merchant(self, merchant_id):
         """
         GET /api/strex/merchants/{merchantId}
@@ -281,7 +435,7 @@ class ApiClient:
 
         response.raise_for_status()
 
-        return StrexMerchant(**response.json())
+        return models.StrexMerchant(**response.json())
 
     def save_strex_merchant(self, strex_merchant):
         """
@@ -332,6 +486,7 @@ class ApiClient:
         response = self.client.post(self.STREX_ONE_TIME_PASSWORDS, one_time_password)
         response.raise_for_status()
 
+    @_decodes
     def get_one_time_password(self, transaction_id):
         """
         GET /api/strex/one-time-passwords/{transactionId}
@@ -344,7 +499,7 @@ class ApiClient:
         response.raise_for_status()
 
 
-        return OneTimePassword(**response.json())
+        return models.OneTimePassword(**response.json())
 
     def create_strex_transaction(self, transaction):
         """
@@ -357,6 +512,7 @@ class ApiClient:
 
         return self._get_id_from_header(response.headers)
 
+    @_decodes
     def get_strex_transaction(self, transaction_id):
         """
         GET /api/strex/transactions/{transactionId}
@@ -366,7 +522,7 @@ class ApiClient:
         response = self.client.get(self.STREX_TRANSACTIONS + '/' + transaction_id)
         response.raise_for_status()
 
-        return StrexTransaction(validate_keys=False, **response.json())
+        return models.StrexTransaction(validate_keys=False, **response.json())
 
     def delete_strex_transaction(self, transaction_id):
         """
@@ -380,6 +536,7 @@ class ApiClient:
 
     ### PublicKey controller  ###
 
+    @_decodes
     def get_server_public_key(self, key_name):
         """
         GET /api/server/public-keys/{key_name}
@@ -389,18 +546,25 @@ class ApiClient:
         response = self.client.get(self.SERVER_PUBLIC_KEYS + '/' + key_name)
         response.raise_for_status()
 
-        return PublicKey(**response.json())
+        return models.PublicKey(**response.json())
 
     def get_client_public_keys(self):
         """
         GET /api/client/public-keys
         :return: List
         """
-        response = self.client.get(self.CLIENT_PUBLIC_KEYS)
-        response.raise_for_status()
+        return list(self.iter_client_public_keys())
 
-        return PublicKey.from_list(response.json())
+    def iter_client_public_keys(self):
+        """
+        GET /api/client/public-keys
+        Parses the response while it is downloaded.
+        :return: iterator of PublicKey
+        """
+        response = self.client.get(self.CLIENT_PUBLIC_KEYS, stream=True)
+        return self._iter_models(response, models.PublicKey)
 
+    @_decodes
     def get_client_public_key(self, key_name):
         """
         GET /api/client/public-keys/{key_name}
@@ -409,7 +573,7 @@ class ApiClient:
         response = self.client.get(self.CLIENT_PUBLIC_KEYS + '/' + key_name)
         response.raise_for_status()
 
-        return PublicKey(**response.json())
+        return models.PublicKey(**response.json())
 
     def delete_client_public_key(self, key_name):
         """
@@ -419,6 +583,21 @@ class ApiClient:
         response = self.client.delete(self.CLIENT_PUBLIC_KEYS + '/' + key_name)
         response.raise_for_status()
 
+    # noinspection PyMethodMayBeStatic
+    def _iter_models(self, response, model):
+        """
+        Checks the status of a streamed response and returns an iterator which
+        decodes its JSON array body into models one at a time. The connection is
+        released once the iterator is exhausted or closed.
+        """
+        try:
+            response.raise_for_status()
+        except Exception:
+            response.close()
+            raise
+
+        return _stream_models(response, model)
+
     # noinspection PyMethodMayBeStatic,PyMethodMayBeStatic
     def _get_id_from_header(self, headers):
         """
@@ -428,3 +607,30 @@ class ApiClient:
         chunks = headers["Location"].split("/")
         return chunks[-1]
 
+
+def _lookup_results(completed, on_error):
+    for msisdn, future in completed:
+        error = future.exception()
+        if error is None:
+            yield msisdn, future.result()
+            continue
+        if on_error is not None:
+            on_error(msisdn, error)
+        yield msisdn, error
+
+
+def _unique(items, window):
+    # remembers only the most recent numbers, so memory stays flat on endless input
+    from .helpers.cache import LRUCache
+    seen = LRUCache(window)
+    for item in items:
+        if seen.add(item, True):
+            yield item
+
+
+def _stream_models(response, model):
+    try:
+        for item in iter_json_array(response.iter_content(ApiClient.STREAM_CHUNK_SIZE)):
+            yield model(**item)
+    finally:
+        response.close()
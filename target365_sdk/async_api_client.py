@@ -0,0 +1,461 @@
+from .api_client import ApiClient
+from .helpers.async_http_client import AsyncHttpClient
+from .models.lookup_result import LookupResult
+from .models.keyword import Keyword
+from .models.out_message import OutMessage
+from .models.strex_merchant import StrexMerchant
+from .models.in_message import InMessage
+from .models.one_time_password import OneTimePassword
+from .models.strex_transaction import StrexTransaction
+from .models.public_key import PublicKey
+
+
+class AsyncApiClient:
+    """
+    asyncio version of ApiClient. Every ApiClient endpoint method is available
+    as a coroutine with the same arguments, validation and return values.
+
+        async with AsyncApiClient(base_uri, key_name, private_key) as client:
+            await client.create_out_message(out_message)
+
+    It is a subset of ApiClient: the helpers built on threads (lookup_many,
+    create_out_message_bulk, update_out_messages, delete_out_messages) and the
+    streaming iter_* methods are not available. Run concurrent calls with
+    asyncio.gather instead, get_all_* and the other list methods return
+    complete lists.
+    """
+
+    PING = ApiClient.PING
+    LOOKUP = ApiClient.LOOKUP
+    KEYWORDS = ApiClient.KEYWORDS
+    OUT_MESSAGES = ApiClient.OUT_MESSAGES
+    IN_MESSAGES = ApiClient.IN_MESSAGES
+    PREPARE_MSISDNS = ApiClient.PREPARE_MSISDNS
+    STREX_MERCHANTS = ApiClient.STREX_MERCHANTS
+    STREX_TRANSACTIONS = ApiClient.STREX_TRANSACTIONS
+    STREX_ONE_TIME_PASSWORDS = ApiClient.STREX_ONE_TIME_PASSWORDS
+    SERVER_PUBLIC_KEYS = ApiClient.SERVER_PUBLIC_KEYS
+    CLIENT_PUBLIC_KEYS = ApiClient.CLIENT_PUBLIC_KEYS
+
+    NOT_FOUND = ApiClient.NOT_FOUND
+
+    def __init__(self, base_uri, key_name, private_key, lookup_cache=None, **client_options):
+        """
+        :param lookup_cache: optional helpers.cache.LookupCache used by lookup() (its disk tier, when
+            configured, is read and written on the event loop thread)
+        :param client_options: connection options passed on to AsyncHttpClient
+            (limit, limit_per_host, keepalive_timeout, signer, rate_limiter, observer)
+        """
+        self.client = AsyncHttpClient(base_uri, key_name, private_key, **client_options)
+        self.lookup_cache = lookup_cache
+
+    async def close(self):
+        """
+        Closes the connections held by this client
+        """
+        await self.client.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    ###  Ping controller  ###
+
+    async def ping(self):
+        """
+        GET /api/ping
+        Pings the service and returns a hello message
+        :return: return description
+        """
+
+        response = await self.client.get(self.PING)
+        response.raise_for_status()
+
+        return response.text  # returns the string "pong"
+
+    ###  Lookup controller  ###
+
+    async def lookup(self, msisdn):
+        """
+        GET /api/lookup
+        Looks up address info on a mobile phone number.
+        :msisdn: Mobile phone number (required)
+        :return: LookupResult
+        """
+
+        if msisdn is None:
+            raise ValueError("msisdn")
+
+        if self.lookup_cache is not None:
+            found, result = self.lookup_cache.get(msisdn)
+            if found:
+                return None if result is None else LookupResult(**result)
+
+        payload = {"msisdn": msisdn}
+        response = await self.client.get_with_params(self.LOOKUP, payload)
+        if response.status_code == self.NOT_FOUND:
+            if self.lookup_cache is not None:
+                self.lookup_cache.put(msisdn, None)
+            return None
+
+        response.raise_for_status()
+
+        result = response.json()
+        if self.lookup_cache is not None:
+            self.lookup_cache.put(msisdn, result)
+
+        return LookupResult(**result)
+
+    ###  Keyword controller  ###
+
+    async def create_keyword(self, keyword):
+        """
+        POST /api/keywords
+        Creates a new keyword.
+        :keyword: Keyword
+        :return: string
+        """
+        if keyword is None:
+            raise ValueError("keyword")
+        response = await self.client.post(self.KEYWORDS, keyword)
+        response.raise_for_status()
+
+        return self._get_id_from_header(response.headers)
+
+    async def get_all_keywords(self, short_number_id=None, keyword=None, mode=None, tag=None):
+        """
+        GET /api/keywords
+        Gets all keywords.
+        :return: Keyword[]
+        """
+        params = {}
+        if short_number_id is not None:
+            params["shortNumberId"] = short_number_id
+        if keyword is not None:
+            params["keywordText"] = keyword
+        if mode is not None:
+            params["mode"] = mode
+        if tag is not None:
+            params["tag"] = tag
+
+        response = await self.client.get_with_params(self.KEYWORDS, params)
+        response.raise_for_status()
+        return Keyword.from_list(response.json())
+
+    async def get_keyword(self, keyword_id):
+        """
+        GET /api/keywords/{keywordId}
+        Gets a keyword.
+        :keywordId: string
+        :return: Keyword
+        """
+        if keyword_id is None:
+            raise ValueError("keywordId")
+
+        response = await self.client.get(self.KEYWORDS + "/" + keyword_id)
+        if response.status_code == self.NOT_FOUND:
+            return None
+
+        response.raise_for_status()
+
+        return Keyword(**response.json())
+
+    async def update_keyword(self, keyword):
+        """
+        PUT /api/keywords/{keywordId}
+        Updates a keyword
+        :param keyword: Keyword
+        :return:
+        """
+        if keyword is None:
+            raise ValueError("keyword")
+        if keyword.keywordId is None:
+            raise ValueError("keywordId")
+
+        response = await self.client.put(
+            self.KEYWORDS + "/" + keyword.keywordId, keyword)
+
+        response.raise_for_status()
+
+    async def delete_keyword(self, keyword_id):
+        """
+        DELETE /api/keywords/{keywordId}
+        Deletes a keyword
+        :keywordId: string
+        """
+        if keyword_id is None:
+            raise ValueError("keywordId")
+
+        response = await self.client.delete(self.KEYWORDS + "/" + keyword_id)
+        response.raise_for_status()
+
+    ###  OutMessage controller  ###
+
+    async def prepare_msisdns(self, msisdns):
+        """
+        POST /api/prepare-msisdns
+        MSISDNs to prepare as a string array
+        :message: string[]
+        """
+        if msisdns is None:
+            raise ValueError("msisdns")
+        response = await self.client.post(self.PREPARE_MSISDNS, msisdns)
+        response.raise_for_status()
+
+    async def create_out_message(self, out_message):
+        """
+        POST /api/out-messages
+        Creates a new out-message
+        :message: OutMessage
+        """
+        if out_message is None:
+            raise ValueError("message")
+
+        response = await self.client.post(self.OUT_MESSAGES, out_message)
+        response.raise_for_status()
+
+        return self._get_id_from_header(response.headers)
+
+    async def create_out_message_batch(self, out_messages):
+        """
+        POST /api/out-messages/batch
+        Creates a new out-message batch.
+        :messages: OutMessage[]
+        """
+        if out_messages is None:
+            raise ValueError("messages")
+
+        response = await self.client.post(self.OUT_MESSAGES + "/batch", out_messages)
+        response.raise_for_status()
+
+    async def get_out_message(self, transaction_id):
+        """
+        GET /api/out-messages/batch/{transactionId}
+        Gets and out-message
+        :transactionId: string
+        :return: OutMessage
+        """
+        if transaction_id is None:
+            raise ValueError("transactionId")
+
+        response = await self.client.get(self.OUT_MESSAGES + "/" + transaction_id)
+        if response.status_code == self.NOT_FOUND:
+            return None
+
+        response.raise_for_status()
+
+        return OutMessage(**response.json())
+
+    async def update_out_message(self, out_message):
+        """
+        PUT /api/out-messages/batch/{transactionId}
+        Updates a future scheduled out-message.
+        :message: OutMessage
+        """
+        if out_message is None:
+            raise ValueError("message")
+        if out_message.transactionId is None:
+            raise ValueError("transactionId")
+
+        response = await self.client.put(
+            self.OUT_MESSAGES + "/" + out_message.transactionId, out_message)
+        response.raise_for_status()
+
+    async def delete_out_message(self, transaction_id):
+        """
+        DELETE /api/out-messages/batch/{transactionId}
+        Deletes a future sheduled out-message.
+        :transactionId: string
+        """
+        if transaction_id is None:
+            raise ValueError("transactionId")
+
+        response = await self.client.delete(self.OUT_MESSAGES + "/" + transaction_id)
+        response.raise_for_status()
+
+    ###  InMessages controller  ###
+
+    async def get_in_message(self, short_number_id, transaction_id):
+        """
+        GET /api/in-messages/{shortNumberId}/{transactionId}
+        Gets and in-message
+        :shortNumberId: string
+        :transactionId: string
+        :return: InMessage
+        """
+        if transaction_id is None:
+            raise ValueError("transactionId")
+
+        response = await self.client.get(self.IN_MESSAGES + "/" + short_number_id + "/" + transaction_id)
+        response.raise_for_status()
+
+        return InMessage(**response.json())
+
+    ###  StrexMerchants controller  ###
+
+    async def get_strex_merchants(self):
+        """
+        GET /api/strex/merchants
+        Gets all merchant ids.
+        :return: StrexMerchant[]
+        """
+        response = await self.client.get(self.STREX_MERCHANTS)
+        response.raise_for_status()
+        return StrexMerchant.from_list(response.json())
+
+    async def get_strex_merchant(self, merchant_id):
+        """
+        GET /api/strex/merchants/{merchantId}
+        Gets a merchant.
+        :merchantId: string
+        :returns: StrexMerchant
+        """
+        if merchant_id is None:
+            raise ValueError("merchantId")
+
+        response = await self.client.get(self.STREX_MERCHANTS + "/" + merchant_id)
+
+        if response.status_code == self.NOT_FOUND:
+            return None
+
+        response.raise_for_status()
+
+        return StrexMerchant(**response.json())
+
+    async def save_strex_merchant(self, strex_merchant):
+        """
+        PUT /api/strex/merchants/{merchantId}
+        Creates/updates a merchant.
+        :merchant: StrexMerchant
+        """
+        if strex_merchant is None:
+            raise ValueError("merchant")
+        if strex_merchant.merchantId is None:
+            raise ValueError("merchantId")
+
+        # expecting http 204 response (no content)
+        response = await self.client.put(self.STREX_MERCHANTS + "/" + strex_merchant.merchantId, strex_merchant)
+        response.raise_for_status()
+
+    async def delete_strex_merchant(self, merchant_id):
+        """
+        DELETE /api/strex/merchants/{merchantId}
+        Deletes a merchant
+        :merchantId: string
+        """
+        if merchant_id is None:
+            raise ValueError("merchantId")
+
+        response = await self.client.delete(self.STREX_MERCHANTS + "/" + merchant_id)
+        response.raise_for_status()
+
+    async def create_one_time_password(self, one_time_password):
+        """
+        POST /api/strex/one-time-passwords
+        :return:
+        """
+
+        if one_time_password is None:
+            raise ValueError("invalid one_time_password")
+        if one_time_password.transactionId is None:
+            raise ValueError("invalid one_time_password.transactionId")
+        if one_time_password.merchantId is None:
+            raise ValueError("invalid one_time_password.merchantId")
+        if one_time_password.recipient is None:
+            raise ValueError("invalid one_time_password.recipient")
+        if one_time_password.sender is None:
+            raise ValueError("invalid one_time_password.sender")
+        if one_time_password.recurring is None:
+            raise ValueError("invalid one_time_password.recurring")
+
+        response = await self.client.post(self.STREX_ONE_TIME_PASSWORDS, one_time_password)
+        response.raise_for_status()
+
+    async def get_one_time_password(self, transaction_id):
+        """
+        GET /api/strex/one-time-passwords/{transactionId}
+
+        :param transaction_id:
+        :return: OneTimePassword
+        """
+
+        response = await self.client.get(self.STREX_ONE_TIME_PASSWORDS + '/' + transaction_id)
+        response.raise_for_status()
+
+        return OneTimePassword(**response.json())
+
+    async def create_strex_transaction(self, transaction):
+        """
+        POST /api/strex/transactions
+        :return str:
+        """
+
+        response = await self.client.post(self.STREX_TRANSACTIONS, transaction)
+        response.raise_for_status()
+
+        return self._get_id_from_header(response.headers)
+
+    async def get_strex_transaction(self, transaction_id):
+        """
+        GET /api/strex/transactions/{transactionId}
+        :return:
+        """
+
+        response = await self.client.get(self.STREX_TRANSACTIONS + '/' + transaction_id)
+        response.raise_for_status()
+
+        return StrexTransaction(validate_keys=False, **response.json())
+
+    async def delete_strex_transaction(self, transaction_id):
+        """
+        DELETE /api/strex/transactions/{transactionId}
+        :param transaction_id:
+        :return:
+        """
+        response = await self.client.delete(self.STREX_TRANSACTIONS + '/' + transaction_id)
+        response.raise_for_status()
+
+    ### PublicKey controller  ###
+
+    async def get_server_public_key(self, key_name):
+        """
+        GET /api/server/public-keys/{key_name}
+        :param key_name:
+        :return:
+        """
+        response = await self.client.get(self.SERVER_PUBLIC_KEYS + '/' + key_name)
+        response.raise_for_status()
+
+        return PublicKey(**response.json())
+
+    async def get_client_public_keys(self):
+        """
+        GET /api/client/public-keys
+        :return: List
+        """
+        response = await self.client.get(self.CLIENT_PUBLIC_KEYS)
+        response.raise_for_status()
+
+        return PublicKey.from_list(response.json())
+
+    async def get_client_public_key(self, key_name):
+        """
+        GET /api/client/public-keys/{key_name}
+        :return: Dict
+        """
+        response = await self.client.get(self.CLIENT_PUBLIC_KEYS + '/' + key_name)
+        response.raise_for_status()
+
+        return PublicKey(**response.json())
+
+    async def delete_client_public_key(self, key_name):
+        """
+        DELETE /api/client/public-keys/{key_name}
+        :return:
+        """
+        response = await self.client.delete(self.CLIENT_PUBLIC_KEYS + '/' + key_name)
+        response.raise_for_status()
+
+    _get_id_from_header = ApiClient._get_id_from_header
@@ -0,0 +1,300 @@
+import time
+import uuid
+from .helpers.concurrency import chunked, imap_bounded
+
+# statuses worth trying again, the request may well succeed a moment later
+TRANSIENT_STATUSES = (408, 429, 500, 502, 503, 504)
+
+
+class BatchResult:
+    """
+    Outcome of one POST /api/out-messages/batch call
+    """
+
+    def __init__(self, index, transaction_ids, error=None):
+        self.index = index
+        self.transaction_ids = transaction_ids
+        self.error = error
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def status_code(self):
+        """
+        HTTP status code of a failed batch, None when the batch succeeded or never got a response
+        """
+        return _status_code(self.error)
+
+
+class BulkSendResult:
+    """
+    Aggregated outcome of a bulk send
+    """
+
+    def __init__(self):
+        self.batches = []
+        self.errors = {}  # transactionId -> exception of the batch it was sent in
+        self.sent_count = 0
+        self.failed_count = 0
+
+    def add(self, batch_result):
+        self.batches.append(batch_result)
+        if batch_result.success:
+            self.sent_count += len(batch_result.transaction_ids)
+        else:
+            self.failed_count += len(batch_result.transaction_ids)
+            for transaction_id in batch_result.transaction_ids:
+                self.errors[transaction_id] = batch_result.error
+
+    @property
+    def success(self):
+        return self.failed_count == 0
+
+    @property
+    def failed_batches(self):
+        return [batch for batch in self.batches if not batch.success]
+
+
+class BulkSender:
+    """
+    Sends any number of out-messages by splitting them into batches which are
+    posted concurrently to /api/out-messages/batch.
+
+    Messages are consumed lazily, so generators of millions of messages can be
+    passed without building a list first. Messages without a transactionId get a
+    random one assigned so every message can be traced in the results. It is set
+    on the OutMessage objects passed in, read it from there to match a message
+    with its result.
+
+    A failed batch is not retried, it is reported in the results. Only throttled
+    requests (429, 503) are retried, and only when the api client was created
+    with a rate_limiter.
+    """
+
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_MAX_WORKERS = 4
+
+    def __init__(self, api_client, batch_size=DEFAULT_BATCH_SIZE, max_workers=DEFAULT_MAX_WORKERS,
+                 max_pending=None):
+        """
+        :param api_client: ApiClient used to post the batches
+        :param batch_size: number of messages per batch request
+        :param max_workers: number of batches posted in parallel
+        :param max_pending: number of batches built ahead of the workers (defaults to 2 * max_workers)
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size")
+
+        self.api_client = api_client
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+
+    def send(self, out_messages):
+        """
+        Sends all messages and waits for every batch to finish
+        :param out_messages: iterable of OutMessage
+        :return: BulkSendResult
+        """
+        result = BulkSendResult()
+        for batch_result in self.iter_send(out_messages):
+            result.add(batch_result)
+        return result
+
+    def iter_send(self, out_messages):
+        """
+        Sends all messages, yielding a BatchResult for each batch as it completes
+        (not necessarily in input order)
+        :param out_messages: iterable of OutMessage
+        :return: generator of BatchResult
+        """
+        if out_messages is None:
+            raise ValueError("messages")
+
+        batches = enumerate(chunked(out_messages, self.batch_size))
+        for (index, batch), future in imap_bounded(self._send_batch, batches, self.max_workers, self.max_pending):
+            yield BatchResult(index, [message.transactionId for message in batch], future.exception())
+
+    def _send_batch(self, indexed_batch):
+        index, batch = indexed_batch
+        for message in batch:
+            if getattr(message, "transactionId", None) is None:
+                message.transactionId = str(uuid.uuid4())
+
+        self.api_client.create_out_message_batch(batch)
+
+
+class MutationResult:
+    """
+    Outcome of updating or deleting one out-message
+    """
+
+    def __init__(self, transaction_id, error=None, attempts=1):
+        self.transaction_id = transaction_id
+        self.error = error
+        self.attempts = attempts
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def status_code(self):
+        """
+        HTTP status code of a failed call, None when the call succeeded or never got a response
+        """
+        return _status_code(self.error)
+
+
+class BulkMutationResult:
+    """
+    Aggregated outcome of a bulk update or delete
+    """
+
+    def __init__(self):
+        self.succeeded_count = 0
+        self.failed_count = 0
+        self.retries = 0
+        self.errors = {}  # transactionId -> exception of the last attempt
+
+    def add(self, mutation_result):
+        self.retries += mutation_result.attempts - 1
+        if mutation_result.success:
+            self.succeeded_count += 1
+        else:
+            self.failed_count += 1
+            self.errors[mutation_result.transaction_id] = mutation_result.error
+
+    @property
+    def success(self):
+        return self.failed_count == 0
+
+
+class BulkMutator:
+    """
+    Updates or deletes any number of scheduled out-messages with concurrent
+    PUT/DELETE /api/out-messages/{transactionId} calls.
+
+    Input is consumed lazily and results are yielded as calls complete, so
+    progress can be reported while a large campaign is rescheduled or
+    cancelled. Calls failing with a connection error or a transient status
+    (408, 429, 5xx) are retried with exponential backoff, or after the
+    Retry-After period when the response has one.
+    """
+
+    DEFAULT_MAX_WORKERS = 8
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_RETRY_DELAY = 0.5
+
+    def __init__(self, api_client, max_workers=DEFAULT_MAX_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_delay=DEFAULT_RETRY_DELAY, max_pending=None):
+        """
+        :param api_client: ApiClient used for the calls
+        :param max_workers: number of calls in parallel
+        :param max_retries: times a transient failure is retried
+        :param retry_delay: seconds before the first retry, doubled for every further retry
+        :param max_pending: number of calls queued ahead of the workers (defaults to 2 * max_workers)
+        """
+        self.api_client = api_client
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.max_pending = max_pending
+
+    def update(self, out_messages):
+        """
+        :param out_messages: iterable of OutMessage with transactionId set
+        :return: BulkMutationResult
+        :raises ValueError: when a message without transactionId is reached
+        """
+        return _collect(self.iter_update(out_messages))
+
+    def delete(self, transaction_ids):
+        """
+        :param transaction_ids: iterable of transactionIds
+        :return: BulkMutationResult
+        """
+        return _collect(self.iter_delete(transaction_ids))
+
+    def iter_update(self, out_messages):
+        """
+        Updates all messages, yielding a MutationResult per message as it completes
+        (not necessarily in input order)
+        :raises ValueError: when a message without transactionId is reached, results are keyed by it
+        """
+        if out_messages is None:
+            raise ValueError("messages")
+
+        out_messages = _with_transaction_ids(out_messages)
+        for out_message, future in imap_bounded(self._update, out_messages, self.max_workers, self.max_pending):
+            yield future.result()
+
+    def iter_delete(self, transaction_ids):
+        """
+        Deletes all messages, yielding a MutationResult per message as it completes
+        (not necessarily in input order)
+        """
+        if transaction_ids is None:
+            raise ValueError("transactionIds")
+
+        for transaction_id, future in imap_bounded(self._delete, transaction_ids, self.max_workers, self.max_pending):
+            yield future.result()
+
+    def _update(self, out_message):
+        return self._call(self.api_client.update_out_message, out_message, out_message.transactionId)
+
+    def _delete(self, transaction_id):
+        return self._call(self.api_client.delete_out_message, transaction_id, transaction_id)
+
+    def _call(self, func, argument, transaction_id):
+        attempt = 1
+        while True:
+            try:
+                func(argument)
+                return MutationResult(transaction_id, attempts=attempt)
+            except Exception as error:
+                if attempt > self.max_retries or not _is_transient(error):
+                    return MutationResult(transaction_id, error, attempt)
+                delay = _retry_after(error)
+            time.sleep(self.retry_delay * 2 ** (attempt - 1) if delay is None else delay)
+            attempt += 1
+
+
+def _with_transaction_ids(out_messages):
+    for out_message in out_messages:
+        if getattr(out_message, "transactionId", None) is None:
+            raise ValueError("transactionId")
+        yield out_message
+
+
+def _collect(mutation_results):
+    result = BulkMutationResult()
+    for mutation_result in mutation_results:
+        result.add(mutation_result)
+    return result
+
+
+def _is_transient(error):
+    import requests
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return _status_code(error) in TRANSIENT_STATUSES
+
+
+def _retry_after(error):
+    """
+    :return: seconds the response of a failed call asks to wait (Retry-After), None when it doesn't say
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    from .helpers.rate_limiter import _parse_retry_after
+    return _parse_retry_after(headers.get("Retry-After"), time.time())
+
+
+def _status_code(error):
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None)
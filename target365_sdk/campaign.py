@@ -0,0 +1,329 @@
+import csv
+import io
+import json
+import os
+import time
+import uuid
+from itertools import islice
+from .bulk import _is_transient, _status_code
+from .helpers.concurrency import chunked, imap_bounded
+from .models.out_message import OutMessage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    #python3
+    _replace = os.replace
+except AttributeError:
+    #python2
+    _replace = None
+
+# namespace of the transactionIds derived from campaign id and row number
+CAMPAIGN_NAMESPACE = uuid.uuid5(uuid.NAMESPACE_URL, "https://target365.io/campaigns")
+
+
+def read_csv(source, delimiter=",", encoding="utf-8-sig"):
+    """
+    Reads a CSV file with a header row one row at a time
+    :param source: path or text file object
+    :return: generator of dicts, column name -> value
+    """
+    if isinstance(source, str):
+        with io.open(source, "r", encoding=encoding, newline="") as stream:
+            for row in csv.DictReader(stream, delimiter=delimiter):
+                yield row
+    else:
+        for row in csv.DictReader(source, delimiter=delimiter):
+            yield row
+
+
+def read_jsonl(source):
+    """
+    Reads a file with one JSON object per line, one line at a time. Blank lines are skipped.
+    :param source: path or file object
+    :return: generator of dicts
+    """
+    if isinstance(source, str):
+        with io.open(source, "rb") as stream:
+            for row in _parse_lines(stream):
+                yield row
+    else:
+        for row in _parse_lines(source):
+            yield row
+
+
+def transaction_id(campaign_id, row_number):
+    """
+    :return: the transactionId a campaign gives the message of a row, the same on every run
+    """
+    return str(uuid.uuid5(CAMPAIGN_NAMESPACE, "%s:%d" % (campaign_id, row_number)))
+
+
+class Checkpoint:
+    """
+    Campaign progress in a small JSON file, replaced atomically so a crash
+    leaves either the previous or the new checkpoint, never a partial one.
+    On Python 2 under Windows, where a file can't be renamed over another,
+    the old checkpoint is removed first and a crash in between loses it.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def load(self):
+        """
+        :return: the saved state, None when there is no checkpoint yet
+        """
+        try:
+            with io.open(self.path, "r", encoding="utf-8") as stream:
+                return json.load(stream)
+        except (IOError, OSError):
+            if os.path.exists(self.path):
+                raise
+            return None
+
+    def save(self, state):
+        temp_path = self.path + ".tmp"
+        with io.open(temp_path, "w", encoding="utf-8") as stream:
+            stream.write(json.dumps(state, sort_keys=True))
+            stream.flush()
+            os.fsync(stream.fileno())
+        (_replace or _rename)(temp_path, self.path)
+
+    def delete(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class CampaignResult:
+    """
+    Outcome of a campaign run. Counters cover all runs of the campaign, up to the watermark.
+    """
+
+    def __init__(self, campaign_id, resumed_from):
+        self.campaign_id = campaign_id
+        self.resumed_from = resumed_from  # rows done by earlier runs
+        self.watermark = resumed_from     # rows done, every row before it is acknowledged
+        self.sent_count = 0
+        self.duplicate_count = 0          # messages the API had already (sent before a crash)
+        self.invalid_count = 0            # rows which gave no message
+        self.row_errors = {}              # row number -> error of build_message, for the rows of this run
+        self.error = None
+
+    @property
+    def success(self):
+        return self.error is None
+
+    @property
+    def status_code(self):
+        """
+        HTTP status code of the failure that stopped the run, None when it succeeded or never got a response
+        """
+        return _status_code(self.error)
+
+
+class Campaign:
+    """
+    Sends an out-message per row of a (possibly huge) recipient file, and can
+    resume after a crash without sending a message twice.
+
+    Rows are read lazily and sent in concurrent batches with at most
+    max_pending batches in memory. Every message gets a transactionId derived
+    from campaign id and row number, so a row has the same transactionId on
+    every run. Batches complete out of order, so progress is kept as a
+    watermark: the number of leading rows whose batches were all acknowledged.
+    The checkpoint file is rewritten whenever the watermark moves, and a new
+    run skips the rows before it. Batches after the watermark which got through
+    before a crash are sent again, the API rejects them as duplicates (409) and
+    they are counted as such.
+
+        campaign = Campaign(api_client, "spring-sale", "spring-sale.checkpoint",
+                            sender="Target365", content="Spring sale starts today!")
+        result = campaign.run(read_csv("recipients.csv"))
+
+    A batch failing for good (after max_retries for transient errors) stops
+    the run once the batches in flight are done. The checkpoint stays before
+    the failed batch and run() can simply be called again. A row build_message
+    raises an exception for is counted as invalid and its error kept in
+    row_errors, the other rows are sent all the same.
+    """
+
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_MAX_WORKERS = 4
+    DEFAULT_MAX_RETRIES = 3
+    DEFAULT_RETRY_DELAY = 1.0
+
+    def __init__(self, api_client, campaign_id, checkpoint_path, build_message=None, batch_size=DEFAULT_BATCH_SIZE,
+                 max_workers=DEFAULT_MAX_WORKERS, max_pending=None, max_retries=DEFAULT_MAX_RETRIES,
+                 retry_delay=DEFAULT_RETRY_DELAY, **fields):
+        """
+        :param api_client: ApiClient used to post the batches
+        :param campaign_id: name of the campaign, part of every transactionId
+        :param checkpoint_path: file the progress is kept in
+        :param build_message: callable turning a row into an OutMessage (or None to skip the row),
+            defaults to taking the OutMessage fields of the row on top of fields
+        :param batch_size: number of rows per batch request
+        :param max_workers: number of batches posted in parallel
+        :param max_pending: number of batches built ahead of the workers (defaults to 2 * max_workers)
+        :param max_retries: times a batch failing with a transient error is retried
+        :param retry_delay: seconds before the first retry, doubled for every further retry
+        :param fields: OutMessage fields shared by all messages (sender, content, ...)
+        """
+        if not campaign_id:
+            raise ValueError("campaignId")
+        if batch_size < 1:
+            raise ValueError("batch_size")
+
+        self.api_client = api_client
+        self.campaign_id = campaign_id
+        self.checkpoint = Checkpoint(checkpoint_path)
+        self.build_message = build_message or self._default_message
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.fields = fields
+
+    def run(self, rows):
+        """
+        Sends the messages of all rows after the checkpoint
+        :param rows: iterable of rows, e.g. read_csv(path) or read_jsonl(path); must be the same rows on every run
+        :return: CampaignResult
+        """
+        if rows is None:
+            raise ValueError("rows")
+
+        state = self._load_state()
+        result = CampaignResult(self.campaign_id, state["watermark"])
+        result.sent_count = state["sent"]
+        result.duplicate_count = state["duplicates"]
+        result.invalid_count = state["invalid"]
+
+        # batch start row -> (end row, sent, duplicates, invalid, row errors) for batches done after the watermark
+        done = {}
+        batches = chunked(enumerate(islice(rows, result.watermark, None), result.watermark), self.batch_size)
+        batches = _until(batches, lambda: result.error is not None)
+        for batch, future in imap_bounded(self._send_batch, batches, self.max_workers, self.max_pending):
+            error = future.exception()
+            if error is not None:
+                # no new batches, but the ones in flight may still move the watermark
+                result.error = result.error or error
+                continue
+
+            done[batch[0][0]] = (batch[-1][0] + 1,) + future.result()
+            if batch[0][0] == result.watermark:
+                while result.watermark in done:
+                    end, sent, duplicates, invalid, row_errors = done.pop(result.watermark)
+                    result.watermark = end
+                    result.sent_count += sent
+                    result.duplicate_count += duplicates
+                    result.invalid_count += invalid
+                    result.row_errors.update(row_errors)
+                self._save_state(result)
+        return result
+
+    def _load_state(self):
+        state = self.checkpoint.load()
+        if state is None:
+            return {"campaignId": self.campaign_id, "watermark": 0, "sent": 0, "duplicates": 0, "invalid": 0}
+        if state.get("campaignId") != self.campaign_id:
+            raise ValueError("Checkpoint " + self.checkpoint.path + " belongs to campaign " +
+                             str(state.get("campaignId")))
+        return state
+
+    def _save_state(self, result):
+        self.checkpoint.save({
+            "campaignId": self.campaign_id,
+            "watermark": result.watermark,
+            "sent": result.sent_count,
+            "duplicates": result.duplicate_count,
+            "invalid": result.invalid_count,
+        })
+
+    def _send_batch(self, batch):
+        """
+        :param batch: list of (row number, row)
+        :return: (sent, duplicates, invalid) counts and the build_message errors by row number
+        """
+        out_messages = []
+        row_errors = {}
+        for row_number, row in batch:
+            try:
+                out_message = self.build_message(row)
+            except Exception as error:
+                row_errors[row_number] = error
+                continue
+            if out_message is None or not getattr(out_message, "recipient", None):
+                continue
+            if getattr(out_message, "transactionId", None) is None:
+                out_message.transactionId = transaction_id(self.campaign_id, row_number)
+            out_messages.append(out_message)
+
+        invalid = len(batch) - len(out_messages)
+        if not out_messages:
+            return 0, 0, invalid, row_errors
+
+        try:
+            self._call(self.api_client.create_out_message_batch, out_messages)
+            return len(out_messages), 0, invalid, row_errors
+        except Exception as error:
+            if _status_code(error) != 409:
+                raise
+
+        # some messages of the batch were sent before, find out which one by one
+        sent = duplicates = 0
+        for out_message in out_messages:
+            try:
+                self._call(self.api_client.create_out_message, out_message)
+                sent += 1
+            except Exception as error:
+                if _status_code(error) != 409:
+                    raise
+                duplicates += 1
+        return sent, duplicates, invalid, row_errors
+
+    def _call(self, func, argument):
+        attempt = 1
+        while True:
+            try:
+                return func(argument)
+            except Exception as error:
+                if attempt > self.max_retries or not _is_transient(error):
+                    raise
+            time.sleep(self.retry_delay * 2 ** (attempt - 1))
+            attempt += 1
+
+    def _default_message(self, row):
+        fields = dict(self.fields)
+        accepted = OutMessage._field_set
+        for key, value in row.items():
+            if key in accepted and value not in (None, ""):
+                fields[key] = value
+        return OutMessage(**fields)
+
+
+def _rename(source, destination):
+    """
+    os.replace for python2: os.rename there doesn't replace an existing file on Windows
+    """
+    if os.name == "nt" and os.path.exists(destination):
+        os.remove(destination)
+    os.rename(source, destination)
+
+
+def _until(items, stop):
+    for item in items:
+        if stop():
+            return
+        yield item
+
+
+def _parse_lines(stream):
+    loads = orjson.loads if orjson is not None else json.loads
+    for line in stream:
+        if line.strip():
+            yield loads(line)
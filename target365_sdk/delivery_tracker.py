@@ -0,0 +1,241 @@
+import heapq
+import logging
+import random
+import threading
+import time
+from array import array
+from .helpers.concurrency import imap_bounded
+
+_logger = logging.getLogger(__name__)
+
+
+class DeliveryTracker:
+    """
+    Polls the status of many out-messages until they reach a final status.
+
+    Messages are kept on a heap ordered by their next poll time. A message
+    whose status did not change is polled again after an exponentially growing
+    delay (initial_delay, times backoff per poll, capped at max_delay). A
+    change resets the delay and is reported to on_change; an exception
+    raised by on_change is logged to the target365_sdk.delivery_tracker
+    logger and counted as a callback error in stats(), the other messages
+    are tracked on. Polls run on
+    max_workers threads and are spaced to at most max_rate requests per
+    second, so the request rate stays predictable however many messages are
+    tracked.
+
+    Per message the tracker keeps its transactionId, one heap entry (a single
+    int holding poll time and index) and six bytes of counters and state. A
+    million tracked messages take about 60 MB on top of their transactionIds.
+
+        def on_change(out_message, previous_status):
+            print(out_message.transactionId, previous_status, "->", out_message.statusCode)
+
+        tracker = DeliveryTracker(api_client, on_change=on_change)
+        tracker.track(transaction_ids)
+        tracker.run()
+    """
+
+    TERMINAL_STATUSES = ("Ok", "Failed", "Reversed")
+
+    DEFAULT_INITIAL_DELAY = 5.0
+    DEFAULT_MAX_DELAY = 600.0
+    DEFAULT_BACKOFF = 2.0
+    DEFAULT_MAX_WORKERS = 8
+
+    # heap entries are due_time_in_milliseconds << _INDEX_BITS | index
+    _INDEX_BITS = 32
+
+    def __init__(self, api_client, on_change=None, max_workers=DEFAULT_MAX_WORKERS, max_rate=None,
+                 initial_delay=DEFAULT_INITIAL_DELAY, max_delay=DEFAULT_MAX_DELAY, backoff=DEFAULT_BACKOFF,
+                 jitter=0.1, max_polls=None, terminal_statuses=TERMINAL_STATUSES, clock=time.time, sleep=time.sleep):
+        """
+        :param api_client: ApiClient used to fetch the out-messages
+        :param on_change: callable taking (out_message, previous_status) when a status or the delivered flag changes
+        :param max_workers: maximum number of polls in flight
+        :param max_rate: maximum polls per second (None for no limit besides max_workers)
+        :param initial_delay: seconds until the first poll, and between polls after a change
+        :param max_delay: maximum seconds between two polls of the same message
+        :param backoff: factor the delay grows by after every poll without change
+        :param jitter: random fraction added to or taken from every delay, so polls don't bunch up
+        :param max_polls: give up on a message after this many polls without reaching a final status (None never does)
+        :param terminal_statuses: statusCode values after which a message is no longer polled
+        :param clock: function returning the current time in seconds
+        :param sleep: function waiting the given seconds, used to space polls to max_rate
+        """
+        self.api_client = api_client
+        self.on_change = on_change
+        self.max_workers = max_workers
+        self.max_rate = max_rate
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.max_polls = max_polls
+        self.terminal_statuses = frozenset(terminal_statuses)
+        self.clock = clock
+        self.sleep = sleep
+
+        self.polls = 0
+        self.changes = 0
+        self.errors = 0
+        self.callback_errors = 0
+        self.completed = 0
+        self.expired = 0
+
+        self._ids = []
+        self._polls = array("H")          # polls since the last change
+        self._total_polls = array("H")    # polls overall, for max_polls
+        self._states = array("h")         # index into self._state_keys, -1 before the first answer
+        self._state_keys = []             # (statusCode, delivered) pairs, few distinct values
+        self._state_index = {}
+        self._heap = []
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._next_send = 0.0
+
+    def track(self, transaction_ids, delay=None):
+        """
+        Adds messages to track
+        :param delay: seconds until the first poll (defaults to initial_delay)
+        """
+        due = _millis(self.clock() + (self.initial_delay if delay is None else delay))
+        with self._lock:
+            for transaction_id in transaction_ids:
+                index = len(self._ids)
+                self._ids.append(transaction_id)
+                self._polls.append(0)
+                self._total_polls.append(0)
+                self._states.append(-1)
+                self._heap.append(due << self._INDEX_BITS | index)
+            heapq.heapify(self._heap)
+
+    def run(self, timeout=None):
+        """
+        Polls until every message reached a final status (or expired), stop() is called or timeout seconds passed
+        :return: True when all messages are done
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        while not self._stopped.is_set():
+            with self._lock:
+                if not self._heap:
+                    return True
+                next_due = (self._heap[0] >> self._INDEX_BITS) / 1000.0
+
+            now = self.clock()
+            if deadline is not None and now >= deadline:
+                return False
+            if next_due > now:
+                wait = next_due - now if deadline is None else min(next_due, deadline) - now
+                self._stopped.wait(wait)
+                continue
+
+            for index, future in imap_bounded(self._poll, self._due(deadline), self.max_workers):
+                self._update(index, future)
+        return False
+
+    def stop(self):
+        """
+        Makes run() return after the polls in flight
+        """
+        self._stopped.set()
+
+    def __len__(self):
+        """
+        Number of messages still being tracked
+        """
+        return len(self._heap)
+
+    def stats(self):
+        return {
+            "tracking": len(self._heap),
+            "completed": self.completed,
+            "expired": self.expired,
+            "polls": self.polls,
+            "changes": self.changes,
+            "errors": self.errors,
+            "callback_errors": self.callback_errors,
+        }
+
+    def _due(self, deadline):
+        """
+        Yields the indexes of due messages, spaced to max_rate
+        """
+        while not self._stopped.is_set():
+            now = self.clock()
+            if self.max_rate is not None and self._next_send > now:
+                # wait before checking the deadline, so no poll starts after it
+                self.sleep(self._next_send - now)
+                now = self.clock()
+            if deadline is not None and now >= deadline:
+                return
+            with self._lock:
+                if not self._heap or (self._heap[0] >> self._INDEX_BITS) > _millis(now):
+                    return
+                entry = heapq.heappop(self._heap)
+
+            if self.max_rate is not None:
+                self._next_send = max(now, self._next_send) + 1.0 / self.max_rate
+
+            yield entry & ((1 << self._INDEX_BITS) - 1)
+
+    def _poll(self, index):
+        return self.api_client.get_out_message(self._ids[index])
+
+    def _update(self, index, future):
+        self.polls += 1
+        self._total_polls[index] = min(self._total_polls[index] + 1, 0xFFFF)
+
+        try:
+            out_message = future.result()
+        except Exception:
+            self.errors += 1
+            out_message = None
+
+        if out_message is not None:
+            status = getattr(out_message, "statusCode", None)
+            state = self._state(status, getattr(out_message, "delivered", None))
+            previous = self._states[index]
+            if state != previous:
+                self._states[index] = state
+                self._polls[index] = 0
+                self.changes += 1
+                if self.on_change is not None:
+                    self._notify(out_message, None if previous < 0 else self._state_keys[previous][0])
+
+            if status in self.terminal_statuses:
+                self.completed += 1
+                self._ids[index] = None
+                return
+
+        if self.max_polls is not None and self._total_polls[index] >= self.max_polls:
+            self.expired += 1
+            self._ids[index] = None
+            return
+
+        polls = self._polls[index]
+        self._polls[index] = min(polls + 1, 0xFFFF)
+        delay = min(self.max_delay, self.initial_delay * self.backoff ** min(polls, 64))
+        delay *= 1 + random.uniform(-self.jitter, self.jitter)
+        with self._lock:
+            heapq.heappush(self._heap, _millis(self.clock() + delay) << self._INDEX_BITS | index)
+
+    def _notify(self, out_message, previous_status):
+        try:
+            self.on_change(out_message, previous_status)
+        except Exception:
+            # a failing callback must not end the run for all the other messages
+            _logger.exception("DeliveryTracker: on_change failed for %s", getattr(out_message, "transactionId", None))
+            self.callback_errors += 1
+
+    def _state(self, status, delivered):
+        key = (status, delivered)
+        state = self._state_index.get(key)
+        if state is None:
+            state = self._state_index[key] = len(self._state_keys)
+            self._state_keys.append(key)
+        return state
+
+
+def _millis(seconds):
+    return int(seconds * 1000)
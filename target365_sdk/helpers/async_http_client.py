@@ -0,0 +1,103 @@
+import asyncio
+import time
+from timeit import default_timer as timer
+import aiohttp
+from .http_client import HttpClient
+from .http_response import HttpResponse
+
+
+class AsyncHttpClient(HttpClient):
+    """
+    asyncio flavour of HttpClient. URL building and ECDSA signing are inherited
+    unchanged, only the wire layer is replaced by a pooled aiohttp session, so
+    get/get_with_params/post/put/delete return awaitables resolving to HttpResponse.
+    """
+
+    DEFAULT_LIMIT = 100
+
+    def __init__(self, base_uri, key_name, private_key, limit=DEFAULT_LIMIT, limit_per_host=0,
+                 keepalive_timeout=15, signer=None, rate_limiter=None, observer=None):
+        """
+        :param limit: maximum number of simultaneous connections
+        :param limit_per_host: maximum number of simultaneous connections per host (0 means no limit)
+        :param keepalive_timeout: seconds an idle keep-alive connection is kept open
+        :param signer: helpers.signing.Signer used to sign requests (defaults to the fastest installed backend)
+        :param rate_limiter: helpers.rate_limiter.AdaptiveRateLimiter shared by the requests of this client (None disables)
+        :param observer: receives a helpers.instrumentation.RequestMetrics per request (None disables instrumentation).
+            The round trip, reading the body included, is reported as server time, aiohttp connects are not
+            timed separately. decode_time is always 0: the coroutines of one event loop share a thread, so the
+            time spent turning a response into models can't be told apart per request.
+        """
+        self._init_shared(base_uri, key_name, private_key, signer, rate_limiter, observer)
+        self.transport = None
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self._session = None
+
+    async def close(self):
+        """
+        Closes the aiohttp session and all its connections
+        """
+        if self._session is not None:
+            session, self._session = self._session, None
+            await session.close()
+
+    async def _send(self, method, url, signed_uri, params=None, data=None, stream=False, encode_time=0.0):
+        limiter = self.rate_limiter
+        attempt = 0
+        while True:
+            if limiter is not None:
+                # the limiter's blocking acquire() would stall the event loop
+                delay = limiter.try_acquire()
+                while delay:
+                    await asyncio.sleep(delay)
+                    delay = limiter.try_acquire()
+                started = time.time()
+
+            metrics = None
+            if self.observer is not None:
+                metrics = self._new_metrics(method, url, data, encode_time, attempt)
+                sign_started = timer()
+
+            headers = self._get_auth_header(method, signed_uri, data)
+            if metrics is not None:
+                metrics.sign_time = timer() - sign_started
+            try:
+                response = await self._request(method, url, params=params, data=data, headers=headers, stream=stream)
+            except Exception as error:
+                if metrics is not None:
+                    self._report(metrics, sign_started, 0.0, error=error)
+                if limiter is not None:
+                    limiter.release(started)
+                raise
+
+            if metrics is not None:
+                self._report(metrics, sign_started, 0.0, response)
+
+            if limiter is None:
+                return response
+            limiter.release(started, response.status_code, response.headers.get("Retry-After"))
+            if not limiter.should_retry(response, attempt):
+                return response
+            attempt += 1
+
+    async def _request(self, method, url, params=None, data=None, headers=None, stream=False):
+        # bodies are always read completely, stream is accepted for interface compatibility
+        headers = dict(headers or {})
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+
+        async with self._get_session().request(method, url, params=params, data=data, headers=headers) as response:
+            content = await response.read()
+            return HttpResponse(response.status, response.headers, content, str(response.url), response.reason)
+
+    def _get_session(self):
+        # the event loop is single threaded, so no locking is needed here
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(connector=connector)
+        return self._session
@@ -0,0 +1,245 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe, size bounded LRU cache with optional per-entry expiry
+    """
+
+    def __init__(self, maxsize, ttl=None):
+        """
+        :param maxsize: maximum number of entries, the least recently used entry is evicted beyond that
+        :param ttl: default seconds an entry stays valid (None means until evicted)
+        """
+        if maxsize < 1:
+            raise ValueError("maxsize")
+
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        """
+        :return: the cached value, or default when the key is missing or expired
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.time():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            _move_to_end(self._entries, key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=MISSING):
+        """
+        :param ttl: seconds this entry stays valid, overriding the cache default
+        """
+        if ttl is MISSING:
+            ttl = self.ttl
+        expires_at = None if ttl is None else time.time() + ttl
+
+        with self._lock:
+            self._store(key, value, expires_at)
+
+    def add(self, key, value, ttl=MISSING, evict_unexpired=True):
+        """
+        Sets the value only when the key is missing or expired, as one atomic step
+        :param evict_unexpired: when False and the cache is full, the value is only added if the least
+            recently used entry has expired
+        :return: True when the value was added, False when the key was already present or there was no room
+        """
+        if ttl is MISSING:
+            ttl = self.ttl
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > now):
+                return False
+            if not evict_unexpired and entry is None and len(self._entries) >= self.maxsize:
+                expires_at = next(iter(self._entries.values()))[0]
+                if expires_at is None or expires_at > now:
+                    return False
+            self._store(key, value, None if ttl is None else now + ttl)
+            return True
+
+    def _store(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        _move_to_end(self._entries, key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key):
+        return self.get(key) is not MISSING
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+def _move_to_end(entries, key):
+    try:
+        #python3
+        entries.move_to_end(key)
+    except AttributeError:
+        #python2
+        entries[key] = entries.pop(key)
+
+
+class LookupCache:
+    """
+    Cache for ApiClient.lookup results. Found numbers and numbers the service
+    did not know (404) are cached with separate expiry times. An optional SQLite
+    file acts as a second tier which survives process restarts.
+
+        client = ApiClient(base_uri, key_name, private_key,
+                           lookup_cache=LookupCache(ttl=24 * 3600, path="lookups.db"))
+    """
+
+    DEFAULT_MAXSIZE = 10000
+    DEFAULT_TTL = 3600
+    DEFAULT_NEGATIVE_TTL = 300
+
+    def __init__(self, maxsize=DEFAULT_MAXSIZE, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL, path=None):
+        """
+        :param maxsize: maximum number of lookups kept in memory
+        :param ttl: seconds a lookup result stays valid
+        :param negative_ttl: seconds a not found result stays valid
+        :param path: SQLite file for the persistent tier (None keeps the cache in memory only)
+        """
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = LRUCache(maxsize)
+        self._counts_lock = threading.Lock()
+        self._db = None
+        self._db_lock = threading.Lock()
+
+        if path is not None:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS lookups (msisdn TEXT PRIMARY KEY, result TEXT, expires REAL NOT NULL)")
+            self._db.commit()
+
+    def get(self, msisdn):
+        """
+        :return: (found, result) where result is the lookup json dict, or None for a cached not found
+        """
+        result = self._memory.get(msisdn)
+        if result is not MISSING:
+            self._count("memory_hits")
+            return True, result
+
+        row = None
+        if self._db is not None:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT result, expires FROM lookups WHERE msisdn = ?", (msisdn,)).fetchone()
+
+        now = time.time()
+        if row is None or row[1] <= now:
+            self._count("misses")
+            return False, None
+
+        self._count("disk_hits")
+        result = None if row[0] is None else json.loads(row[0])
+        self._memory.set(msisdn, result, row[1] - now)
+        return True, result
+
+    def _count(self, name):
+        with self._counts_lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def put(self, msisdn, result):
+        """
+        :param result: lookup json dict, or None when the number was not found
+        """
+        ttl = self.negative_ttl if result is None else self.ttl
+        self._memory.set(msisdn, result, ttl)
+
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO lookups (msisdn, result, expires) VALUES (?, ?, ?)",
+                    (msisdn, None if result is None else json.dumps(result), time.time() + ttl))
+                self._db.commit()
+
+    def invalidate(self, msisdn):
+        self._memory.delete(msisdn)
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM lookups WHERE msisdn = ?", (msisdn,))
+                self._db.commit()
+
+    def purge_expired(self):
+        """
+        Removes expired entries from the persistent tier
+        """
+        if self._db is not None:
+            with self._db_lock:
+                self._db.execute("DELETE FROM lookups WHERE expires <= ?", (time.time(),))
+                self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+    def stats(self):
+        """
+        :return: hits split into memory_hits and disk_hits, misses counts the lookups that went to the network
+        """
+        memory = self._memory.stats()
+        with self._counts_lock:
+            return {
+                "size": memory["size"],
+                "hits": self.memory_hits + self.disk_hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": memory["evictions"],
+                "expirations": memory["expirations"],
+            }
@@ -0,0 +1,62 @@
+from itertools import islice
+
+
+def chunked(items, size):
+    """
+    Lazily splits an iterable into lists of at most `size` items
+    """
+    if size < 1:
+        raise ValueError("size")
+
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def imap_bounded(func, items, max_workers, max_pending=None):
+    """
+    Applies func to every item on a thread pool and yields (item, future) pairs
+    as they complete. Items are pulled from the (possibly lazy) iterable only
+    while fewer than max_pending calls are queued or running, which keeps memory
+    flat and gives the producer backpressure.
+
+    Closing the generator early cancels all calls that have not started yet.
+
+    :param max_workers: number of worker threads
+    :param max_pending: maximum number of submitted but unfinished calls (defaults to 2 * max_workers)
+    """
+    # concurrent.futures pulls in logging, load it only once work is spread over threads
+    from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+    if max_workers < 1:
+        raise ValueError("max_workers")
+    if max_pending is None:
+        max_pending = max_workers * 2
+
+    iterator = iter(items)
+    pending = {}
+    exhausted = False
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while True:
+            while not exhausted and len(pending) < max_pending:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending[executor.submit(func, item)] = item
+
+            if not pending:
+                return
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future
+    finally:
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -1,11 +1,14 @@
-import requests
-import ecdsa
 import binascii
+import threading
 import time
 import uuid
 import base64
 import hashlib
-import jsonpickle
+from contextlib import contextmanager
+from timeit import default_timer as timer
+from .json_encoder import encode
+from .signing import create_signer
+from .transports import RequestsTransport
 
 try:
     #python2
@@ -15,50 +18,226 @@ except ImportError:
     from urllib.parse import urlencode
 
 class HttpClient:
-    def __init__(self, base_uri, key_name, private_key):
+    DEFAULT_POOL_CONNECTIONS = RequestsTransport.DEFAULT_POOL_CONNECTIONS
+    DEFAULT_POOL_MAXSIZE = RequestsTransport.DEFAULT_POOL_MAXSIZE
+
+    def __init__(self, base_uri, key_name, private_key, pool_connections=DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False, pool_idle_timeout=None, signer=None,
+                 rate_limiter=None, observer=None, transport=None):
+        """
+        :param pool_connections: number of per-host connection pools to keep
+        :param pool_maxsize: maximum number of keep-alive connections per host
+        :param pool_block: block (instead of opening extra connections) once a host has pool_maxsize connections in use
+        :param pool_idle_timeout: seconds without requests after which pooled connections are dropped (None keeps them)
+        :param signer: helpers.signing.Signer used to sign requests (defaults to the fastest installed backend)
+        :param rate_limiter: helpers.rate_limiter.AdaptiveRateLimiter shared by the requests of this client (None disables)
+        :param observer: receives a helpers.instrumentation.RequestMetrics per request, either a callable
+            or an object with an on_request(metrics) method (None disables instrumentation)
+        :param transport: helpers.transports.Transport sending the requests (defaults to a RequestsTransport
+            built from the pool options, which are ignored when a transport is given)
+        """
+        self._init_shared(base_uri, key_name, private_key, signer, rate_limiter, observer)
+
+        if transport is None:
+            transport = RequestsTransport(pool_connections, pool_maxsize, pool_block, pool_idle_timeout,
+                                          timed=self.observer is not None)
+        self.transport = transport
+
+    def _init_shared(self, base_uri, key_name, private_key, signer, rate_limiter, observer):
+        """
+        Sets up the state that doesn't depend on the transport, subclasses with their own wire layer call this
+        """
         self.keyName = key_name
         self.privateKey = private_key
         self.base_uri = base_uri
-        self.publicKey = ecdsa.SigningKey.from_string(
-            binascii.unhexlify(self.privateKey), curve=ecdsa.NIST256p)
+        self.rate_limiter = rate_limiter
+        self.observer = None
+        if observer is not None:
+            from .instrumentation import get_observer
+            self.observer = get_observer(observer)
+
+        self._signer = signer
+        self._signer_lock = threading.Lock()
+        self._public_key = None
+        self._held = threading.local()
 
-    def get(self, path):
-        return requests.get(self._build_url(path), headers=self._get_auth_header("get", self._build_url(path)))
+    @property
+    def signer(self):
+        """
+        The helpers.signing.Signer requests are signed with. The private key is
+        parsed on first use, so a client that is created but never sends pays nothing.
+        """
+        signer = self._signer
+        if signer is None:
+            with self._signer_lock:
+                if self._signer is None:
+                    self._signer = create_signer(self.privateKey)
+                signer = self._signer
+        return signer
 
-    def get_with_params(self, path, query_params):
+    @signer.setter
+    def signer(self, signer):
+        self._signer = signer
+
+    @property
+    def publicKey(self):
+        """
+        The private key as an ecdsa.SigningKey. Kept for backwards compatibility,
+        requests are signed by self.signer.
+        """
+        if self._public_key is None:
+            import ecdsa
+            self._public_key = ecdsa.SigningKey.from_string(binascii.unhexlify(self.privateKey),
+                                                            curve=ecdsa.NIST256p)
+        return self._public_key
+
+    @publicKey.setter
+    def publicKey(self, public_key):
+        self._public_key = public_key
+
+    def get(self, path, stream=False):
+        """
+        :param stream: leave the body unread, so it can be consumed with response.iter_content()
+        """
+        url = self._build_url(path)
+        return self._send("get", url, url, stream=stream)
+
+    def get_with_params(self, path, query_params, stream=False):
 
         url = self._build_url(path)
         if len(query_params.keys()) > 0:
             url += "?"
 
         absolute_uri = (url + urlencode(query_params)).lower()
-        return requests.get(
-            self._build_url(path),
-            params=query_params,
-            headers=self._get_auth_header("get", absolute_uri)
-        )
+        return self._send("get", self._build_url(path), absolute_uri, params=query_params, stream=stream)
 
     def post(self, path, body):
-        json_encoded = jsonpickle.encode(body, unpicklable=False)
-        return requests.post(
-            self._build_url(path),
-            data=json_encoded,
-            headers=self._get_auth_header("post", self._build_url(path), json_encoded)
-        )
+        return self._send_body("post", path, body)
 
     def put(self, path, body):
-        json_encoded = jsonpickle.encode(body,  unpicklable=False)
-        return requests.put(
-            self._build_url(path),
-            data=json_encoded,
-            headers=self._get_auth_header("put", self._build_url(path), json_encoded)
-        )
+        return self._send_body("put", path, body)
 
     def delete(self, path):
-        return requests.delete(
-            self._build_url(path),
-            headers=self._get_auth_header("delete", self._build_url(path))
-        )
+        url = self._build_url(path)
+        return self._send("delete", url, url)
+
+    def close(self):
+        """
+        Closes all pooled connections. The client can still be used afterwards,
+        a new pool is created on the next request.
+        """
+        self.transport.close()
+
+    def _send_body(self, method, path, body):
+        url = self._build_url(path)
+        if self.observer is None:
+            return self._send(method, url, url, data=encode(body))
+
+        started = timer()
+        data = encode(body)
+        return self._send(method, url, url, data=data, encode_time=timer() - started)
+
+    def _send(self, method, url, signed_uri, params=None, data=None, stream=False, encode_time=0.0):
+        """
+        Signs and sends a request, through the rate limiter when one is configured.
+        Every attempt is signed separately, so retries carry a fresh timestamp and nonce.
+        """
+        if self.observer is not None:
+            send = self._instrumented_sender(method, url, signed_uri, params, data, stream, encode_time)
+        else:
+            def send():
+                headers = self._get_auth_header(method, signed_uri, data)
+                return self._request(method, url, params=params, data=data, headers=headers, stream=stream)
+
+        if self.rate_limiter is None:
+            return send()
+        return self.rate_limiter.call(send)
+
+    def _instrumented_sender(self, method, url, signed_uri, params, data, stream, encode_time):
+        from .instrumentation import get_connect_time, reset_connect_time
+        attempts = [0]
+
+        def send():
+            metrics = self._new_metrics(method, url, data, encode_time, attempts[0])
+            attempts[0] += 1
+
+            started = timer()
+            headers = self._get_auth_header(method, signed_uri, data)
+            metrics.sign_time = timer() - started
+
+            reset_connect_time()
+            try:
+                response = self._request(method, url, params=params, data=data, headers=headers, stream=stream)
+            except Exception as error:
+                self._report(metrics, started, get_connect_time(), error=error)
+                raise
+
+            self._report(metrics, started, get_connect_time(), response, stream)
+            return response
+
+        return send
+
+    def _new_metrics(self, method, url, data, encode_time, attempt):
+        from .instrumentation import RequestMetrics
+        metrics = RequestMetrics(method, url[len(self.base_uri):], attempt)
+        # the body is encoded once, retries only sign again
+        metrics.encode_time = encode_time if attempt == 0 else 0.0
+        metrics.request_bytes = len(data) if data else 0
+        return metrics
+
+    @contextmanager
+    def decoding(self):
+        """
+        Holds back the metrics of the requests sent in the block and reports them
+        at its end, with the time from receiving the response until then (turning
+        it into models) added to the decode time of the last one. Blocks on the
+        same thread don't nest, the outermost one reports.
+        """
+        if self.observer is None or getattr(self._held, "metrics", None) is not None:
+            yield
+            return
+
+        held = self._held.metrics = []
+        try:
+            yield
+        finally:
+            self._held.metrics = None
+            if held:
+                metrics, received = held[-1]
+                decode_time = timer() - received
+                metrics.decode_time += decode_time
+                metrics.total_time += decode_time
+            for metrics, _ in held:
+                self.observer(metrics)
+
+    def _report(self, metrics, started, connect_time, response=None, stream=False, error=None):
+        received = timer()
+        metrics.connect_time = connect_time
+        metrics.total_time = metrics.encode_time + received - started
+
+        if response is None:
+            metrics.error = error
+        else:
+            metrics.status_code = response.status_code
+            wire_time = received - started - metrics.sign_time
+            # requests.Response.elapsed ends when the headers arrived, the body was read after that
+            elapsed = response.elapsed.total_seconds() if hasattr(response, "elapsed") else wire_time
+            metrics.server_time = max(0.0, elapsed - connect_time)
+            metrics.decode_time = max(0.0, wire_time - elapsed)
+            if stream:
+                length = response.headers.get("Content-Length")
+                metrics.response_bytes = int(length) if length else None
+            else:
+                metrics.response_bytes = len(response.content)
+
+        held = getattr(self._held, "metrics", None)
+        if held is not None and response is not None and not stream:
+            held.append((metrics, timer()))
+            return
+        self.observer(metrics)
+
+    def _request(self, method, url, **kwargs):
+        return self.transport.request(method, url, **kwargs)
 
     def _build_url(self, path):
         return (self.base_uri + path).lower()
@@ -73,14 +252,13 @@ class HttpClient:
 
         content_hash = ""
         if body is not None:
-            content = body
-            signature = hashlib.sha256(content.encode("utf-8")).digest()
+            content = body if isinstance(body, bytes) else body.encode("utf-8")
+            signature = hashlib.sha256(content).digest()
             base64_encoded = base64.b64encode(signature)
             content_hash = base64_encoded.decode("utf-8")
 
         message = method + uri + str(timestamp) + str(nounce) + content_hash
-        signature_string = base64.b64encode(self.publicKey.sign(
-            message.encode("utf-8"), hashfunc=hashlib.sha256))
+        signature_string = base64.b64encode(self.signer.sign(message.encode("utf-8")))
         the_signature = self.keyName + ":" + str(timestamp) + ":" + str(nounce) + ":" + signature_string.decode("utf-8")
 
         return the_signature
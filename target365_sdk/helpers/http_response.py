@@ -0,0 +1,51 @@
+import json
+
+
+class HttpResponse:
+    """
+    Fully read HTTP response exposing the subset of the requests.Response
+    interface used by the api clients
+    """
+
+    def __init__(self, status_code, headers=None, content=b"", url=None, reason=None):
+        # imported here rather than on module load, see helpers.http_client
+        from requests.structures import CaseInsensitiveDict
+
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers or {})
+        self.content = content
+        self.url = url
+        self.reason = reason
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8")
+
+    @property
+    def ok(self):
+        return self.status_code < 400
+
+    def json(self):
+        return json.loads(self.text)
+
+    def iter_content(self, chunk_size=1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+    def raise_for_status(self):
+        """
+        Raises requests.HTTPError for 4xx and 5xx responses, just like requests.Response does
+        """
+        if 400 <= self.status_code < 500:
+            kind = "Client Error"
+        elif 500 <= self.status_code < 600:
+            kind = "Server Error"
+        else:
+            return
+
+        import requests
+        message = "%s %s: %s for url: %s" % (self.status_code, kind, self.reason, self.url)
+        raise requests.HTTPError(message, response=self)
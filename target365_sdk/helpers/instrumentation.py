@@ -0,0 +1,244 @@
+import threading
+from timeit import default_timer as timer
+import requests.adapters
+import urllib3.connection
+import urllib3.connectionpool
+
+# the collections requests are grouped by, anything below them is an id
+ENDPOINTS = (
+    "api/ping",
+    "api/lookup",
+    "api/keywords",
+    "api/out-messages/batch",
+    "api/out-messages",
+    "api/in-messages",
+    "api/prepare-msisdns",
+    "api/strex/merchants",
+    "api/strex/transactions",
+    "api/strex/one-time-passwords",
+    "api/server/public-keys",
+    "api/client/public-keys",
+)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ("encode", "sign", "connect", "server", "decode")
+
+
+class RequestMetrics:
+    """
+    Timing breakdown of one HTTP request attempt (retries are reported separately).
+    All times are in seconds:
+
+    encode_time: serializing the request body to JSON
+    sign_time: creating the ECDSA Authorization header
+    connect_time: opening the connection (TCP and TLS), 0 when a pooled connection was reused
+    server_time: from sending the request until the response headers arrived
+    decode_time: reading the response body and, for the ApiClient methods returning a model, decoding
+        the JSON into it (0 for streamed responses, which the caller reads)
+    total_time: the whole attempt including all of the above
+    """
+
+    def __init__(self, method, path, attempt=0):
+        self.method = method
+        self.path = path
+        self.attempt = attempt
+        self.status_code = None
+        self.error = None
+        self.encode_time = 0.0
+        self.sign_time = 0.0
+        self.connect_time = 0.0
+        self.server_time = 0.0
+        self.decode_time = 0.0
+        self.total_time = 0.0
+        self.request_bytes = 0
+        self.response_bytes = None
+
+    @property
+    def endpoint(self):
+        return endpoint_label(self.path)
+
+    def __repr__(self):
+        return "<RequestMetrics %s %s %s %.1f ms>" % (self.method, self.endpoint, self.status_code,
+                                                     self.total_time * 1000)
+
+
+class MetricsAggregator:
+    """
+    Request observer keeping latency histograms, phase totals, status and byte
+    counters per endpoint, exported in the Prometheus text format:
+
+        metrics = MetricsAggregator()
+        client = ApiClient(base_uri, key_name, private_key, observer=metrics)
+        ...
+        print(metrics.export())
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, prefix="target365_"):
+        self.buckets = tuple(sorted(buckets))
+        self.prefix = prefix
+        self._series = {}
+        self._statuses = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, metrics):
+        key = (metrics.method, metrics.endpoint)
+        status = "error" if metrics.status_code is None else str(metrics.status_code)
+
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            series.add(metrics, self.buckets)
+            status_key = key + (status,)
+            self._statuses[status_key] = self._statuses.get(status_key, 0) + 1
+
+    def export(self):
+        """
+        :return: all metrics in the Prometheus text exposition format
+        """
+        with self._lock:
+            series = sorted(self._series.items())
+            statuses = sorted(self._statuses.items())
+
+        name = self.prefix + "request_duration_seconds"
+        lines = ["# HELP %s Duration of API requests." % name, "# TYPE %s histogram" % name]
+        for (method, endpoint), values in series:
+            labels = 'method="%s",endpoint="%s"' % (method, endpoint)
+            for bound, count in zip(self.buckets, values.cumulative_counts()):
+                lines.append('%s_bucket{%s,le="%s"} %d' % (name, labels, _format_bound(bound), count))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (name, labels, values.count))
+            lines.append("%s_sum{%s} %r" % (name, labels, values.total_time))
+            lines.append("%s_count{%s} %d" % (name, labels, values.count))
+
+        name = self.prefix + "request_phase_seconds_total"
+        lines += ["# HELP %s Time spent per request phase." % name, "# TYPE %s counter" % name]
+        for (method, endpoint), values in series:
+            for phase, total in zip(PHASES, values.phase_times):
+                lines.append('%s{method="%s",endpoint="%s",phase="%s"} %r' % (name, method, endpoint, phase, total))
+
+        name = self.prefix + "requests_total"
+        lines += ["# HELP %s API requests by response status." % name, "# TYPE %s counter" % name]
+        for (method, endpoint, status), count in statuses:
+            lines.append('%s{method="%s",endpoint="%s",status="%s"} %d' % (name, method, endpoint, status, count))
+
+        for direction in ("request", "response"):
+            name = self.prefix + direction + "_bytes_total"
+            lines += ["# HELP %s Bytes of %s bodies." % (name, direction), "# TYPE %s counter" % name]
+            for (method, endpoint), values in series:
+                total = values.request_bytes if direction == "request" else values.response_bytes
+                lines.append('%s{method="%s",endpoint="%s"} %d' % (name, method, endpoint, total))
+
+        return "\n".join(lines) + "\n"
+
+
+class _Series:
+
+    def __init__(self, bucket_count):
+        self.bucket_counts = [0] * bucket_count
+        self.count = 0
+        self.total_time = 0.0
+        self.phase_times = [0.0] * len(PHASES)
+        self.request_bytes = 0
+        self.response_bytes = 0
+
+    def add(self, metrics, buckets):
+        for index, bound in enumerate(buckets):
+            if metrics.total_time <= bound:
+                self.bucket_counts[index] += 1
+                break
+        self.count += 1
+        self.total_time += metrics.total_time
+        for index, phase in enumerate(PHASES):
+            self.phase_times[index] += getattr(metrics, phase + "_time")
+        self.request_bytes += metrics.request_bytes
+        self.response_bytes += metrics.response_bytes or 0
+
+    def cumulative_counts(self):
+        total = 0
+        for count in self.bucket_counts:
+            total += count
+            yield total
+
+
+def endpoint_label(path):
+    """
+    Turns a request path into a low cardinality label by replacing ids with {id},
+    e.g. "api/keywords/123" becomes "api/keywords/{id}"
+    """
+    path = path.split("?", 1)[0].strip("/")
+    for endpoint in ENDPOINTS:
+        if path == endpoint:
+            return endpoint
+        if path.startswith(endpoint + "/"):
+            return endpoint + "/{id}" * (path.count("/") - endpoint.count("/"))
+
+    parts = path.split("/")
+    return "/".join(parts[:2] + ["{id}"] * len(parts[2:]))
+
+
+def get_observer(observer):
+    """
+    :param observer: callable taking RequestMetrics, an object with an on_request(metrics) method, or None
+    :return: the callable to report metrics to, or None
+    """
+    if observer is None:
+        return None
+    return getattr(observer, "on_request", observer)
+
+
+def get_connect_time():
+    return getattr(_connect_times, "value", 0.0)
+
+
+def reset_connect_time():
+    _connect_times.value = 0.0
+
+
+class TimedHTTPAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTPAdapter whose connections record how long connecting took (see get_connect_time)
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        requests.adapters.HTTPAdapter.init_poolmanager(self, *args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+# connections are opened on the thread sending the request, so a thread local links the two
+_connect_times = threading.local()
+
+
+class _TimedHTTPConnection(urllib3.connection.HTTPConnection):
+
+    def connect(self):
+        started = timer()
+        try:
+            urllib3.connection.HTTPConnection.connect(self)
+        finally:
+            _connect_times.value = get_connect_time() + timer() - started
+
+
+class _TimedHTTPSConnection(urllib3.connection.HTTPSConnection):
+
+    def connect(self):
+        started = timer()
+        try:
+            urllib3.connection.HTTPSConnection.connect(self)
+        finally:
+            _connect_times.value = get_connect_time() + timer() - started
+
+
+class _TimedHTTPConnectionPool(urllib3.connectionpool.HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(urllib3.connectionpool.HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+def _format_bound(bound):
+    return ("%f" % bound).rstrip("0").rstrip(".")
@@ -0,0 +1,39 @@
+import json
+from ..models.model import Model
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def encode(body):
+    """
+    Encodes a request body into UTF-8 JSON bytes.
+
+    Models are written from their set fields only (unset fields are left out,
+    fields explicitly set to None are kept), nested models and lists of models
+    included. orjson is used when installed, otherwise the standard library
+    json module. Bodies holding anything else than models and plain JSON types
+    fall back to jsonpickle, which is what older versions used for every body.
+    Bytes are assumed to be encoded already and returned unchanged.
+
+    :param body: model, list of models or plain JSON value
+    :return: bytes
+    """
+    if isinstance(body, bytes):
+        return body
+
+    try:
+        if orjson is not None:
+            return orjson.dumps(body, default=_default)
+        return json.dumps(body, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    except TypeError:
+        import jsonpickle
+        return jsonpickle.encode(body, unpicklable=False).encode("utf-8")
+
+
+def _default(value):
+    if isinstance(value, Model):
+        return value.__getstate__()
+    raise TypeError("not JSON serializable: " + type(value).__name__)
@@ -0,0 +1,98 @@
+import codecs
+import json
+
+_WHITESPACE = " \t\n\r"
+_SCALAR_DELIMITERS = _WHITESPACE + ",]}"
+# values that are complete once raw_decode succeeds, as they end in their own closing character
+_CONTAINER_STARTS = "{[\""
+
+
+def iter_json_array(chunks):
+    """
+    Incrementally parses a JSON array from an iterable of byte chunks and
+    yields its items one by one. Only the item being parsed and the unparsed
+    rest of the current chunk are held in memory.
+
+    :param chunks: iterable of bytes, e.g. requests.Response.iter_content()
+    :return: generator of decoded items
+    """
+    parser = _ArrayParser(chunks)
+    return parser.items()
+
+
+class _ArrayParser:
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json_decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._position = 0
+        self._eof = False
+
+    def items(self):
+        if self._next_token() != "[":
+            raise ValueError("expected a JSON array")
+        self._position += 1
+
+        if self._next_token() == "]":
+            return
+
+        while True:
+            yield self._decode_item()
+
+            token = self._next_token()
+            self._position += 1
+            if token == "]":
+                return
+            if token != ",":
+                raise ValueError("expected `,` or `]` in JSON array, got " + repr(token))
+
+    def _decode_item(self):
+        first = self._next_token()
+        while True:
+            # a number or literal is only complete once a delimiter follows it, "1" may go on as "1.5e3"
+            if first not in _CONTAINER_STARTS and not self._eof and self._scalar_end() == len(self._buffer):
+                self._fill()
+                continue
+            try:
+                item, end = self._json_decoder.raw_decode(self._buffer, self._position)
+                self._position = end
+                return item
+            except ValueError:
+                if self._eof:
+                    raise
+            self._fill()
+
+    def _scalar_end(self):
+        end = self._position
+        while end < len(self._buffer) and self._buffer[end] not in _SCALAR_DELIMITERS:
+            end += 1
+        return end
+
+    def _next_token(self):
+        """
+        Skips whitespace and returns the next character without consuming it (None at the end of input)
+        """
+        while True:
+            while self._position < len(self._buffer) and self._buffer[self._position] in _WHITESPACE:
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if self._eof:
+                return None
+            self._fill()
+
+    def _fill(self):
+        # drop everything parsed so far before appending the next chunk
+        self._buffer = self._buffer[self._position:]
+        self._position = 0
+
+        for chunk in self._chunks:
+            text = self._text_decoder.decode(chunk)
+            if text:
+                self._buffer += text
+                return
+
+        self._buffer += self._text_decoder.decode(b"", True)
+        self._eof = True
@@ -0,0 +1,16 @@
+def installed(name):
+    """
+    Tells whether a top level package can be imported, without importing it
+    """
+    try:
+        #python3
+        from importlib.util import find_spec
+    except ImportError:
+        #python2
+        import imp
+        try:
+            imp.find_module(name)
+            return True
+        except ImportError:
+            return False
+    return find_spec(name) is not None
@@ -0,0 +1,188 @@
+import email.utils
+import threading
+import time
+
+
+class AdaptiveRateLimiter:
+    """
+    Client side rate and concurrency limit which adapts to the API's feedback.
+
+    Requests take a token from a token bucket refilled at `rate` per second and
+    hold one of `concurrency` slots while in flight. Both limits follow AIMD
+    (additive increase, multiplicative decrease): every healthy response grows
+    them a little, every throttling response (429/503) cuts them by `decrease`
+    and pauses all requests for the Retry-After period.
+
+    One limiter can be shared by several clients (and threads) talking to the
+    same account:
+
+        limiter = AdaptiveRateLimiter(rate=50, concurrency=8)
+        client = ApiClient(base_uri, key_name, private_key, rate_limiter=limiter)
+        ...
+        limiter.stats()  # {"rate": 61.2, "concurrency": 9, ...}
+    """
+
+    THROTTLE_STATUSES = (429, 503)
+
+    def __init__(self, rate=50.0, concurrency=8, burst=None, min_rate=1.0, max_rate=1000.0, min_concurrency=1,
+                 max_concurrency=64, rate_increase=1.0, decrease=0.5, latency_target=None, backoff=1.0,
+                 max_retries=3):
+        """
+        :param rate: initial requests per second
+        :param concurrency: initial number of requests allowed in flight
+        :param burst: maximum number of tokens saved up while idle (defaults to one second worth of rate)
+        :param rate_increase: requests per second added for every second's worth of healthy responses
+        :param decrease: factor applied to rate and concurrency on throttling responses
+        :param latency_target: responses slower than this many seconds don't grow the limits (None disables)
+        :param backoff: seconds to pause when a throttling response has no Retry-After header
+        :param max_retries: times a throttled request is sent again before its response is returned
+        """
+        self.rate = float(rate)
+        self.concurrency = float(concurrency)
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.rate_increase = rate_increase
+        self.decrease = decrease
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.max_retries = max_retries
+
+        self._tokens = self._capacity()
+        self._updated = time.time()
+        self._paused_until = 0
+        self._last_decrease = 0
+        self._in_flight = 0
+        self._requests = 0
+        self._throttled = 0
+        self._retries = 0
+        self._condition = threading.Condition()
+
+    def acquire(self):
+        """
+        Blocks until a request may be sent
+        :return: start time to pass on to release()
+        """
+        with self._condition:
+            while True:
+                delay = self._try_acquire()
+                if not delay:
+                    return time.time()
+                self._condition.wait(delay)
+
+    def try_acquire(self):
+        """
+        Non-blocking acquire, for callers which wait on their own (like asyncio code)
+        :return: 0 when the request may be sent (call release() afterwards), otherwise seconds to wait before trying again
+        """
+        with self._condition:
+            return self._try_acquire()
+
+    def release(self, started, status_code=None, retry_after=None):
+        """
+        Reports the outcome of a request sent after acquire()
+        :param started: value returned by acquire() (or time.time() after a successful try_acquire())
+        :param status_code: response status, None when the request failed without response
+        :param retry_after: value of the Retry-After response header, if any
+        """
+        now = time.time()
+        with self._condition:
+            self._in_flight -= 1
+            self._requests += 1
+
+            if status_code in self.THROTTLE_STATUSES:
+                self._throttled += 1
+                pause = _parse_retry_after(retry_after, now)
+                self._paused_until = max(self._paused_until, now + (self.backoff if pause is None else pause))
+                # responses to requests sent before the last decrease reflect the old limits
+                if started >= self._last_decrease:
+                    self._last_decrease = now
+                    self.rate = max(self.min_rate, self.rate * self.decrease)
+                    self.concurrency = max(self.min_concurrency, self.concurrency * self.decrease)
+                    self._tokens = min(self._tokens, self._capacity())
+            elif status_code is not None and status_code < 500:
+                if self.latency_target is None or now - started <= self.latency_target:
+                    self.rate = min(self.max_rate, self.rate + self.rate_increase / self.rate)
+                    self.concurrency = min(self.max_concurrency, self.concurrency + 1.0 / self.concurrency)
+
+            self._condition.notify_all()
+
+    def call(self, send):
+        """
+        Sends a request through the limiter, retrying throttled requests up to max_retries times
+        :param send: callable sending the request (and signing it, so retries carry a fresh signature)
+        :return: the response
+        """
+        attempt = 0
+        while True:
+            started = self.acquire()
+            try:
+                response = send()
+            except Exception:
+                self.release(started)
+                raise
+
+            self.release(started, response.status_code, response.headers.get("Retry-After"))
+            if not self.should_retry(response, attempt):
+                return response
+            response.close()
+            attempt += 1
+
+    def should_retry(self, response, attempt):
+        if response.status_code not in self.THROTTLE_STATUSES or attempt >= self.max_retries:
+            return False
+        with self._condition:
+            self._retries += 1
+        return True
+
+    def stats(self):
+        with self._condition:
+            return {
+                "rate": self.rate,
+                "concurrency": int(self.concurrency),
+                "in_flight": self._in_flight,
+                "requests": self._requests,
+                "throttled": self._throttled,
+                "retries": self._retries,
+                "paused_for": max(0.0, self._paused_until - time.time()),
+            }
+
+    def _try_acquire(self):
+        now = time.time()
+        self._tokens = min(self._capacity(), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self._tokens < 1:
+            return (1 - self._tokens) / self.rate
+        if self._in_flight >= int(self.concurrency):
+            # woken up by release(), the timeout only matters for try_acquire() callers
+            return 0.005
+
+        self._tokens -= 1
+        self._in_flight += 1
+        return 0
+
+    def _capacity(self):
+        return max(1.0, self.burst if self.burst is not None else self.rate)
+
+
+def _parse_retry_after(value, now):
+    """
+    Parses a Retry-After header given either as seconds or as an HTTP date
+    :return: seconds to wait, None when missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - now)
@@ -0,0 +1,212 @@
+import binascii
+import hashlib
+from .packages import installed
+
+SIGNATURE_LENGTH = 32  # bytes per signature component (r and s) on NIST P-256
+
+
+class Signer:
+    """
+    Signs request messages with the client's NIST P-256 private key using
+    ECDSA over SHA-256. Signatures are returned in the raw r || s form
+    (64 bytes) which the Authorization header carries base64 encoded.
+    """
+
+    name = None
+
+    def sign(self, message):
+        """
+        :param message: bytes to sign
+        :return: raw r || s signature bytes
+        """
+        raise NotImplementedError()
+
+
+class EcdsaSigner(Signer):
+    """
+    Pure-Python signer based on the `ecdsa` package
+    """
+
+    name = "ecdsa"
+
+    def __init__(self, private_key, precompute=True):
+        """
+        :param private_key: hex encoded private key
+        :param precompute: sign once right away, so the first request doesn't pay for
+            warming up ecdsa (about a millisecond). Later signatures are not faster.
+        """
+        import ecdsa
+        self.signing_key = ecdsa.SigningKey.from_string(
+            binascii.unhexlify(private_key), curve=ecdsa.NIST256p, hashfunc=hashlib.sha256)
+
+        if precompute:
+            self.sign(b"")
+
+    def sign(self, message):
+        return self.signing_key.sign(message, hashfunc=hashlib.sha256)
+
+
+class CryptographySigner(Signer):
+    """
+    Signer backed by the `cryptography` package (OpenSSL). Much faster than
+    EcdsaSigner and releases the GIL while signing.
+    """
+
+    name = "cryptography"
+
+    def __init__(self, private_key):
+        try:
+            from cryptography.hazmat.backends import default_backend
+            from cryptography.hazmat.primitives import hashes
+            from cryptography.hazmat.primitives.asymmetric import ec
+            from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature
+        except ImportError:
+            raise ImportError("the cryptography package is required for CryptographySigner")
+
+        self._private_key = ec.derive_private_key(int(private_key, 16), ec.SECP256R1(), default_backend())
+        self._algorithm = ec.ECDSA(hashes.SHA256())
+        self._decode_dss_signature = decode_dss_signature
+
+    def sign(self, message):
+        r, s = self._decode_dss_signature(self._private_key.sign(message, self._algorithm))
+        return _int_to_bytes(r) + _int_to_bytes(s)
+
+
+class Verifier:
+    """
+    Verifies raw r || s ECDSA/SHA-256 signatures against a NIST P-256 public key
+    """
+
+    name = None
+
+    def verify(self, signature, message):
+        """
+        :param signature: raw r || s signature bytes
+        :param message: signed bytes
+        :return: True when the signature is valid
+        """
+        raise NotImplementedError()
+
+
+class EcdsaVerifier(Verifier):
+    """
+    Pure-Python verifier based on the `ecdsa` package
+    """
+
+    name = "ecdsa"
+
+    def __init__(self, public_key, precompute=True):
+        """
+        :param public_key: DER encoded public key (SubjectPublicKeyInfo), or the raw encoded point
+        :param precompute: build a multiplication table for this key, which makes
+            every verification considerably faster
+        """
+        import ecdsa
+        import ecdsa.der
+        import ecdsa.ellipticcurve
+        import ecdsa.util
+
+        try:
+            verifying_key = ecdsa.VerifyingKey.from_der(public_key, hashfunc=hashlib.sha256)
+        except (ecdsa.der.UnexpectedDER, ValueError):
+            verifying_key = ecdsa.VerifyingKey.from_string(
+                public_key, curve=ecdsa.NIST256p, hashfunc=hashlib.sha256)
+
+        if precompute:
+            # the decoded point doesn't know the curve order, which the precomputation needs
+            curve = ecdsa.NIST256p
+            point = verifying_key.pubkey.point
+            point = ecdsa.ellipticcurve.PointJacobi(curve.curve, point.x(), point.y(), 1, curve.order)
+            verifying_key = ecdsa.VerifyingKey.from_public_point(point, curve, hashlib.sha256)
+            verifying_key.precompute()
+
+        self.verifying_key = verifying_key
+        self._invalid_signature_errors = (ecdsa.BadSignatureError, ecdsa.util.MalformedSignature)
+
+    def verify(self, signature, message):
+        try:
+            return self.verifying_key.verify(signature, message, hashfunc=hashlib.sha256)
+        except self._invalid_signature_errors:
+            return False
+
+
+class CryptographyVerifier(Verifier):
+    """
+    Verifier backed by the `cryptography` package (OpenSSL)
+    """
+
+    name = "cryptography"
+
+    def __init__(self, public_key):
+        """
+        :param public_key: DER encoded public key (SubjectPublicKeyInfo)
+        """
+        try:
+            from cryptography.exceptions import InvalidSignature
+            from cryptography.hazmat.backends import default_backend
+            from cryptography.hazmat.primitives import hashes
+            from cryptography.hazmat.primitives.asymmetric import ec
+            from cryptography.hazmat.primitives.asymmetric.utils import encode_dss_signature
+            from cryptography.hazmat.primitives.serialization import load_der_public_key
+        except ImportError:
+            raise ImportError("the cryptography package is required for CryptographyVerifier")
+
+        self._public_key = load_der_public_key(public_key, default_backend())
+        self._algorithm = ec.ECDSA(hashes.SHA256())
+        self._encode_dss_signature = encode_dss_signature
+        self._invalid_signature = InvalidSignature
+
+    def verify(self, signature, message):
+        if len(signature) != SIGNATURE_LENGTH * 2:
+            return False
+
+        r = int(binascii.hexlify(signature[:SIGNATURE_LENGTH]), 16)
+        s = int(binascii.hexlify(signature[SIGNATURE_LENGTH:]), 16)
+        try:
+            self._public_key.verify(self._encode_dss_signature(r, s), message, self._algorithm)
+            return True
+        except self._invalid_signature:
+            return False
+
+
+def create_signer(private_key, backend=None):
+    """
+    Creates a signer for a hex encoded private key
+    :param backend: "cryptography", "ecdsa" or None to pick the fastest one installed
+    :return: Signer
+    """
+    if backend is None:
+        backend = _default_backend()
+
+    if backend == "cryptography":
+        return CryptographySigner(private_key)
+    if backend == "ecdsa":
+        return EcdsaSigner(private_key)
+
+    raise ValueError("unknown signing backend `" + str(backend) + "`")
+
+
+def create_verifier(public_key, backend=None):
+    """
+    Creates a verifier for a DER encoded public key
+    :param backend: "cryptography", "ecdsa" or None to pick the fastest one installed
+    :return: Verifier
+    """
+    if backend is None:
+        backend = _default_backend()
+
+    if backend == "cryptography":
+        return CryptographyVerifier(public_key)
+    if backend == "ecdsa":
+        return EcdsaVerifier(public_key)
+
+    raise ValueError("unknown signing backend `" + str(backend) + "`")
+
+
+def _default_backend():
+    # looks the package up without importing it, the import waits until a key is parsed
+    return "cryptography" if installed("cryptography") else "ecdsa"
+
+
+def _int_to_bytes(value):
+    return binascii.unhexlify("%0*x" % (SIGNATURE_LENGTH * 2, value))
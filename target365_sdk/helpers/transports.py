@@ -0,0 +1,281 @@
+import threading
+import time
+from .http_response import HttpResponse
+from .packages import installed
+
+try:
+    #python2
+    from urllib import urlencode
+except ImportError:
+    #python3
+    from urllib.parse import urlencode
+
+
+class Transport:
+    """
+    Wire layer of HttpClient. HttpClient builds the URL, encodes the body and
+    signs the request, the transport only sends it and returns the response.
+
+    Responses need the part of the requests.Response interface the api clients
+    use: status_code, headers, content, text, json(), iter_content(), close()
+    and raise_for_status() raising requests.HTTPError. HttpResponse has all of it.
+
+    Connection failures and timeouts have to be raised as requests.ConnectionError
+    and requests.Timeout, so BulkMutator, Campaign and Outbox retry them as transient.
+    """
+
+    def request(self, method, url, params=None, data=None, headers=None, stream=False):
+        """
+        :param method: lower case HTTP method
+        :param url: absolute URL without query string
+        :param params: query parameters
+        :param data: encoded request body (bytes) or None
+        :param headers: request headers, including Authorization
+        :param stream: leave the body unread, so it can be consumed with response.iter_content()
+        :return: response
+        """
+        raise NotImplementedError()
+
+    def close(self):
+        """
+        Releases pooled connections. The transport can still be used afterwards.
+        """
+
+
+class RequestsTransport(Transport):
+    """
+    HTTP/1.1 over a pooled requests.Session. One request per connection at a
+    time, so concurrent calls need pool_maxsize connections.
+    """
+
+    DEFAULT_POOL_CONNECTIONS = 10
+    DEFAULT_POOL_MAXSIZE = 10
+
+    def __init__(self, pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_block=False,
+                 pool_idle_timeout=None, timed=False):
+        """
+        :param pool_connections: number of per-host connection pools to keep
+        :param pool_maxsize: maximum number of keep-alive connections per host
+        :param pool_block: block (instead of opening extra connections) once a host has pool_maxsize connections in use
+        :param pool_idle_timeout: seconds without requests after which pooled connections are dropped (None keeps them)
+        :param timed: record connect times for helpers.instrumentation
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.pool_idle_timeout = pool_idle_timeout
+        self.timed = timed
+
+        self._session = None
+        self._session_lock = threading.Lock()
+        self._last_used = 0
+
+    def request(self, method, url, params=None, data=None, headers=None, stream=False):
+        return self._get_session().request(method, url, params=params, data=data, headers=headers, stream=stream)
+
+    def close(self):
+        with self._session_lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    def _get_session(self):
+        """
+        Returns the shared keep-alive session, creating it on first use and
+        recreating it when the pool has been idle for longer than pool_idle_timeout
+        """
+        with self._session_lock:
+            now = time.time()
+            if (self._session is not None and self.pool_idle_timeout is not None
+                    and now - self._last_used > self.pool_idle_timeout):
+                self._session.close()
+                self._session = None
+
+            if self._session is None:
+                self._session = self._create_session()
+
+            self._last_used = now
+            return self._session
+
+    def _create_session(self):
+        # requests is loaded with the first request rather than on import, which keeps cold starts short
+        import requests
+        import requests.adapters
+
+        # only instrumented clients pay for timing connects
+        if self.timed:
+            from .instrumentation import TimedHTTPAdapter as adapter_class
+        else:
+            adapter_class = requests.adapters.HTTPAdapter
+        adapter = adapter_class(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block)
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+
+class Http2Transport(Transport):
+    """
+    HTTP/2 over httpx. Concurrent calls from any number of threads share a few
+    connections as multiplexed streams, instead of needing a connection each.
+    HTTP/2 is negotiated during the TLS handshake, plain http:// URLs and
+    servers without HTTP/2 fall back to HTTP/1.1.
+
+    Needs httpx with HTTP/2 support: pip install httpx[http2]
+    """
+
+    DEFAULT_MAX_CONNECTIONS = 10
+    DEFAULT_TIMEOUT = 30.0
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, keepalive_expiry=5.0, timeout=DEFAULT_TIMEOUT):
+        """
+        :param max_connections: maximum number of connections (each carries many concurrent requests)
+        :param keepalive_expiry: seconds an idle connection is kept open
+        :param timeout: seconds to wait for connecting, reading and writing
+        """
+        # httpx needs h2 for HTTP/2, but only complains on the first request
+        if not installed("httpx") or not installed("h2"):
+            raise ImportError("Http2Transport requires httpx with HTTP/2 support: pip install httpx[http2]")
+
+        self.max_connections = max_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    def request(self, method, url, params=None, data=None, headers=None, stream=False):
+        headers = dict(headers or {})
+        if data is not None:
+            headers["Content-Type"] = "application/json"
+
+        client = self._get_client()
+        # the query is encoded like HttpClient encodes it for the signature
+        request = client.build_request(method.upper(), _with_query(url, params), content=data, headers=headers)
+        try:
+            response = client.send(request, stream=stream)
+        except Exception as error:
+            raise _requests_error(error)
+        if stream:
+            return _StreamedResponse(response)
+
+        http_response = HttpResponse(response.status_code, response.headers, response.content, str(response.url),
+                                     response.reason_phrase)
+        http_response.elapsed = response.elapsed
+        http_response.http_version = response.http_version
+        return http_response
+
+    def close(self):
+        with self._client_lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+
+    def _get_client(self):
+        with self._client_lock:
+            if self._client is None:
+                import httpx
+                self._client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(max_connections=self.max_connections,
+                                        max_keepalive_connections=self.max_connections,
+                                        keepalive_expiry=self.keepalive_expiry),
+                    timeout=self.timeout)
+            return self._client
+
+
+class InMemoryTransport(Transport):
+    """
+    Hands requests straight to a testing.StubApp, without sockets or threads.
+    Requests are signed and encoded exactly as on the wire, so the stub still
+    verifies every signature. Responses are always complete, with stream=True
+    iter_content() hands out the body in chunks all the same.
+
+        transport = InMemoryTransport(client_keys={key_name: private_key})
+        api_client = ApiClient("https://test.target365.io/", key_name, private_key, transport=transport)
+        api_client.create_out_message(out_message)
+        assert transport.app.out_messages
+    """
+
+    def __init__(self, app=None, **app_options):
+        """
+        :param app: testing.StubApp, a new one is created from app_options when None
+        """
+        if app is None:
+            from ..testing import StubApp
+            app = StubApp(**app_options)
+        self.app = app
+
+    def request(self, method, url, params=None, data=None, headers=None, stream=False):
+        url = _with_query(url, params)
+        status, response_headers, content = self.app.handle(method, url, headers or {}, data or b"")
+        return HttpResponse(status, response_headers, content, url, _reason(status))
+
+
+class _StreamedResponse(HttpResponse):
+    """
+    HttpResponse over an httpx response whose body has not been read yet
+    """
+
+    def __init__(self, response):
+        self._response = response
+        self._content = None
+        HttpResponse.__init__(self, response.status_code, response.headers, None, str(response.url),
+                              response.reason_phrase)
+
+    @property
+    def content(self):
+        if self._content is None:
+            try:
+                self._content = self._response.read()
+            except Exception as error:
+                raise _requests_error(error)
+        return self._content
+
+    @content.setter
+    def content(self, content):
+        self._content = content
+
+    def iter_content(self, chunk_size=1):
+        try:
+            for chunk in self._response.iter_bytes(chunk_size):
+                yield chunk
+        except Exception as error:
+            raise _requests_error(error)
+
+    def close(self):
+        self._response.close()
+
+
+def _requests_error(error):
+    """
+    Translates httpx connect, read and timeout errors into their requests
+    counterparts, any other error is returned as is
+    """
+    import httpx
+    import requests
+    if isinstance(error, httpx.TimeoutException):
+        return requests.Timeout(str(error) or type(error).__name__)
+    if isinstance(error, httpx.TransportError):
+        return requests.ConnectionError(str(error) or type(error).__name__)
+    return error
+
+
+def _with_query(url, params):
+    if not params:
+        return url
+    return url + "?" + urlencode(params)
+
+
+def _reason(status):
+    try:
+        #python3
+        from http.client import responses
+    except ImportError:
+        #python2
+        from httplib import responses
+    return responses.get(status, "")
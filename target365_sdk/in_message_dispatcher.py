@@ -0,0 +1,187 @@
+import json
+import logging
+import threading
+from .helpers.cache import LRUCache
+from .models.in_message import InMessage
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    #python3
+    import queue
+except ImportError:
+    #python2
+    import Queue as queue
+
+_logger = logging.getLogger(__name__)
+
+
+class InMessageDispatcher:
+    """
+    Hands callback payloads (in-messages or delivery reports) to a handler on a
+    pool of worker threads.
+
+    Payloads are parsed into models on the calling thread. Callbacks which
+    Target365 retried are dropped by transactionId, which is remembered for
+    dedup_window seconds (at most dedup_maxsize ids). Every worker has its own
+    queue and all messages from the same sender go to the same worker, so a
+    conversation is handled in order while different senders are handled in
+    parallel. Queues are bounded: dispatch() blocks once a worker is
+    queue_size messages behind, which pushes back on the webhook.
+
+        dispatcher = InMessageDispatcher(handle_in_message, workers=8)
+
+        def receive_sms(request):
+            dispatcher.dispatch(request.body)
+            return Response(status=200)
+
+    Handlers run on plain threads, so they scale with I/O (API calls, database
+    writes) rather than CPU. A handler error is passed to on_error and the
+    transactionId is forgotten, so the same payload dispatched again is handled
+    again. dispatch() returns before the handler runs, so the webhook has
+    already answered and Target365 does not retry the callback; keep the
+    messages on_error gets if they need another try. An error raised by
+    on_error itself is logged to the target365_sdk.in_message_dispatcher logger.
+    """
+
+    DEFAULT_WORKERS = 4
+    DEFAULT_QUEUE_SIZE = 1000
+    DEFAULT_DEDUP_WINDOW = 3600
+    DEFAULT_DEDUP_MAXSIZE = 100000
+
+    def __init__(self, handler, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE,
+                 dedup_window=DEFAULT_DEDUP_WINDOW, dedup_maxsize=DEFAULT_DEDUP_MAXSIZE, model_class=InMessage,
+                 validate_keys=False, ordering_key=None, on_error=None):
+        """
+        :param handler: callable taking one model instance
+        :param workers: number of worker threads
+        :param queue_size: maximum number of messages waiting per worker
+        :param dedup_window: seconds a transactionId is remembered (None disables deduplication)
+        :param dedup_maxsize: maximum number of remembered transactionIds
+        :param model_class: model built from the payloads, e.g. OutMessage for delivery reports
+        :param validate_keys: reject payloads with fields the model does not know
+        :param ordering_key: callable returning the key messages are kept in order by (defaults to the sender)
+        :param on_error: callable taking (message, exception) for handler errors
+        """
+        if workers < 1:
+            raise ValueError("workers")
+
+        self.handler = handler
+        self.model_class = model_class
+        self.validate_keys = validate_keys
+        self.ordering_key = ordering_key or _sender
+        self.on_error = on_error
+
+        self.received = 0
+        self.duplicates = 0
+        self.processed = 0
+        self.errors = 0
+
+        self._seen = LRUCache(dedup_maxsize, ttl=dedup_window) if dedup_window is not None else None
+        self._counter_lock = threading.Lock()
+        self._queues = [queue.Queue(queue_size) for _ in range(workers)]
+        self._threads = []
+        for worker_queue in self._queues:
+            thread = threading.Thread(target=self._work, args=(worker_queue,))
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def dispatch(self, payload):
+        """
+        Queues one callback for the handler
+        :param payload: raw JSON body (bytes or str), a parsed dict or a model instance
+        :return: False when the payload was a duplicate and dropped, otherwise True
+        """
+        message = self._to_model(payload)
+        with self._counter_lock:
+            self.received += 1
+
+        transaction_id = getattr(message, "transactionId", None)
+        if self._seen is not None and transaction_id is not None and not self._seen.add(transaction_id, True):
+            with self._counter_lock:
+                self.duplicates += 1
+            return False
+
+        key = self.ordering_key(message)
+        self._queues[hash(key) % len(self._queues)].put(message)
+        return True
+
+    def join(self):
+        """
+        Blocks until every dispatched message has been handled
+        """
+        for worker_queue in self._queues:
+            worker_queue.join()
+
+    def close(self, wait=True):
+        """
+        Stops the workers after the queued messages have been handled
+        """
+        for worker_queue in self._queues:
+            worker_queue.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def stats(self):
+        return {
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "processed": self.processed,
+            "errors": self.errors,
+            "queued": sum(worker_queue.qsize() for worker_queue in self._queues),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _to_model(self, payload):
+        if isinstance(payload, self.model_class):
+            return payload
+        if isinstance(payload, (bytes, str)):
+            payload = orjson.loads(payload) if orjson is not None else json.loads(payload)
+        return self.model_class(validate_keys=self.validate_keys, **payload)
+
+    def _work(self, worker_queue):
+        while True:
+            message = worker_queue.get()
+            try:
+                if message is _STOP:
+                    return
+                self._handle(message)
+            finally:
+                worker_queue.task_done()
+
+    def _handle(self, message):
+        try:
+            self.handler(message)
+        except Exception as error:
+            transaction_id = getattr(message, "transactionId", None)
+            if self._seen is not None and transaction_id is not None:
+                self._seen.delete(transaction_id)
+            with self._counter_lock:
+                self.errors += 1
+            if self.on_error is not None:
+                try:
+                    self.on_error(message, error)
+                except Exception:
+                    # the worker keeps going, its queue would never drain otherwise
+                    _logger.exception("on_error failed for in-message %s", transaction_id)
+            return
+
+        with self._counter_lock:
+            self.processed += 1
+
+
+_STOP = object()
+
+
+def _sender(message):
+    return getattr(message, "sender", None)
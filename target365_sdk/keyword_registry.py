@@ -0,0 +1,178 @@
+import threading
+
+
+class KeywordRegistry:
+    """
+    Local index of keywords per short number, for routing in-messages without API calls.
+
+    sync() fetches the keywords and only re-indexes the short numbers whose
+    keywords were added, removed or changed (by lastModified). Lookups work on
+    immutable per short number indexes, so match() takes no locks and is safe
+    to call from any thread while a sync is running.
+
+    Matching is case insensitive and follows the keyword modes, in this order:
+    Text (the message's first words equal the keyword), StartsWith (the message
+    starts with the keyword, longest keyword first) and Wildcard (any message).
+    Disabled keywords never match.
+
+        registry = KeywordRegistry(api_client)
+        registry.sync()
+        keyword = registry.match("NO-2002", in_message.content)
+    """
+
+    TEXT = "text"
+    STARTS_WITH = "startswith"
+    WILDCARD = "wildcard"
+
+    def __init__(self, api_client):
+        """
+        :param api_client: ApiClient used to fetch the keywords
+        """
+        self.api_client = api_client
+        self._keywords = {}
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def sync(self, short_number_id=None):
+        """
+        Fetches the keywords of one short number (or of all short numbers) and updates the index
+        :return: number of keywords added, changed or removed
+        """
+        fetched = {}
+        for keyword in self.api_client.iter_all_keywords(short_number_id):
+            fetched[keyword.keywordId] = keyword
+
+        with self._lock:
+            count = 0
+            changed = set()
+            for keyword_id, old in list(self._keywords.items()):
+                if short_number_id is not None and old.shortNumberId != short_number_id:
+                    continue
+                if keyword_id not in fetched:
+                    del self._keywords[keyword_id]
+                    changed.add(old.shortNumberId)
+                    count += 1
+
+            for keyword_id, keyword in fetched.items():
+                old = self._keywords.get(keyword_id)
+                if old is not None and _unchanged(old, keyword):
+                    continue
+                self._keywords[keyword_id] = keyword
+                changed.add(keyword.shortNumberId)
+                if old is not None:
+                    changed.add(old.shortNumberId)
+                count += 1
+
+            self._reindex(changed)
+        return count
+
+    def apply(self, keyword):
+        """
+        Adds or replaces a single keyword, e.g. right after creating or updating it
+        """
+        with self._lock:
+            old = self._keywords.get(keyword.keywordId)
+            self._keywords[keyword.keywordId] = keyword
+            self._reindex(set(k.shortNumberId for k in (old, keyword) if k is not None))
+
+    def remove(self, keyword_id):
+        """
+        Removes a single keyword, e.g. right after deleting it
+        """
+        with self._lock:
+            old = self._keywords.pop(keyword_id, None)
+            if old is not None:
+                self._reindex({old.shortNumberId})
+
+    def keywords(self, short_number_id):
+        """
+        :return: list of the indexed keywords of a short number
+        """
+        index = self._indexes.get(short_number_id)
+        return [] if index is None else list(index.keywords)
+
+    def match(self, short_number_id, text):
+        """
+        Resolves an inbound message text to its keyword
+        :param short_number_id: short number the message was sent to (e.g. "NO-2002")
+        :param text: message content
+        :return: Keyword, or None when no enabled keyword matches
+        """
+        index = self._indexes.get(short_number_id)
+        if index is None:
+            return None
+        return index.match(text)
+
+    def _reindex(self, short_number_ids):
+        """
+        Rebuilds the indexes of the given short numbers, must be called holding self._lock
+        """
+        for short_number_id in short_number_ids:
+            keywords = [keyword for keyword in self._keywords.values() if keyword.shortNumberId == short_number_id]
+            if keywords:
+                self._indexes[short_number_id] = _ShortNumberIndex(keywords)
+            else:
+                self._indexes.pop(short_number_id, None)
+
+
+class _ShortNumberIndex:
+    """
+    Immutable keyword index of one short number
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(keywords)
+        self.texts = {}
+        self.prefixes = {}
+        self.wildcard = None
+
+        for keyword in sorted(self.keywords, key=lambda k: str(k.keywordId)):
+            if getattr(keyword, "enabled", True) is False:
+                continue
+
+            mode = (getattr(keyword, "mode", None) or KeywordRegistry.TEXT).lower()
+            text = " ".join((getattr(keyword, "keywordText", None) or "").upper().split())
+            if mode == KeywordRegistry.WILDCARD:
+                self.wildcard = self.wildcard or keyword
+            elif not text:
+                continue
+            elif mode == KeywordRegistry.STARTS_WITH:
+                self.prefixes.setdefault(text, keyword)
+            else:
+                self.texts.setdefault(text, keyword)
+
+        # keywords are tried longest first, so "HELLO WORLD" wins over "HELLO"
+        self.word_counts = sorted(set(text.count(" ") + 1 for text in self.texts), reverse=True)
+        self.max_words = self.word_counts[0] if self.word_counts else 0
+        self.prefix_lengths = sorted(set(len(text) for text in self.prefixes), reverse=True)
+
+    def match(self, text):
+        text = text.lstrip().upper() if text else ""
+
+        if self.max_words:
+            words = text.split(None, self.max_words)
+            if self.max_words == 1:
+                keyword = self.texts.get(words[0]) if words else None
+                if keyword is not None:
+                    return keyword
+            else:
+                for count in self.word_counts:
+                    if len(words) >= count:
+                        keyword = self.texts.get(" ".join(words[:count]))
+                        if keyword is not None:
+                            return keyword
+
+        for length in self.prefix_lengths:
+            keyword = self.prefixes.get(text[:length])
+            if keyword is not None:
+                return keyword
+
+        return self.wildcard
+
+
+def _unchanged(old, new):
+    old_modified = getattr(old, "lastModified", None)
+    new_modified = getattr(new, "lastModified", None)
+    if old_modified is None or new_modified is None:
+        return old.__getstate__() == new.__getstate__()
+    return old_modified == new_modified and old.shortNumberId == new.shortNumberId
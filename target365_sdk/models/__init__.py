@@ -0,0 +1,38 @@
+import importlib
+import sys
+
+# model class -> module, the modules are imported on first access
+_MODELS = {
+    "InMessage": "in_message",
+    "Keyword": "keyword",
+    "LookupResult": "lookup_result",
+    "Model": "model",
+    "OneTimePassword": "one_time_password",
+    "OutMessage": "out_message",
+    "OutMessageStrex": "out_message_strex",
+    "PublicKey": "public_key",
+    "StrexMerchant": "strex_merchant",
+    "StrexTransaction": "strex_transaction",
+}
+
+__all__ = sorted(_MODELS)
+
+
+def _load(attribute):
+    value = getattr(importlib.import_module("." + _MODELS[attribute], __name__), attribute)
+    globals()[attribute] = value  # later lookups don't come through __getattr__ again
+    return value
+
+
+if sys.version_info < (3, 7):
+    # modules can't have __getattr__ before Python 3.7
+    for _attribute in _MODELS:
+        _load(_attribute)
+else:
+    def __getattr__(attribute):
+        if attribute in _MODELS:
+            return _load(attribute)
+        raise AttributeError("module " + __name__ + " has no attribute " + attribute)
+
+    def __dir__():
+        return sorted(set(globals()) | set(_MODELS))
@@ -2,16 +2,15 @@ from .model import Model
 
 class Keyword(Model):
 
-    def _accepted_params(self):
-        return [
-            'keywordId',
-            'shortNumberId',
-            'keywordText',
-            'mode',
-            'forwardUrl',
-            'enabled',
-            'created',
-            'lastModified',
-            'tags',
-            'customProperties',
-        ]
+    _fields = (
+        'keywordId',
+        'shortNumberId',
+        'keywordText',
+        'mode',
+        'forwardUrl',
+        'enabled',
+        'created',
+        'lastModified',
+        'tags',
+        'customProperties',
+    )
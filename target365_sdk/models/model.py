@@ -1,7 +1,46 @@
-from abc import ABCMeta, abstractmethod
+import sys
+from abc import ABCMeta
 
-class Model:
-    __metaclass__ = ABCMeta
+# From Python 3.11 on, instance attributes are stored inline without a separate
+# dict, which is smaller than a full slot row for sparsely populated models.
+# Slots only pay off on older interpreters.
+SLOTTED = sys.version_info < (3, 11)
+
+_UNSET = object()
+
+
+class ModelMeta(ABCMeta):
+    """
+    Turns the `_fields` tuple of a model class into a frozen field set, so key
+    validation is a single set lookup, and (where it saves memory) into
+    `__slots__`, so instances carry no per-instance dict for their known fields.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get('_fields')
+        if fields is not None:
+            namespace['_fields'] = fields = tuple(fields)
+            namespace['_field_set'] = frozenset(fields)
+            if SLOTTED:
+                namespace.setdefault('__slots__', fields)
+        elif '_accepted_params' in namespace:
+            # model declared the pre-slots way, validate through _accepted_params()
+            namespace['_field_set'] = None
+
+        if SLOTTED:
+            namespace.setdefault('__slots__', ())
+        return ABCMeta.__new__(mcs, name, bases, namespace)
+
+
+# The `__dict__` slot keeps unknown attributes working (validate_keys=False and
+# ad hoc attributes). The dict is only allocated once such an attribute is set.
+_ModelBase = ModelMeta('_ModelBase', (object,), {'__slots__': ('__dict__',)} if SLOTTED else {})
+
+
+class Model(_ModelBase):
+
+    _fields = None
+    _field_set = None
 
     def __init__(self, validate_keys=True, **kwargs):
 
@@ -10,11 +49,15 @@ class Model:
         if type(args) is not dict:
             raise Exception('_init_preprocess() must return a dict')
 
-        for key, value in args.items():
-
-            if validate_keys and key not in self._accepted_params():
-                raise Exception('This model does not allow parameter `' + key + '`')
+        if validate_keys:
+            accepted = self._field_set
+            if accepted is None:
+                accepted = frozenset(self._accepted_params())
+            for key in args:
+                if key not in accepted:
+                    raise Exception('This model does not allow parameter `' + key + '`')
 
+        for key, value in args.items():
             setattr(self, key, value)
 
 
@@ -27,13 +70,32 @@ class Model:
         """
         return args
 
-    @abstractmethod
     def _accepted_params(self):
         """
-        Abstract method. This should return a list of all parameters which
-        this model should accept
+        Returns a list of all parameters which this model accepts. Models
+        declare them as a `_fields` tuple, older models may override this
+        method instead.
+        """
+        return list(self._fields or ())
+
+    def __getstate__(self):
         """
-        pass
+        Returns all attributes which have been set
+        """
+        if not SLOTTED:
+            return dict(self.__dict__)
+
+        state = {}
+        for field in self._fields or ():
+            value = getattr(self, field, _UNSET)
+            if value is not _UNSET:
+                state[field] = value
+        state.update(self.__dict__)
+        return state
+
+    def __setstate__(self, state):
+        for key, value in state.items():
+            setattr(self, key, value)
 
 
     @classmethod
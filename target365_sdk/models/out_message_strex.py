@@ -2,12 +2,10 @@ from .model import Model
 
 class OutMessageStrex(Model):
 
-
-    def _accepted_params(self):
-        return [
-            'merchantId',
-            'serviceCode',
-            'invoiceText',
-            'price',
-            'billed',
-        ]
+    _fields = (
+        'merchantId',
+        'serviceCode',
+        'invoiceText',
+        'price',
+        'billed',
+    )
@@ -2,9 +2,8 @@ from .model import Model
 
 class StrexMerchant(Model):
 
-    def _accepted_params(self):
-        return [
-            'merchantId',
-            'shortNumberId',
-            'password',
-        ]
+    _fields = (
+        'merchantId',
+        'shortNumberId',
+        'password',
+    )
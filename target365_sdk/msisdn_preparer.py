@@ -0,0 +1,130 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .helpers.cache import LRUCache
+from .helpers.concurrency import chunked
+
+
+class MsisdnPreparer:
+    """
+    Calls prepare_msisdns only for numbers which were not prepared recently.
+
+    Prepared numbers are remembered for ttl seconds (at most maxsize numbers).
+    prepare() drops duplicates and remembered numbers and posts the rest in
+    chunks of chunk_size. prefetch() wraps a stream of out-messages and
+    prepares the recipients of the next lookahead messages in the background
+    while the current ones are sent:
+
+        preparer = MsisdnPreparer(api_client)
+        api_client.create_out_message_bulk(preparer.prefetch(out_messages))
+    """
+
+    DEFAULT_TTL = 3600
+    DEFAULT_MAXSIZE = 1000000
+    DEFAULT_CHUNK_SIZE = 1000
+
+    def __init__(self, api_client, ttl=DEFAULT_TTL, maxsize=DEFAULT_MAXSIZE, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        :param api_client: ApiClient used to prepare the numbers
+        :param ttl: seconds a prepared number is considered warm
+        :param maxsize: maximum number of remembered numbers
+        :param chunk_size: maximum numbers per prepare_msisdns call
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size")
+
+        self.api_client = api_client
+        self.chunk_size = chunk_size
+        self.prepared = 0
+        self.skipped = 0
+        self.requests = 0
+        self.errors = 0
+        self._warm = LRUCache(maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+
+    def prepare(self, msisdns):
+        """
+        Prepares the numbers which are not warm yet. Numbers of a failed call are
+        not remembered, so the next call tries them again.
+        :param msisdns: iterable of MSISDNs
+        :return: number of MSISDNs posted
+        """
+        if msisdns is None:
+            raise ValueError("msisdns")
+
+        posted = 0
+        for chunk in chunked(self._claim(msisdns), self.chunk_size):
+            with self._lock:
+                self.requests += 1
+            try:
+                self.api_client.prepare_msisdns(chunk)
+            except Exception:
+                for msisdn in chunk:
+                    self._warm.delete(msisdn)
+                with self._lock:
+                    self.errors += 1
+                raise
+            posted += len(chunk)
+            with self._lock:
+                self.prepared += len(chunk)
+        return posted
+
+    def prefetch(self, out_messages, lookahead=DEFAULT_CHUNK_SIZE):
+        """
+        Passes out-messages through unchanged, preparing recipients ahead of the consumer.
+        Preparing is best effort, failed calls are counted in stats() but don't stop the messages.
+        :param out_messages: iterable of OutMessage, consumed lazily
+        :param lookahead: number of messages prepared ahead of the one being consumed
+        :return: generator of OutMessage
+        """
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            previous = None
+            for window in chunked(out_messages, lookahead):
+                future = executor.submit(self._prepare_quietly, [message.recipient for message in window])
+                if previous is not None:
+                    previous_window, previous_future = previous
+                    previous_future.result()
+                    for message in previous_window:
+                        yield message
+                previous = (window, future)
+
+            if previous is not None:
+                previous_window, previous_future = previous
+                previous_future.result()
+                for message in previous_window:
+                    yield message
+        finally:
+            executor.shutdown(wait=True)
+
+    def is_warm(self, msisdn):
+        return msisdn in self._warm
+
+    def forget(self, msisdn):
+        self._warm.delete(msisdn)
+
+    def stats(self):
+        return {
+            "prepared": self.prepared,
+            "skipped": self.skipped,
+            "requests": self.requests,
+            "errors": self.errors,
+            "warm": len(self._warm),
+        }
+
+    def _claim(self, msisdns):
+        """
+        Yields the numbers not warm yet, marking them warm right away so
+        concurrent calls don't prepare the same number twice
+        """
+        for msisdn in msisdns:
+            if self._warm.add(msisdn, True):
+                yield msisdn
+            else:
+                with self._lock:
+                    self.skipped += 1
+
+    def _prepare_quietly(self, msisdns):
+        try:
+            self.prepare(msisdns)
+        except Exception:
+            pass
@@ -0,0 +1,377 @@
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+from .bulk import _is_transient, _status_code
+from .helpers.json_encoder import encode
+from .models.out_message import OutMessage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    transaction_id TEXT PRIMARY KEY,
+    payload BLOB NOT NULL,
+    enqueued REAL NOT NULL,
+    next_attempt REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT
+)
+"""
+_INDEX = "CREATE INDEX IF NOT EXISTS outbox_due ON outbox (failed, next_attempt)"
+
+_logger = logging.getLogger(__name__)
+
+
+class Outbox:
+    """
+    Durable queue of out-messages in a local SQLite database, sent by a
+    background thread.
+
+    enqueue() encodes the message and inserts it in a single short write
+    transaction, so request handlers never wait for the API. The database runs
+    in WAL mode, the sender reads and deletes while handlers insert. A message
+    is deleted only after the API acknowledged it, so no message is lost when
+    the process dies; one sent just before the crash is sent again on the next
+    start, and the API rejects its transactionId as a duplicate (409), which
+    counts as sent. Messages are kept as their encoded JSON and posted as is.
+
+        outbox = Outbox(api_client, "outbox.db")
+
+        def order_confirmed(order):
+            outbox.enqueue(OutMessage(transactionId=order.id, sender="Target365",
+                                      recipient=order.msisdn, content="Thanks for your order!"))
+
+    Due messages are posted in batches. Transient failures (connection
+    errors, 408, 429, 5xx) are retried with exponential backoff. A batch
+    rejected for another reason is retried message by message, so one bad
+    message does not hold up the others, and a message rejected on its own
+    is marked failed and kept for inspection (see failed()). Errors of the
+    sender itself, e.g. a locked or broken database, are logged to the
+    target365_sdk.outbox logger and counted as errors in stats().
+    """
+
+    DEFAULT_BATCH_SIZE = 100
+    DEFAULT_POLL_INTERVAL = 1.0
+    DEFAULT_RETRY_DELAY = 1.0
+    DEFAULT_MAX_RETRY_DELAY = 300.0
+
+    def __init__(self, api_client, path, batch_size=DEFAULT_BATCH_SIZE, poll_interval=DEFAULT_POLL_INTERVAL,
+                 retry_delay=DEFAULT_RETRY_DELAY, max_retry_delay=DEFAULT_MAX_RETRY_DELAY, max_attempts=None,
+                 synchronous="NORMAL", autostart=True):
+        """
+        :param api_client: ApiClient used to send the messages
+        :param path: SQLite database file, created when missing
+        :param batch_size: maximum messages per batch request
+        :param poll_interval: seconds the sender sleeps when nothing is due
+        :param retry_delay: seconds before the first retry, doubled for every further retry
+        :param max_retry_delay: maximum seconds between two retries
+        :param max_attempts: mark a message failed after this many transient failures (None retries forever)
+        :param synchronous: SQLite synchronous setting, NORMAL survives process crashes, FULL also power loss
+        :param autostart: start the background sender right away
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size")
+        if synchronous not in ("OFF", "NORMAL", "FULL", "EXTRA"):
+            raise ValueError("synchronous")
+
+        self.api_client = api_client
+        self.path = path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max_attempts
+        self.synchronous = synchronous
+
+        self.enqueued = 0
+        self.sent = 0
+        self.duplicates = 0
+        self.retries = 0
+        self.failures = 0
+        self.errors = 0
+        self.last_error = None
+
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()  # _ThreadConnection of every live thread
+        self._connections_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self._send_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+        connection = self._connection()
+        with connection:
+            connection.execute(_SCHEMA)
+            connection.execute(_INDEX)
+
+        if autostart:
+            self.start()
+
+    def enqueue(self, out_message):
+        """
+        Stores a message for sending. A message with a transactionId already in the outbox is ignored.
+        :param out_message: OutMessage, a transactionId is assigned when it has none
+        :return: the transactionId
+        """
+        if out_message is None:
+            raise ValueError("message")
+        return self.enqueue_many([out_message])[0]
+
+    def enqueue_many(self, out_messages):
+        """
+        Stores messages for sending in a single transaction
+        :param out_messages: iterable of OutMessage
+        :return: list of transactionIds
+        """
+        now = time.time()
+        rows = []
+        for out_message in out_messages:
+            if getattr(out_message, "transactionId", None) is None:
+                out_message.transactionId = str(uuid.uuid4())
+            rows.append((out_message.transactionId, encode(out_message), now, now))
+
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR IGNORE INTO outbox (transaction_id, payload, enqueued, next_attempt) VALUES (?, ?, ?, ?)",
+                rows)
+        with self._counter_lock:
+            self.enqueued += len(rows)
+        self._wakeup.set()
+        return [row[0] for row in rows]
+
+    def start(self):
+        """
+        Starts the background sender
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._run)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self, wait=True):
+        """
+        Stops the background sender after the batch in flight. Unsent messages stay in the outbox.
+        """
+        self._stopped.set()
+        self._wakeup.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+
+    def close(self):
+        """
+        Stops the background sender and closes the database connections of all
+        threads. Call it on shutdown, once no other thread uses the outbox, a
+        query running on another thread meanwhile fails. A thread using the
+        outbox afterwards opens a new connection.
+        """
+        self.stop()
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for thread_connection in connections:
+            connection, thread_connection.connection = thread_connection.connection, None
+            if connection is not None:
+                connection.close()
+
+    def flush(self):
+        """
+        Sends every message due now on the calling thread, once
+        :return: number of messages still waiting (for a retry or a later poll)
+        """
+        now = time.time()
+        while self.send_due(now):
+            pass
+        return len(self)
+
+    def send_due(self, now=None):
+        """
+        Sends one batch of due messages
+        :param now: send messages due at this time (defaults to the current time)
+        :return: number of messages taken from the outbox
+        """
+        with self._send_lock:
+            rows = self._connection().execute(
+                "SELECT transaction_id, payload, attempts FROM outbox WHERE failed = 0 AND next_attempt <= ? "
+                "ORDER BY next_attempt LIMIT ?", (time.time() if now is None else now, self.batch_size)).fetchall()
+            if not rows:
+                return 0
+
+            try:
+                body = b"[" + b",".join(bytes(row[1]) for row in rows) + b"]"
+            except Exception:
+                # an unreadable payload is marked failed on its own, the others are still sent
+                self._send_one_by_one(rows)
+                return len(rows)
+
+            try:
+                self.api_client.create_out_message_batch(body)
+            except Exception as error:
+                if _is_transient(error):
+                    self._retry_later(rows, error)
+                else:
+                    self._send_one_by_one(rows)
+                return len(rows)
+
+            self._delete([row[0] for row in rows])
+            with self._counter_lock:
+                self.sent += len(rows)
+            return len(rows)
+
+    def failed(self):
+        """
+        Yields (OutMessage, error) for the messages which were given up on
+        """
+        rows = self._connection().execute(
+            "SELECT payload, last_error FROM outbox WHERE failed = 1 ORDER BY enqueued").fetchall()
+        for payload, last_error in rows:
+            yield OutMessage(validate_keys=False, **json.loads(bytes(payload).decode("utf-8"))), last_error
+
+    def requeue_failed(self):
+        """
+        Gives the failed messages another try
+        :return: number of messages requeued
+        """
+        connection = self._connection()
+        with connection:
+            count = connection.execute(
+                "UPDATE outbox SET failed = 0, attempts = 0, next_attempt = ? WHERE failed = 1", (time.time(),)).rowcount
+        self._wakeup.set()
+        return count
+
+    def __len__(self):
+        """
+        Number of messages waiting to be sent, failed ones not included
+        """
+        return self._connection().execute("SELECT COUNT(*) FROM outbox WHERE failed = 0").fetchone()[0]
+
+    def stats(self):
+        return {
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "duplicates": self.duplicates,
+            "retries": self.retries,
+            "failures": self.failures,
+            "errors": self.errors,
+            "pending": len(self),
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                sent = self.send_due()
+            except Exception as error:
+                # the database was busy or broken for a moment, try again after the poll interval
+                _logger.exception("Outbox %s: sending failed, retrying in %s seconds", self.path, self.poll_interval)
+                with self._counter_lock:
+                    self.errors += 1
+                    self.last_error = _describe(error)
+                sent = 0
+            if not sent:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _send_one_by_one(self, rows):
+        sent = []
+        for row in rows:
+            try:
+                self.api_client.create_out_message(bytes(row[1]))
+                sent.append(row[0])
+            except Exception as error:
+                if _status_code(error) == 409:
+                    sent.append(row[0])
+                    with self._counter_lock:
+                        self.duplicates += 1
+                elif _is_transient(error):
+                    self._retry_later([row], error)
+                else:
+                    self._mark_failed(row[0], error)
+
+        self._delete(sent)
+        with self._counter_lock:
+            self.sent += len(sent)
+
+    def _retry_later(self, rows, error):
+        now = time.time()
+        updates = []
+        failed = []
+        for transaction_id, payload, attempts in rows:
+            attempts += 1
+            if self.max_attempts is not None and attempts >= self.max_attempts:
+                failed.append(transaction_id)
+                continue
+            delay = min(self.max_retry_delay, self.retry_delay * 2 ** min(attempts - 1, 32))
+            updates.append((attempts, now + delay, _describe(error), transaction_id))
+
+        connection = self._connection()
+        with connection:
+            connection.executemany(
+                "UPDATE outbox SET attempts = ?, next_attempt = ?, last_error = ? WHERE transaction_id = ?", updates)
+        with self._counter_lock:
+            self.retries += len(updates)
+        for transaction_id in failed:
+            self._mark_failed(transaction_id, error)
+
+    def _mark_failed(self, transaction_id, error):
+        connection = self._connection()
+        with connection:
+            connection.execute("UPDATE outbox SET failed = 1, attempts = attempts + 1, last_error = ? "
+                               "WHERE transaction_id = ?", (_describe(error), transaction_id))
+        with self._counter_lock:
+            self.failures += 1
+
+    def _delete(self, transaction_ids):
+        if not transaction_ids:
+            return
+        connection = self._connection()
+        with connection:
+            connection.executemany("DELETE FROM outbox WHERE transaction_id = ?",
+                                   [(transaction_id,) for transaction_id in transaction_ids])
+
+    def _connection(self):
+        """
+        One connection per thread, SQLite serializes the writers. The connection
+        is closed when its thread ends, so short-lived threads don't pile them up.
+        """
+        thread_connection = getattr(self._local, "connection", None)
+        if thread_connection is None or thread_connection.connection is None:
+            # close() may be called from another thread, so the connection isn't bound to this one
+            connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=" + self.synchronous)
+            thread_connection = _ThreadConnection(connection)
+            with self._connections_lock:
+                self._connections.add(thread_connection)
+            self._local.connection = thread_connection
+        return thread_connection.connection
+
+
+class _ThreadConnection:
+    """
+    Holds the connection of one thread. Only the thread-local refers to it, and
+    Outbox keeps a weak reference for close(), so the connection is released
+    with its thread.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+
+
+def _describe(error):
+    text = str(error)
+    if text:
+        return text
+    status_code = _status_code(error)
+    return type(error).__name__ if status_code is None else "HTTP %d" % status_code
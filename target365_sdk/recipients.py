@@ -0,0 +1,279 @@
+import math
+import re
+from array import array
+from .models.out_message import OutMessage
+
+DEFAULT_COUNTRY_CODE = "47"
+DEFAULT_NATIONAL_LENGTH = 8
+
+# separators people put in phone numbers
+_SEPARATORS = dict.fromkeys(map(ord, " \t\r\n-./()"), None)
+# E.164 numbers have at most 15 digits, and no country code starts with 0
+_E164_DIGITS = re.compile(r"[1-9][0-9]{6,14}\Z")
+
+_GOLDEN = 0x9E3779B97F4A7C15
+_UINT64 = 0xFFFFFFFFFFFFFFFF
+
+
+def normalize_msisdn(msisdn, default_country_code=DEFAULT_COUNTRY_CODE, national_length=DEFAULT_NATIONAL_LENGTH):
+    """
+    Normalizes a phone number to E.164, e.g. "987 65 432", "0047 98765432" and
+    "4798765432" all become "+4798765432"
+    :param default_country_code: country code of numbers given without one
+    :param national_length: digits of a national number without country code and trunk prefix (None accepts
+        any length, numbers starting with the country code are then taken as already complete)
+    :return: the E.164 number, or None when the input is no valid number
+    """
+    number = _to_int(msisdn, default_country_code, national_length)
+    return None if number is None else "+%d" % number
+
+
+def normalize_msisdns(msisdns, default_country_code=DEFAULT_COUNTRY_CODE, national_length=DEFAULT_NATIONAL_LENGTH):
+    """
+    Normalizes many phone numbers, yielding the E.164 number (or None for invalid input) per number
+    """
+    for msisdn in msisdns:
+        number = _to_int(msisdn, default_country_code, national_length)
+        yield None if number is None else "+%d" % number
+
+
+class RecipientList:
+    """
+    Normalized, duplicate free list of recipients for huge campaigns.
+
+    Numbers are normalized to E.164 as they are added, invalid numbers and
+    duplicates are dropped and counted. The list stores every number as a
+    packed 64 bit integer (8 bytes instead of a ~60 byte string), in insertion
+    order. Duplicates are detected exactly with a PackedIntSet (about 16-32
+    bytes per number), or with a BloomFilter when bloom_capacity is given
+    (about 2 bytes per number at a 0.1% error rate, at the price of dropping
+    that share of unique numbers as false duplicates).
+
+        recipients = RecipientList()
+        recipients.extend(line.strip() for line in open("numbers.txt"))
+        api_client.create_out_message_bulk(recipients.out_messages(sender="Target365", content="Hello!"))
+        results = dict(api_client.lookup_many(recipients))
+    """
+
+    def __init__(self, default_country_code=DEFAULT_COUNTRY_CODE, national_length=DEFAULT_NATIONAL_LENGTH,
+                 bloom_capacity=None, bloom_error_rate=0.001):
+        """
+        :param default_country_code: country code of numbers given without one
+        :param national_length: digits of a national number without country code
+        :param bloom_capacity: expected number of unique numbers, enables the Bloom filter
+        :param bloom_error_rate: share of unique numbers a full Bloom filter mistakes for duplicates
+        """
+        self.default_country_code = default_country_code
+        self.national_length = national_length
+        self.invalid_count = 0
+        self.duplicate_count = 0
+        self._numbers = array("Q")
+        if bloom_capacity is None:
+            self._seen = PackedIntSet()
+        else:
+            self._seen = BloomFilter(bloom_capacity, bloom_error_rate)
+
+    def add(self, msisdn):
+        """
+        :return: True when the number was valid and new
+        """
+        number = _to_int(msisdn, self.default_country_code, self.national_length)
+        if number is None:
+            self.invalid_count += 1
+            return False
+        if not self._seen.add(number):
+            self.duplicate_count += 1
+            return False
+        self._numbers.append(number)
+        return True
+
+    def extend(self, msisdns):
+        """
+        :return: number of valid new numbers added
+        """
+        to_int = _to_int
+        seen_add = self._seen.add
+        append = self._numbers.append
+        country_code = self.default_country_code
+        national_length = self.national_length
+
+        added = invalid = duplicates = 0
+        for msisdn in msisdns:
+            number = to_int(msisdn, country_code, national_length)
+            if number is None:
+                invalid += 1
+            elif seen_add(number):
+                append(number)
+                added += 1
+            else:
+                duplicates += 1
+
+        self.invalid_count += invalid
+        self.duplicate_count += duplicates
+        return added
+
+    def __iter__(self):
+        for number in self._numbers:
+            yield "+%d" % number
+
+    def __len__(self):
+        return len(self._numbers)
+
+    def __contains__(self, msisdn):
+        number = _to_int(msisdn, self.default_country_code, self.national_length)
+        return number is not None and number in self._seen
+
+    def out_messages(self, **fields):
+        """
+        Yields an OutMessage per recipient, e.g. for ApiClient.create_out_message_bulk
+        :param fields: other OutMessage fields (sender, content, ...)
+        """
+        for recipient in self:
+            yield OutMessage(recipient=recipient, **fields)
+
+
+class PackedIntSet:
+    """
+    Exact set of positive 64 bit integers in an open addressing table backed by
+    array("Q"), using 16-32 bytes per item instead of the ~70 of a Python set of ints
+    """
+
+    def __init__(self, capacity=1024):
+        size = 16
+        while size < capacity * 2:
+            size *= 2
+        self._init_table(size)
+        self._count = 0
+
+    def add(self, value):
+        """
+        :param value: integer between 1 and 2 ** 64 - 1
+        :return: True when the value was added, False when it was present already
+        """
+        table = self._table
+        mask = len(table) - 1
+        index = ((value * _GOLDEN) & _UINT64) >> self._shift
+        while True:
+            current = table[index]
+            if current == 0:
+                table[index] = value
+                self._count += 1
+                if self._count * 2 > len(table):
+                    self._grow()
+                return True
+            if current == value:
+                return False
+            index = (index + 1) & mask
+
+    def __contains__(self, value):
+        table = self._table
+        mask = len(table) - 1
+        index = ((value * _GOLDEN) & _UINT64) >> self._shift
+        while True:
+            current = table[index]
+            if current == value:
+                return True
+            if current == 0:
+                return False
+            index = (index + 1) & mask
+
+    def __len__(self):
+        return self._count
+
+    def _init_table(self, size):
+        self._table = array("Q", bytes(8 * size))
+        self._shift = 64 - (size.bit_length() - 1)
+
+    def _grow(self):
+        old = self._table
+        self._init_table(len(old) * 2)
+        self._count = 0
+        for value in old:
+            if value:
+                self.add(value)
+
+
+class BloomFilter:
+    """
+    Bloom filter for positive integers: answers "maybe present" or "certainly absent"
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        """
+        :param capacity: number of items the filter is sized for
+        :param error_rate: chance a new item is reported present once capacity items were added
+        """
+        bits = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.size = max(8, bits)
+        self.hash_count = max(1, int(round(self.size / float(capacity) * math.log(2))))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, value):
+        """
+        :return: True when the value was (certainly) new, False when it may have been added before
+        """
+        bits = self._bits
+        size = self.size
+        position, step = self._hashes(value)
+        new = False
+        for _ in range(self.hash_count):
+            index = position % size
+            mask = 1 << (index & 7)
+            if not bits[index >> 3] & mask:
+                bits[index >> 3] |= mask
+                new = True
+            position += step
+        return new
+
+    def __contains__(self, value):
+        bits = self._bits
+        size = self.size
+        position, step = self._hashes(value)
+        for _ in range(self.hash_count):
+            index = position % size
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+            position += step
+        return True
+
+    @staticmethod
+    def _hashes(value):
+        # double hashing, two independent hashes make all k positions
+        first = (value * _GOLDEN) & _UINT64
+        second = ((value ^ (value >> 29)) * 0xBF58476D1CE4E5B9 & _UINT64) | 1
+        return first, second
+
+
+def _to_int(msisdn, default_country_code, national_length):
+    """
+    :return: the E.164 number as integer, None when invalid
+    """
+    if not msisdn:
+        return None
+    if not isinstance(msisdn, str):
+        msisdn = str(msisdn)
+
+    digits = msisdn.translate(_SEPARATORS)
+    if digits.startswith("+"):
+        digits = digits[1:]
+    elif digits.startswith("00"):
+        digits = digits[2:]
+    elif digits.startswith("0"):
+        # national number with trunk prefix, e.g. 070-123 45 67 in Sweden
+        digits = digits[1:]
+        if national_length is not None and len(digits) != national_length:
+            return None
+        digits = default_country_code + digits
+    elif national_length is None:
+        # without a known length, a number starting with the country code is taken as complete
+        if not digits.startswith(default_country_code):
+            digits = default_country_code + digits
+    elif len(digits) == national_length:
+        digits = default_country_code + digits
+    elif not (digits.startswith(default_country_code)
+              and len(digits) == len(default_country_code) + national_length):
+        return None
+
+    if _E164_DIGITS.match(digits) is None:
+        return None
+    return int(digits)
@@ -0,0 +1,187 @@
+import base64
+import binascii
+import calendar
+import hashlib
+import re
+import threading
+import time
+from .helpers.cache import LRUCache, MISSING
+from .helpers.signing import create_verifier
+
+
+class SignatureVerifier:
+    """
+    Verifies the ECDSA Authorization header Target365 puts on callbacks
+    (in-messages, delivery reports, Strex results).
+
+    Server public keys are fetched through ApiClient.get_server_public_key once
+    per key name and cached as ready-to-use verifiers until the key expires or
+    key_cache_ttl passes, whichever comes first.
+
+    Nonces are remembered for twice the clock skew, at most max_nonces of them.
+    When more callbacks arrive than fit in that window (5000 per second with
+    the defaults), the surplus is rejected rather than forgetting nonces which
+    could still be replayed.
+
+        verifier = SignatureVerifier(api_client)
+        if not verifier.verify("POST", request.url, request.body, request.headers["Authorization"]):
+            return 403
+    """
+
+    DEFAULT_MAX_CLOCK_SKEW = 300
+    DEFAULT_KEY_CACHE_TTL = 3600
+    UNKNOWN_KEY_CACHE_TTL = 60
+    DEFAULT_MAX_NONCES = 3000000
+
+    def __init__(self, api_client, max_clock_skew=DEFAULT_MAX_CLOCK_SKEW, key_cache_ttl=DEFAULT_KEY_CACHE_TTL,
+                 check_nonce=True, backend=None, max_nonces=DEFAULT_MAX_NONCES):
+        """
+        :param api_client: ApiClient used to fetch server public keys
+        :param max_clock_skew: maximum age (and clock difference) in seconds accepted for a signature timestamp
+        :param key_cache_ttl: maximum seconds a fetched public key is cached
+        :param check_nonce: reject nonces which were already seen within the clock skew window (replays)
+        :param backend: signing backend used for verification, see helpers.signing.create_verifier
+        :param max_nonces: maximum number of remembered nonces
+        """
+        self.api_client = api_client
+        self.max_clock_skew = max_clock_skew
+        self.key_cache_ttl = key_cache_ttl
+        self.backend = backend
+        self._keys = LRUCache(128)
+        self._key_locks = {}  # key name -> lock held while that key is fetched
+        self._key_locks_lock = threading.Lock()
+        self._nonces = LRUCache(max_nonces, ttl=2 * max_clock_skew) if check_nonce else None
+
+    def verify(self, method, uri, body, authorization):
+        """
+        :param method: HTTP method of the callback request
+        :param uri: absolute URI the callback was posted to
+        :param body: raw request body as bytes or str (None or empty for no body)
+        :param authorization: value of the Authorization header
+        :return: True when the header carries a valid, fresh signature
+        :raises requests.RequestException: when the server key can't be fetched for another reason than
+            being unknown (connection error, 5xx), answer the callback with a 5xx so it is retried
+        """
+        parts = _parse_authorization(authorization)
+        if parts is None:
+            return False
+        key_name, timestamp, nonce, signature = parts
+
+        try:
+            if abs(time.time() - int(timestamp)) > self.max_clock_skew:
+                return False
+            signature = base64.b64decode(signature)
+        except (ValueError, TypeError, binascii.Error):
+            return False
+
+        verifier = self.get_verifier(key_name)
+        if verifier is None:
+            return False
+
+        content_hash = ""
+        if body:
+            if not isinstance(body, bytes):
+                body = body.encode("utf-8")
+            content_hash = base64.b64encode(hashlib.sha256(body).digest()).decode("utf-8")
+
+        message = method.lower() + uri.lower() + timestamp + nonce + content_hash
+        if not verifier.verify(signature, message.encode("utf-8")):
+            return False
+
+        # checking and remembering the nonce is one step, so concurrent replays can't both pass
+        if self._nonces is not None and not self._nonces.add(nonce, True, evict_unexpired=False):
+            return False
+
+        return True
+
+    def get_verifier(self, key_name):
+        """
+        Returns the cached verifier for a server key, fetching the key when needed
+        :return: helpers.signing.Verifier, or None when the key is unknown or not usable now
+        :raises requests.RequestException: when fetching the key fails for another reason than a 404
+        """
+        entry = self._keys.get(key_name)
+        if entry is MISSING:
+            # one fetch per key name at a time, other keys don't wait for it
+            with self._key_locks_lock:
+                key_lock = self._key_locks.setdefault(key_name, threading.Lock())
+            with key_lock:
+                try:
+                    entry = self._keys.get(key_name)
+                    if entry is MISSING:
+                        entry = self._load_key(key_name)
+                finally:
+                    with self._key_locks_lock:
+                        self._key_locks.pop(key_name, None)
+
+        verifier, not_usable_before, expiry = entry
+        now = time.time()
+        if verifier is None or (not_usable_before is not None and now < not_usable_before) \
+                or (expiry is not None and now >= expiry):
+            return None
+        return verifier
+
+    def _load_key(self, key_name):
+        import requests
+        try:
+            public_key = self.api_client.get_server_public_key(key_name)
+        except requests.HTTPError as error:
+            if getattr(error.response, "status_code", None) != 404:
+                raise
+            # remember unknown key names for a while, so forged headers can't make us hammer the API
+            return self._unusable_key(key_name)
+
+        try:
+            not_usable_before = _parse_timestamp(getattr(public_key, "notUsableBefore", None))
+            expiry = _parse_timestamp(getattr(public_key, "expiry", None))
+            verifier = create_verifier(base64.b64decode(public_key.publicKeyString), self.backend)
+        except (ValueError, TypeError):
+            # a key we can't read verifies nothing, it is looked at again after a while
+            return self._unusable_key(key_name)
+
+        ttl = self.key_cache_ttl
+        if expiry is not None:
+            ttl = max(0, min(ttl, expiry - time.time()))
+
+        entry = (verifier, not_usable_before, expiry)
+        self._keys.set(key_name, entry, ttl)
+        return entry
+
+    def _unusable_key(self, key_name):
+        entry = (None, None, None)
+        self._keys.set(key_name, entry, self.UNKNOWN_KEY_CACHE_TTL)
+        return entry
+
+
+_TIMESTAMP = re.compile(
+    r"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(?:\.\d+)?(Z|[+-]\d\d:?\d\d)?$")
+
+
+def _parse_timestamp(value):
+    """
+    Parses an ISO 8601 timestamp as sent by the API into epoch seconds (timestamps without offset are UTC)
+    """
+    if not value:
+        return None
+
+    match = _TIMESTAMP.match(value)
+    if match is None:
+        raise ValueError("invalid timestamp `" + value + "`")
+
+    seconds = calendar.timegm(tuple(int(part) for part in match.group(1, 2, 3, 4, 5, 6)))
+    offset = match.group(7)
+    if offset and offset != "Z":
+        sign = -1 if offset[0] == "-" else 1
+        offset = offset[1:].replace(":", "")
+        seconds -= sign * (int(offset[:2]) * 3600 + int(offset[2:]) * 60)
+    return seconds
+
+
+def _parse_authorization(authorization):
+    if not authorization or not authorization.startswith("ECDSA "):
+        return None
+
+    parts = authorization[6:].split(":")
+    if len(parts) != 4:
+        return None
+    return parts
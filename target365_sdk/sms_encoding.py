@@ -0,0 +1,135 @@
+import re
+
+GSM7 = "GSM-7"
+UCS2 = "UCS-2"
+
+# GSM 03.38 default alphabet (without the escape character) and its extension table
+GSM_BASIC = (u"@£$¥èéùìòÇ\nØø\rÅå"
+             u"Δ_ΦΓΛΩΠΨΣΘΞÆæßÉ"
+             u" !\"#¤%&'()*+,-./0123456789:;<=>?"
+             u"¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§"
+             u"¿abcdefghijklmnopqrstuvwxyzäöñüà")
+GSM_EXTENSION = u"\f^{}\\[~]|€"
+
+GSM7_SINGLE = 160
+GSM7_MULTIPART = 153
+UCS2_SINGLE = 70
+UCS2_MULTIPART = 67
+
+_NON_GSM = re.compile(u"[^" + re.escape(GSM_BASIC + GSM_EXTENSION) + u"]")
+_EXTENSION = re.compile(u"[" + re.escape(GSM_EXTENSION) + u"]")
+_ASTRAL = re.compile(u"[\U00010000-\U0010ffff]")
+
+
+class SegmentInfo:
+    """
+    How an SMS text is encoded and billed
+
+    encoding: GSM7 or UCS2
+    length: septets (GSM-7, extension characters count twice) or UTF-16 code units (UCS-2)
+    segments: number of SMS parts, 0 for empty content
+    extension_characters: number of characters from the GSM-7 extension table
+    replaced_characters: distinct characters outside GSM-7 which are replaced with '?' (allowUnicode None)
+        or make the message fail (allowUnicode False), in order of appearance
+    valid: False when the API would reject the message (allowUnicode False and characters outside GSM-7)
+    """
+
+    def __init__(self, encoding, length, segments, extension_characters=0, replaced_characters=(), valid=True):
+        self.encoding = encoding
+        self.length = length
+        self.segments = segments
+        self.extension_characters = extension_characters
+        self.replaced_characters = replaced_characters
+        self.valid = valid
+
+    def __repr__(self):
+        return "<SegmentInfo %s %d segments, %d units%s>" % (
+            self.encoding, self.segments, self.length, "" if self.valid else ", invalid")
+
+
+def calculate_segments(content, allow_unicode=None):
+    """
+    :param content: message text
+    :param allow_unicode: OutMessage.allowUnicode, True sends texts with characters outside GSM-7 as UCS-2,
+        False rejects them, None replaces those characters with '?'
+    :return: SegmentInfo
+    """
+    if not content:
+        return SegmentInfo(GSM7, 0, 0)
+
+    if _NON_GSM.search(content) is None:
+        return _gsm7(content)
+
+    if allow_unicode:
+        return _ucs2(content)
+
+    info = _gsm7(_NON_GSM.sub(u"?", content))
+    info.replaced_characters = _distinct(_NON_GSM.findall(content))
+    info.valid = allow_unicode is None
+    return info
+
+
+def iter_segments(out_messages):
+    """
+    Yields (out_message, SegmentInfo) for every message, using each message's allowUnicode
+    """
+    for out_message in out_messages:
+        yield out_message, calculate_segments(getattr(out_message, "content", None),
+                                              getattr(out_message, "allowUnicode", None))
+
+
+def summarize(out_messages):
+    """
+    Totals for a batch of messages, e.g. to estimate its cost before sending
+    :return: dict with messages, segments, gsm7 and ucs2 message counts, and the transactionIds of invalid messages
+    """
+    summary = {"messages": 0, "segments": 0, "gsm7": 0, "ucs2": 0, "invalid": []}
+    for out_message, info in iter_segments(out_messages):
+        summary["messages"] += 1
+        summary["segments"] += info.segments
+        summary["gsm7" if info.encoding == GSM7 else "ucs2"] += 1
+        if not info.valid:
+            summary["invalid"].append(getattr(out_message, "transactionId", None))
+    return summary
+
+
+def _gsm7(content):
+    extension = len(_EXTENSION.findall(content))
+    length = len(content) + extension
+    if length <= GSM7_SINGLE:
+        segments = 1
+    elif not extension:
+        segments = -(-length // GSM7_MULTIPART)
+    else:
+        # an escape sequence is never split over two parts
+        segments = _count_parts((2 if char in GSM_EXTENSION else 1 for char in content), GSM7_MULTIPART)
+    return SegmentInfo(GSM7, length, segments, extension)
+
+
+def _ucs2(content):
+    astral = len(_ASTRAL.findall(content))
+    length = len(content) + astral
+    if length <= UCS2_SINGLE:
+        segments = 1
+    elif not astral:
+        segments = -(-length // UCS2_MULTIPART)
+    else:
+        # a surrogate pair is never split over two parts
+        segments = _count_parts((2 if ord(char) > 0xFFFF else 1 for char in content), UCS2_MULTIPART)
+    return SegmentInfo(UCS2, length, segments)
+
+
+def _count_parts(costs, capacity):
+    parts = 1
+    used = 0
+    for cost in costs:
+        if used + cost > capacity:
+            parts += 1
+            used = 0
+        used += cost
+    return parts
+
+
+def _distinct(characters):
+    seen = set()
+    return tuple(char for char in characters if not (char in seen or seen.add(char)))
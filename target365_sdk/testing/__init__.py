@@ -0,0 +1 @@
+from .stub_server import StubApp, StubServer
@@ -0,0 +1,509 @@
+import binascii
+import itertools
+import json
+import random
+import re
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qsl
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qsl
+
+import ecdsa
+import requests
+from ..helpers.http_client import HttpClient
+from ..helpers.http_response import HttpResponse
+from ..models.public_key import PublicKey
+from ..signature_verifier import SignatureVerifier
+
+
+class StubApp:
+    """
+    In-memory imitation of the Target365 API. It implements the endpoints
+    ApiClient calls, verifies the ECDSA Authorization header of every request
+    against the registered client keys and can inject latency, server errors
+    and throttling responses.
+
+    StubApp only maps a request to a response. StubServer serves it over HTTP.
+    """
+
+    SERVER_KEY_NAME = "stub-server-key"
+
+    def __init__(self, client_keys=None, latency=0, error_rate=0.0, throttle_rate=0.0, max_requests_per_second=None,
+                 retry_after=1, verify_signatures=True, seed=None):
+        """
+        :param client_keys: dict of key name -> hex private key (as given to ApiClient) or DER encoded public key
+        :param latency: seconds to wait before answering, or a (min, max) tuple for a random delay
+        :param error_rate: fraction of requests answered with 500
+        :param throttle_rate: fraction of requests answered with 429
+        :param max_requests_per_second: answer requests beyond this rate with 429 (None means unlimited)
+        :param retry_after: Retry-After header value (seconds) sent with 429 responses
+        :param verify_signatures: reject requests without a valid Authorization header with 401
+        :param seed: seed for the random fault injection
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.max_requests_per_second = max_requests_per_second
+        self.retry_after = retry_after
+        self.verify_signatures = verify_signatures
+
+        self.request_count = 0
+        self.status_counts = {}
+
+        self.lookups = {}
+        self.keywords = {}
+        self.out_messages = {}
+        self.in_messages = {}
+        self.prepared_msisdns = set()
+        self.strex_merchants = {}
+        self.strex_transactions = {}
+        self.one_time_passwords = {}
+        self.client_public_keys = {}
+
+        self._random = random.Random(seed)
+        self._lock = threading.RLock()
+        self._ids = itertools.count(1)
+        self._tokens = None  # token bucket of max_requests_per_second, filled on first use
+        self._tokens_updated = None
+        self._client_key_store = _ClientKeyStore(self)
+        self._verifier = SignatureVerifier(self._client_key_store)
+
+        server_key = ecdsa.SigningKey.generate(curve=ecdsa.NIST256p)
+        self._server_signer = HttpClient("", self.SERVER_KEY_NAME, binascii.hexlify(server_key.to_string()).decode())
+        self.server_public_key = self._public_key(self.SERVER_KEY_NAME, server_key.get_verifying_key().to_der())
+
+        for key_name, key in (client_keys or {}).items():
+            self.add_client_key(key_name, key)
+
+        self._routes = [
+            ("get", r"api/ping", self._ping),
+            ("get", r"api/lookup", self._lookup),
+            ("post", r"api/keywords", self._create_keyword),
+            ("get", r"api/keywords", self._get_keywords),
+            ("get", r"api/keywords/([^/]+)", self._get_keyword),
+            ("put", r"api/keywords/([^/]+)", self._update_keyword),
+            ("delete", r"api/keywords/([^/]+)", self._delete_keyword),
+            ("post", r"api/prepare-msisdns", self._prepare_msisdns),
+            ("post", r"api/out-messages", self._create_out_message),
+            ("post", r"api/out-messages/batch", self._create_out_message_batch),
+            ("get", r"api/out-messages/([^/]+)", self._get_out_message),
+            ("put", r"api/out-messages/([^/]+)", self._update_out_message),
+            ("delete", r"api/out-messages/([^/]+)", self._delete_out_message),
+            ("get", r"api/in-messages/([^/]+)/([^/]+)", self._get_in_message),
+            ("get", r"api/strex/merchants", self._get_strex_merchants),
+            ("get", r"api/strex/merchants/([^/]+)", self._get_strex_merchant),
+            ("put", r"api/strex/merchants/([^/]+)", self._save_strex_merchant),
+            ("delete", r"api/strex/merchants/([^/]+)", self._delete_strex_merchant),
+            ("post", r"api/strex/transactions", self._create_strex_transaction),
+            ("get", r"api/strex/transactions/([^/]+)", self._get_strex_transaction),
+            ("delete", r"api/strex/transactions/([^/]+)", self._delete_strex_transaction),
+            ("post", r"api/strex/one-time-passwords", self._create_one_time_password),
+            ("get", r"api/strex/one-time-passwords/([^/]+)", self._get_one_time_password),
+            ("get", r"api/server/public-keys/([^/]+)", self._get_server_public_key),
+            ("get", r"api/client/public-keys", self._get_client_public_keys),
+            ("get", r"api/client/public-keys/([^/]+)", self._get_client_public_key),
+            ("delete", r"api/client/public-keys/([^/]+)", self._delete_client_public_key),
+        ]
+        self._routes = [(method, re.compile("/" + pattern + "$"), handler) for method, pattern, handler in self._routes]
+
+    ###  Setup  ###
+
+    def add_client_key(self, key_name, key):
+        """
+        :param key: hex private key (as given to ApiClient) or DER encoded public key
+        """
+        if not isinstance(key, bytes):
+            signing_key = ecdsa.SigningKey.from_string(binascii.unhexlify(key), curve=ecdsa.NIST256p)
+            key = signing_key.get_verifying_key().to_der()
+
+        with self._lock:
+            self.client_public_keys[key_name.lower()] = self._public_key(key_name, key)
+
+    def add_lookup(self, lookup_result):
+        """
+        :param lookup_result: LookupResult json dict, must contain `msisdn`
+        """
+        with self._lock:
+            self.lookups[lookup_result["msisdn"]] = lookup_result
+
+    def add_in_message(self, short_number_id, in_message):
+        """
+        :param in_message: InMessage json dict, must contain `transactionId`
+        """
+        with self._lock:
+            self.in_messages[(short_number_id.lower(), in_message["transactionId"].lower())] = in_message
+
+    def sign_callback(self, method, uri, body=None):
+        """
+        Returns an Authorization header value for a callback, signed with the
+        stub server key the way Target365 signs its callbacks
+        """
+        return "ECDSA " + self._server_signer._get_signature(method.lower(), uri.lower(), body or None)
+
+    ###  Request handling  ###
+
+    def handle(self, method, url, headers, body=b""):
+        """
+        Handles one API request
+        :param url: absolute request URL including the query string
+        :param headers: request headers (a dict-like object)
+        :param body: raw request body
+        :return: (status code, response headers dict, response body bytes)
+        """
+        with self._lock:
+            self.request_count += 1
+
+        status, response_headers, content = self._handle(method.lower(), url, headers, body or b"")
+
+        with self._lock:
+            self.status_counts[status] = self.status_counts.get(status, 0) + 1
+        return status, response_headers, content
+
+    def _handle(self, method, url, headers, body):
+        delay = self.latency
+        if isinstance(delay, tuple):
+            with self._lock:
+                delay = self._random.uniform(*delay)
+        if delay:
+            time.sleep(delay)
+
+        if self._throttled():
+            return 429, {"Retry-After": str(self.retry_after)}, b""
+        with self._lock:
+            failed = self.error_rate and self._random.random() < self.error_rate
+        if failed:
+            return 500, {}, b""
+
+        if self.verify_signatures:
+            authorization = headers.get("Authorization") or headers.get("authorization")
+            if not self._verifier.verify(method, url, body, authorization):
+                return 401, {}, b""
+
+        parts = urlsplit(url)
+        path = parts.path.lower()
+        for route_method, pattern, handler in self._routes:
+            match = pattern.match(path)
+            if match is not None and route_method == method:
+                try:
+                    payload = json.loads(body.decode("utf-8")) if body else None
+                except ValueError:
+                    return 400, {}, b""
+                query = dict(parse_qsl(parts.query))
+                with self._lock:
+                    return handler(query, payload, *match.groups())
+
+        return 404, {}, b""
+
+    def _throttled(self):
+        with self._lock:
+            if self.throttle_rate and self._random.random() < self.throttle_rate:
+                return True
+
+            if self.max_requests_per_second is None:
+                self._tokens = None
+                return False
+
+            now = time.time()
+            if self._tokens is None:
+                self._tokens = self.max_requests_per_second
+            else:
+                self._tokens = min(self.max_requests_per_second,
+                                   self._tokens + (now - self._tokens_updated) * self.max_requests_per_second)
+            self._tokens_updated = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    ###  Endpoints  ###
+
+    def _ping(self, query, payload):
+        return 200, {"Content-Type": "text/plain"}, b"pong"
+
+    def _lookup(self, query, payload):
+        result = self.lookups.get(query.get("msisdn"))
+        if result is None:
+            return 404, {}, b""
+        return _json(result)
+
+    def _create_keyword(self, query, payload):
+        keyword = dict(payload)
+        keyword["keywordId"] = str(next(self._ids))
+        keyword.setdefault("created", _now())
+        keyword["lastModified"] = _now()
+        self.keywords[keyword["keywordId"]] = keyword
+        return _created("/api/keywords/" + keyword["keywordId"])
+
+    def _get_keywords(self, query, payload):
+        filters = [(name, query[name].lower()) for name in ("shortNumberId", "keywordText", "mode") if name in query]
+        tag = query.get("tag")
+
+        keywords = [keyword for keyword in self.keywords.values()
+                    if all(str(keyword.get(name, "")).lower() == value for name, value in filters)
+                    and (tag is None or tag.lower() in [t.lower() for t in keyword.get("tags") or []])]
+        return _json(keywords)
+
+    def _get_keyword(self, query, payload, keyword_id):
+        return _json_or_404(self.keywords.get(keyword_id))
+
+    def _update_keyword(self, query, payload, keyword_id):
+        if keyword_id not in self.keywords:
+            return 404, {}, b""
+        keyword = dict(payload)
+        keyword["keywordId"] = keyword_id
+        keyword["lastModified"] = _now()
+        self.keywords[keyword_id] = keyword
+        return 204, {}, b""
+
+    def _delete_keyword(self, query, payload, keyword_id):
+        self.keywords.pop(keyword_id, None)
+        return 204, {}, b""
+
+    def _prepare_msisdns(self, query, payload):
+        self.prepared_msisdns.update(payload or [])
+        return 204, {}, b""
+
+    def _create_out_message(self, query, payload):
+        status = self._store_out_messages([payload])
+        if status != 201:
+            return status, {}, b""
+        return _created("/api/out-messages/" + payload["transactionId"])
+
+    def _create_out_message_batch(self, query, payload):
+        if not isinstance(payload, list):
+            return 400, {}, b""
+        return self._store_out_messages(payload), {}, b""
+
+    def _store_out_messages(self, out_messages):
+        for out_message in out_messages:
+            if not isinstance(out_message, dict) or not out_message.get("recipient"):
+                return 400
+            out_message.setdefault("transactionId", _uuid(self._random))
+            if out_message["transactionId"].lower() in self.out_messages:
+                return 409
+
+        for out_message in out_messages:
+            out_message.setdefault("created", _now())
+            out_message.setdefault("statusCode", "Queued")
+            out_message["lastModified"] = _now()
+            self.out_messages[out_message["transactionId"].lower()] = out_message
+        return 201
+
+    def _get_out_message(self, query, payload, transaction_id):
+        return _json_or_404(self.out_messages.get(transaction_id))
+
+    def _update_out_message(self, query, payload, transaction_id):
+        if transaction_id not in self.out_messages:
+            return 404, {}, b""
+        out_message = dict(payload)
+        out_message["lastModified"] = _now()
+        self.out_messages[transaction_id] = out_message
+        return 204, {}, b""
+
+    def _delete_out_message(self, query, payload, transaction_id):
+        if self.out_messages.pop(transaction_id, None) is None:
+            return 404, {}, b""
+        return 204, {}, b""
+
+    def _get_in_message(self, query, payload, short_number_id, transaction_id):
+        return _json_or_404(self.in_messages.get((short_number_id, transaction_id)))
+
+    def _get_strex_merchants(self, query, payload):
+        return _json(list(self.strex_merchants.values()))
+
+    def _get_strex_merchant(self, query, payload, merchant_id):
+        return _json_or_404(self.strex_merchants.get(merchant_id))
+
+    def _save_strex_merchant(self, query, payload, merchant_id):
+        self.strex_merchants[merchant_id] = payload
+        return 204, {}, b""
+
+    def _delete_strex_merchant(self, query, payload, merchant_id):
+        self.strex_merchants.pop(merchant_id, None)
+        return 204, {}, b""
+
+    def _create_strex_transaction(self, query, payload):
+        transaction = dict(payload)
+        transaction.setdefault("created", _now())
+        transaction.setdefault("statusCode", "Ok")
+        transaction["lastModified"] = _now()
+        self.strex_transactions[transaction["transactionId"].lower()] = transaction
+        return _created("/api/strex/transactions/" + transaction["transactionId"])
+
+    def _get_strex_transaction(self, query, payload, transaction_id):
+        return _json_or_404(self.strex_transactions.get(transaction_id))
+
+    def _delete_strex_transaction(self, query, payload, transaction_id):
+        if transaction_id not in self.strex_transactions:
+            return 404, {}, b""
+        self.strex_transactions[transaction_id]["statusCode"] = "Reversed"
+        return 204, {}, b""
+
+    def _create_one_time_password(self, query, payload):
+        one_time_password = dict(payload)
+        one_time_password.setdefault("created", _now())
+        one_time_password.setdefault("delivered", True)
+        self.one_time_passwords[one_time_password["transactionId"].lower()] = one_time_password
+        return _created("/api/strex/one-time-passwords/" + one_time_password["transactionId"])
+
+    def _get_one_time_password(self, query, payload, transaction_id):
+        return _json_or_404(self.one_time_passwords.get(transaction_id))
+
+    def _get_server_public_key(self, query, payload, key_name):
+        if key_name != self.SERVER_KEY_NAME.lower():
+            return 404, {}, b""
+        return _json(self.server_public_key)
+
+    def _get_client_public_keys(self, query, payload):
+        return _json(list(self.client_public_keys.values()))
+
+    def _get_client_public_key(self, query, payload, key_name):
+        return _json_or_404(self.client_public_keys.get(key_name))
+
+    def _delete_client_public_key(self, query, payload, key_name):
+        self.client_public_keys.pop(key_name, None)
+        return 204, {}, b""
+
+    # noinspection PyMethodMayBeStatic
+    def _public_key(self, key_name, der):
+        return {
+            "accountId": 1,
+            "name": key_name,
+            "expiry": None,
+            "signAlgo": "ECDsaP256",
+            "hashAlgo": "SHA256",
+            "publicKeyString": _b64(der),
+            "notUsableBefore": None,
+            "created": _now(),
+            "lastModified": _now(),
+        }
+
+
+class StubServer:
+    """
+    Serves a StubApp on a local port, for load and integration tests without network access.
+
+        with StubServer(client_keys={key_name: private_key}, latency=0.01) as server:
+            client = ApiClient(server.base_uri, key_name, private_key)
+    """
+
+    def __init__(self, app=None, host="127.0.0.1", port=0, **app_options):
+        """
+        :param app: StubApp to serve, created from app_options when not given
+        :param port: port to listen on (0 picks a free port)
+        """
+        self.app = app if app is not None else StubApp(**app_options)
+        self._server = _ThreadingHTTPServer((host, port), _StubRequestHandler)
+        self._server.app = self.app
+        self._thread = None
+
+    @property
+    def base_uri(self):
+        host, port = self._server.server_address[:2]
+        return "http://%s:%d/" % (host, port)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,))
+        self._thread.daemon = True
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def do_PUT(self):
+        self._dispatch()
+
+    def do_DELETE(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        url = "http://" + self.headers.get("Host", "") + self.path
+
+        status, headers, content = self.server.app.handle(self.command, url, self.headers, body)
+
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if content and "Content-Type" not in headers:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+class _ClientKeyStore:
+    """
+    Looks up registered client keys for SignatureVerifier, which fetches its
+    keys through a `get_server_public_key` method
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def get_server_public_key(self, key_name):
+        public_key = self.app.client_public_keys.get(key_name.lower())
+        if public_key is None:
+            raise requests.HTTPError(response=HttpResponse(404))
+        return PublicKey(**public_key)
+
+
+def _json(data):
+    return 200, {"Content-Type": "application/json; charset=utf-8"}, json.dumps(data).encode("utf-8")
+
+
+def _json_or_404(data):
+    if data is None:
+        return 404, {}, b""
+    return _json(data)
+
+
+def _created(location):
+    return 201, {"Location": location}, b""
+
+
+def _now():
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+
+def _uuid(rng):
+    return "%08x-%04x-4%03x-%04x-%012x" % (rng.getrandbits(32), rng.getrandbits(16), rng.getrandbits(12),
+                                           0x8000 | rng.getrandbits(14), rng.getrandbits(48))
+
+
+def _b64(data):
+    return binascii.b2a_base64(data).decode("utf-8").strip()
@@ -0,0 +1,105 @@
+import sys
+import threading
+import pytest
+from ..api_client import ApiClient
+from ..testing import StubServer
+
+# test key, the stub server and the fakes accept it for KEY_NAME
+PRIVATE_KEY = "27683a52a4d08074a87da02255c9c4dd37a1b106229890c13e630d156ef89060"
+KEY_NAME = "PythonSdkTest"
+
+collect_ignore = []
+if sys.version_info < (3, 7):
+    # async def needs Python 3.5, the async tests run on asyncio.run from 3.7
+    collect_ignore.append("test_async_api_client.py")
+
+
+class FakeApiClient:
+    """
+    Stands in for ApiClient in unit tests. The argument of every call is
+    recorded in calls (method name -> list of arguments), and the call is
+    answered by the handler registered with on(), or with None.
+    """
+
+    def __init__(self):
+        self.calls = {}
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    def on(self, name, handler):
+        """
+        :param handler: called with the argument of every call of the method, its result is returned
+        """
+        self._handlers[name] = handler
+        return self
+
+    def fail(self, name, error):
+        """
+        Makes every call of the method raise error
+        """
+        def raise_error(argument):
+            raise error
+        return self.on(name, raise_error)
+
+    def called(self, name):
+        """
+        :return: the arguments the method was called with, in call order
+        """
+        with self._lock:
+            return list(self.calls.get(name, ()))
+
+    def lookup(self, msisdn):
+        return self._call("lookup", msisdn)
+
+    def prepare_msisdns(self, msisdns):
+        return self._call("prepare_msisdns", list(msisdns))
+
+    def create_out_message(self, out_message):
+        return self._call("create_out_message", out_message)
+
+    def create_out_message_batch(self, out_messages):
+        return self._call("create_out_message_batch", out_messages)
+
+    def get_out_message(self, transaction_id):
+        return self._call("get_out_message", transaction_id)
+
+    def update_out_message(self, out_message):
+        return self._call("update_out_message", out_message)
+
+    def delete_out_message(self, transaction_id):
+        return self._call("delete_out_message", transaction_id)
+
+    def get_server_public_key(self, key_name):
+        return self._call("get_server_public_key", key_name)
+
+    def _call(self, name, argument):
+        with self._lock:
+            self.calls.setdefault(name, []).append(argument)
+            handler = self._handlers.get(name)
+        return None if handler is None else handler(argument)
+
+
+@pytest.fixture
+def fake_api_client():
+    return FakeApiClient()
+
+
+@pytest.fixture
+def stub_server():
+    """
+    StubServer accepting KEY_NAME and PRIVATE_KEY. Tests needing errors or
+    throttling set error_rate, throttle_rate, max_requests_per_second or
+    latency on stub_server.app.
+    """
+    with StubServer(client_keys={KEY_NAME: PRIVATE_KEY}, seed=1) as server:
+        yield server
+
+
+@pytest.fixture
+def api_client(stub_server):
+    """
+    ApiClient talking to stub_server
+    """
+    client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY)
+    yield client
+    client.close()
@@ -1,15 +1,18 @@
 import pytest
 import os
 import uuid
+import requests
 from datetime import datetime
 from datetime import timedelta
 from ..api_client import ApiClient
+from ..helpers.http_response import HttpResponse
 from ..models.keyword import Keyword
 from ..models.out_message import OutMessage
 from ..models.out_message_strex import OutMessageStrex
 from ..models.strex_merchant import StrexMerchant
 from ..models.one_time_password import OneTimePassword
 from ..models.strex_transaction import StrexTransaction
+from .conftest import KEY_NAME, PRIVATE_KEY
 
 
 @pytest.fixture
@@ -179,6 +182,67 @@ def test_lookup_should_return_result(client):
     assert client.lookup("+4798079008") is not None
 
 
+def test_lookup_many_deduplicates_input():
+    looked_up = []
+
+    def lookup(msisdn):
+        looked_up.append(msisdn)
+        return None if msisdn.endswith("0") else msisdn
+
+    api_client = ApiClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY)
+    api_client.lookup = lookup
+
+    results = dict(api_client.lookup_many(["+4711", "+4710", "+4711", "+4712", "+4710"], max_workers=2))
+
+    assert sorted(looked_up) == ["+4710", "+4711", "+4712"]
+    assert results == {"+4710": None, "+4711": "+4711", "+4712": "+4712"}
+
+
+def test_lookup_many_survives_failed_lookups(stub_server, api_client):
+    stub_server.app.add_lookup({"msisdn": "+4700000001", "firstName": "Kari"})
+    # msisdn -> status codes the lookup fails with before it reaches the stub
+    failure_plan = {"+4700000001": [503, 503], "+4700000002": [429], "+4700000003": [503] * 5,
+                    "+4700000004": [400]}
+    lookup = api_client.lookup
+
+    def planned_lookup(msisdn):
+        statuses = failure_plan.get(msisdn)
+        if statuses:
+            raise requests.HTTPError(response=HttpResponse(statuses.pop(0)))
+        return lookup(msisdn)
+
+    api_client.lookup = planned_lookup
+    errors = []
+    msisdns = ["+47%08d" % i for i in range(20)]
+
+    results = dict(api_client.lookup_many(msisdns, max_retries=3, retry_delay=0,
+                                          on_error=lambda *args: errors.append(args)))
+
+    assert len(results) == 20
+    assert results["+4700000001"].firstName == "Kari"
+    assert results["+4700000002"] is None
+    assert results["+4700000003"].response.status_code == 503
+    assert results["+4700000004"].response.status_code == 400
+    assert sorted((msisdn, error.response.status_code) for msisdn, error in errors) == \
+        [("+4700000003", 503), ("+4700000004", 400)]
+    # one attempt plus three retries for the number that kept failing
+    assert failure_plan["+4700000003"] == [503]
+
+
+def test_lookup_many_forgets_numbers_beyond_dedup_window():
+    looked_up = []
+
+    def lookup(msisdn):
+        looked_up.append(msisdn)
+
+    api_client = ApiClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY)
+    api_client.lookup = lookup
+
+    list(api_client.lookup_many(["+4711", "+4712", "+4711", "+4713", "+4711"], max_workers=1, dedup_window=2))
+
+    assert looked_up == ["+4711", "+4712", "+4713", "+4711"]
+
+
 def test_strex_merchant_sequence(client, valid_short_number_id):
     merchant_id = "12341"
 
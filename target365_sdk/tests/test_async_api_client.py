@@ -0,0 +1,130 @@
+import asyncio
+import pytest
+import requests
+from ..async_api_client import AsyncApiClient
+from ..helpers.cache import LookupCache
+from ..models.keyword import Keyword
+from ..models.out_message import OutMessage
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+def _run(coroutine_function, stub_server, key_name=KEY_NAME, **client_options):
+    async def main():
+        async with AsyncApiClient(stub_server.base_uri, key_name, PRIVATE_KEY, **client_options) as api_client:
+            return await coroutine_function(api_client)
+    return asyncio.run(main())
+
+
+def test_ping_and_lookup(stub_server):
+    stub_server.app.add_lookup({"msisdn": "+4798079008", "firstName": "Test", "lastName": "Testesen"})
+
+    async def calls(api_client):
+        return (await api_client.ping(), await api_client.lookup("+4798079008"),
+                await api_client.lookup("+4700000000"))
+
+    pong, found, missing = _run(calls, stub_server)
+
+    assert pong == "pong"
+    assert found.lastName == "Testesen"
+    assert missing is None
+
+
+def test_lookup_cache_skips_repeated_lookups(stub_server):
+    stub_server.app.add_lookup({"msisdn": "+4798079008", "firstName": "Test"})
+
+    async def calls(api_client):
+        return [await api_client.lookup(msisdn) for msisdn in ("+4798079008", "+4700000000") * 2]
+
+    found, missing, found_again, missing_again = _run(calls, stub_server, lookup_cache=LookupCache())
+
+    assert found.firstName == found_again.firstName == "Test"
+    assert missing is None and missing_again is None
+    assert stub_server.app.status_counts == {200: 1, 404: 1}
+
+
+def test_client_has_no_requests_transport(stub_server):
+    assert AsyncApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY).client.transport is None
+
+
+def test_keyword_round_trip(stub_server):
+    async def calls(api_client):
+        keyword_id = await api_client.create_keyword(Keyword(shortNumberId="NO-0000", keywordText="HELLO",
+                                                             mode="Text", enabled=True, tags=["Foo"]))
+        keyword = await api_client.get_keyword(keyword_id)
+        keyword.keywordText = "BYE"
+        await api_client.update_keyword(keyword)
+        keywords = await api_client.get_all_keywords(short_number_id="NO-0000")
+        await api_client.delete_keyword(keyword_id)
+        return keywords, await api_client.get_keyword(keyword_id)
+
+    keywords, deleted = _run(calls, stub_server)
+
+    assert [(keyword.keywordText, keyword.tags) for keyword in keywords] == [("BYE", ["Foo"])]
+    assert deleted is None
+
+
+def test_out_messages_and_concurrent_requests(stub_server):
+    async def calls(api_client):
+        transaction_id = await api_client.create_out_message(
+            OutMessage(sender="Target365", recipient="+4798079008", content="Hello"))
+        await asyncio.gather(*[
+            api_client.create_out_message(OutMessage(transactionId="batch-%d" % i, sender="Target365",
+                                                     recipient="+4798079008", content=str(i)))
+            for i in range(20)])
+        return await api_client.get_out_message(transaction_id), await api_client.get_out_message("unknown")
+
+    stored, missing = _run(calls, stub_server)
+
+    assert stored.content == "Hello"
+    assert missing is None
+    assert len(stub_server.app.out_messages) == 21
+
+
+def test_client_public_keys(stub_server):
+    async def calls(api_client):
+        return await api_client.get_client_public_keys(), await api_client.get_client_public_key(KEY_NAME)
+
+    keys, key = _run(calls, stub_server)
+
+    assert [public_key.name for public_key in keys] == [KEY_NAME]
+    assert key.name == KEY_NAME
+
+
+def test_errors_propagate_as_http_errors(stub_server):
+    async def duplicate(api_client):
+        out_message = OutMessage(transactionId="dup", sender="Target365", recipient="+4798079008", content="Hi")
+        await api_client.create_out_message(out_message)
+        await api_client.create_out_message(out_message)
+
+    with pytest.raises(requests.HTTPError) as error:
+        _run(duplicate, stub_server)
+    assert error.value.response.status_code == 409
+
+    with pytest.raises(requests.HTTPError) as error:
+        _run(lambda api_client: api_client.ping(), stub_server, key_name="UnknownKey")
+    assert error.value.response.status_code == 401
+
+    with pytest.raises(ValueError):
+        _run(lambda api_client: api_client.lookup(None), stub_server)
+
+    stub_server.app.error_rate = 1.0
+    with pytest.raises(requests.HTTPError) as error:
+        _run(lambda api_client: api_client.ping(), stub_server)
+    assert error.value.response.status_code == 500
+
+
+def test_close_releases_the_session(stub_server):
+    async def main():
+        api_client = AsyncApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY)
+        await api_client.ping()
+        session = api_client.client._session
+
+        await api_client.close()
+        closed = session.closed, api_client.client._session
+        # the client opens a new session when used again
+        pong = await api_client.ping()
+        await api_client.close()
+        await api_client.close()
+        return closed, pong
+
+    assert asyncio.run(main()) == ((True, None), "pong")
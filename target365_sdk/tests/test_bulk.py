@@ -0,0 +1,99 @@
+import time
+import pytest
+import requests
+from ..bulk import BulkMutator, BulkSender
+from ..helpers.http_response import HttpResponse
+from ..models.out_message import OutMessage
+
+
+def _messages(count):
+    for i in range(count):
+        message = OutMessage()
+        message.sender = "0000"
+        message.recipient = "+4798079008"
+        message.content = str(i)
+        yield message
+
+
+def test_bulk_send_splits_into_batches(fake_api_client):
+    result = BulkSender(fake_api_client, batch_size=10, max_workers=3).send(_messages(95))
+
+    batches = fake_api_client.called("create_out_message_batch")
+    assert result.success
+    assert result.sent_count == 95
+    assert sorted(len(batch) for batch in batches) == [5] + [10] * 9
+    assert all(message.transactionId for batch in batches for message in batch)
+
+
+def test_bulk_send_reports_failed_batches(fake_api_client):
+    def create_out_message_batch(out_messages):
+        if out_messages[0].content == "20":
+            raise requests.HTTPError("429 Client Error")
+
+    fake_api_client.on("create_out_message_batch", create_out_message_batch)
+
+    result = BulkSender(fake_api_client, batch_size=10, max_workers=2).send(_messages(30))
+
+    assert not result.success
+    assert result.sent_count == 20
+    assert result.failed_count == 10
+    assert [batch.index for batch in result.failed_batches] == [2]
+    assert set(result.errors) == set(result.failed_batches[0].transaction_ids)
+
+
+def test_bulk_delete_against_stub_reports_per_id(stub_server, api_client):
+    messages = list(_messages(50))
+    BulkSender(api_client, batch_size=20).send(messages)
+    transaction_ids = [message.transactionId for message in messages]
+
+    result = api_client.delete_out_messages(transaction_ids + ["unknown"], max_workers=4)
+
+    assert result.succeeded_count == 50
+    assert result.failed_count == 1
+    assert result.errors["unknown"].response.status_code == 404
+    assert stub_server.app.out_messages == {}
+
+
+def test_bulk_update_retries_transient_failures(fake_api_client):
+    def update_out_message(out_message):
+        if out_message.content == "1":
+            raise requests.HTTPError(response=HttpResponse(400))
+        if fake_api_client.called("update_out_message").count(out_message) < 3:
+            raise requests.HTTPError(response=HttpResponse(503))
+
+    fake_api_client.on("update_out_message", update_out_message)
+
+    messages = list(_messages(3))
+    for message in messages:
+        message.transactionId = message.content
+
+    results = dict((result.transaction_id, result) for result in
+                   BulkMutator(fake_api_client, max_workers=2, retry_delay=0).iter_update(messages))
+
+    assert [results[i].attempts for i in ("0", "1", "2")] == [3, 1, 3]
+    assert results["0"].success and results["2"].success
+    assert results["1"].status_code == 400
+
+
+def test_bulk_update_rejects_messages_without_transaction_id(fake_api_client):
+    messages = list(_messages(2))
+    messages[0].transactionId = "0"
+
+    with pytest.raises(ValueError):
+        BulkMutator(fake_api_client, max_workers=1).update(messages)
+
+
+def test_bulk_delete_waits_as_long_as_retry_after_says(fake_api_client, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", sleeps.append)
+
+    def delete_out_message(transaction_id):
+        if len(fake_api_client.called("delete_out_message")) == 1:
+            raise requests.HTTPError(response=HttpResponse(429, {"Retry-After": "7"}))
+
+    fake_api_client.on("delete_out_message", delete_out_message)
+
+    result = BulkMutator(fake_api_client, max_workers=1, retry_delay=0.5).delete(["1"])
+
+    assert result.success and result.retries == 1
+    assert sleeps == [7]
@@ -0,0 +1,117 @@
+from collections import OrderedDict
+from ..api_client import ApiClient
+from ..helpers import cache as cache_module
+from ..helpers.cache import LRUCache, LookupCache, MISSING
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+def test_lru_cache_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is MISSING
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_cache_expires_entries():
+    cache = LRUCache(10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=-1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is MISSING
+    assert cache.stats()["expirations"] == 1
+
+
+def test_lru_cache_add_only_sets_missing_or_expired_keys():
+    cache = LRUCache(10, ttl=60)
+    cache.set("expired", 1, ttl=-1)
+
+    assert cache.add("a", 1)
+    assert not cache.add("a", 2)
+    assert cache.add("expired", 2)
+    assert cache.get("a") == 1
+    assert cache.get("expired") == 2
+
+
+def test_lru_cache_add_without_evicting_unexpired_entries():
+    cache = LRUCache(2, ttl=60)
+    cache.set("expired", 1, ttl=-1)
+    cache.add("a", 1)
+
+    assert cache.add("b", 2, evict_unexpired=False)
+    assert not cache.add("c", 3, evict_unexpired=False)
+    assert cache.get("c") is MISSING
+    assert cache.add("c", 3)
+    assert cache.get("c") == 3
+
+
+def test_lru_cache_without_move_to_end(monkeypatch):
+    class Python2OrderedDict(OrderedDict):
+        @property
+        def move_to_end(self):
+            raise AttributeError("move_to_end")
+
+    monkeypatch.setattr(cache_module, "OrderedDict", Python2OrderedDict)
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert list(cache._entries) == ["a", "c"]
+    assert len(cache) == 2
+
+
+def test_lookup_cache_keeps_negative_results():
+    cache = LookupCache(negative_ttl=60)
+    cache.put("+4700000000", None)
+
+    assert cache.get("+4700000000") == (True, None)
+    assert cache.get("+4711111111") == (False, None)
+
+
+def test_lookup_cache_survives_restart(tmp_path):
+    path = str(tmp_path / "lookups.db")
+    cache = LookupCache(path=path)
+    cache.put("+4798079008", {"msisdn": "+4798079008", "firstName": "Test"})
+    cache.close()
+
+    cache = LookupCache(path=path)
+
+    assert cache.get("+4798079008") == (True, {"msisdn": "+4798079008", "firstName": "Test"})
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_lookup_cache_counts_memory_hits_disk_hits_and_misses(tmp_path):
+    path = str(tmp_path / "lookups.db")
+    cache = LookupCache(path=path)
+    cache.put("+4798079008", {"msisdn": "+4798079008"})
+    cache.put("+4700000000", None)
+    cache.close()
+
+    cache = LookupCache(path=path)
+    cache.get("+4798079008")
+    cache.get("+4798079008")
+    cache.get("+4700000000")
+    cache.get("+4711111111")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (3, 1, 2, 1)
+
+
+def test_api_client_answers_repeated_lookups_from_the_cache(stub_server):
+    stub_server.app.add_lookup({"msisdn": "+4798079008", "firstName": "Test"})
+    lookup_cache = LookupCache()
+    client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY, lookup_cache=lookup_cache)
+
+    results = [client.lookup(msisdn) for msisdn in ("+4798079008", "+4700000000") * 2]
+
+    assert [result and result.firstName for result in results] == ["Test", None, "Test", None]
+    assert stub_server.app.status_counts == {200: 1, 404: 1}
+    assert lookup_cache.stats()["misses"] == 2
+    client.close()
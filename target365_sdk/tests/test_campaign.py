@@ -0,0 +1,115 @@
+import io
+import json
+import pytest
+import requests
+from .. import campaign as campaign_module
+from ..campaign import Campaign, Checkpoint, read_csv, read_jsonl, transaction_id
+from ..helpers.http_response import HttpResponse
+from ..models.out_message import OutMessage
+
+
+def _rows(count):
+    for i in range(count):
+        yield {"recipient": "+47%08d" % i, "name": "Kari"}
+
+
+def test_read_csv_and_jsonl():
+    csv_file = io.StringIO(u"recipient;content\r\n+4798079008;Hello\r\n+4798079009;\"Two\nlines\"\r\n")
+    jsonl_file = io.BytesIO(b'{"recipient": "+4798079008"}\n\n{"recipient": "+4798079009"}\n')
+
+    assert list(read_csv(csv_file, delimiter=";")) == [
+        {"recipient": "+4798079008", "content": "Hello"},
+        {"recipient": "+4798079009", "content": "Two\nlines"},
+    ]
+    assert list(read_jsonl(jsonl_file)) == [{"recipient": "+4798079008"}, {"recipient": "+4798079009"}]
+
+
+def test_campaign_sends_rows_and_skips_invalid(tmp_path, stub_server, api_client):
+    rows = list(_rows(95)) + [{"recipient": ""}]
+    campaign = Campaign(api_client, "spring", str(tmp_path / "spring.checkpoint"), batch_size=10,
+                        max_workers=3, sender="Target365", content="Hello")
+
+    result = campaign.run(rows)
+
+    assert result.success
+    assert (result.watermark, result.sent_count, result.invalid_count) == (96, 95, 1)
+    assert len(stub_server.app.out_messages) == 95
+    stored = stub_server.app.out_messages[transaction_id("spring", 7)]
+    assert (stored["recipient"], stored["content"], "name" in stored) == ("+4700000007", "Hello", False)
+    assert json.loads((tmp_path / "spring.checkpoint").read_text())["watermark"] == 96
+
+
+def test_campaign_resumes_after_failure_without_resending(tmp_path, stub_server, api_client):
+    send_batch = api_client.create_out_message_batch
+    failed = []
+
+    def flaky_batch(out_messages):
+        if out_messages[0].recipient == "+4700000040" and not failed:
+            failed.append(True)
+            raise requests.HTTPError(response=HttpResponse(400))
+        send_batch(out_messages)
+
+    api_client.create_out_message_batch = flaky_batch
+    path = str(tmp_path / "spring.checkpoint")
+    campaign = Campaign(api_client, "spring", path, batch_size=10, max_workers=4,
+                        sender="Target365", content="Hello")
+
+    first = campaign.run(_rows(100))
+    assert first.status_code == 400
+    assert first.watermark == 40
+    assert Checkpoint(path).load()["watermark"] == 40
+
+    second = campaign.run(_rows(100))
+    assert second.success
+    assert second.resumed_from == 40
+    assert second.watermark == 100
+    assert second.sent_count + second.duplicate_count == 100
+    assert len(stub_server.app.out_messages) == 100
+
+
+def test_campaign_retries_transient_failures(tmp_path, fake_api_client):
+    def create_out_message_batch(out_messages):
+        if len(fake_api_client.called("create_out_message_batch")) == 1:
+            raise requests.HTTPError(response=HttpResponse(503))
+
+    api_client = fake_api_client.on("create_out_message_batch", create_out_message_batch)
+    campaign = Campaign(api_client, "spring", str(tmp_path / "c"), max_workers=1, retry_delay=0, content="Hi")
+
+    assert campaign.run(_rows(5)).sent_count == 5
+    batches = api_client.called("create_out_message_batch")
+    assert len(batches) == 2
+    assert [message.transactionId for message in batches[-1]] == [transaction_id("spring", i) for i in range(5)]
+
+
+def test_campaign_reports_rows_build_message_fails_for(tmp_path, fake_api_client):
+    def build_message(row):
+        if row["recipient"].endswith("3"):
+            raise ValueError("bad row")
+        return OutMessage(sender="Target365", recipient=row["recipient"], content="Hi")
+
+    campaign = Campaign(fake_api_client, "spring", str(tmp_path / "c"), build_message=build_message, batch_size=4)
+    result = campaign.run(_rows(10))
+
+    assert result.success
+    assert (result.watermark, result.sent_count, result.invalid_count) == (10, 9, 1)
+    assert list(result.row_errors) == [3]
+    assert str(result.row_errors[3]) == "bad row"
+
+
+def test_checkpoint_save_replaces_the_previous_one_without_os_replace(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign_module, "_replace", None)
+    checkpoint = Checkpoint(str(tmp_path / "c"))
+
+    checkpoint.save({"watermark": 1})
+    checkpoint.save({"watermark": 2})
+
+    assert checkpoint.load() == {"watermark": 2}
+    assert [path.name for path in tmp_path.iterdir()] == ["c"]
+
+
+def test_checkpoint_of_other_campaign_is_rejected(tmp_path):
+    path = str(tmp_path / "c")
+    Checkpoint(path).save({"campaignId": "autumn", "watermark": 3})
+
+    with pytest.raises(ValueError):
+        Campaign(None, "spring", path).run(_rows(5))
@@ -0,0 +1,125 @@
+from collections import Counter
+import pytest
+from ..delivery_tracker import DeliveryTracker
+from ..models.out_message import OutMessage
+
+
+def _answer_with(fake_api_client, statuses):
+    """
+    Answers the polls of every message with the next status of its sequence, the last one repeating
+    """
+    def get_out_message(transaction_id):
+        calls = fake_api_client.called("get_out_message").count(transaction_id)
+        sequence = statuses[transaction_id]
+        status = sequence[min(calls, len(sequence)) - 1]
+        if status is None:
+            return None
+        if isinstance(status, Exception):
+            raise status
+        return OutMessage(transactionId=transaction_id, statusCode=status, delivered=status == "Ok")
+
+    fake_api_client.on("get_out_message", get_out_message)
+    return fake_api_client
+
+
+def _polls(fake_api_client):
+    return dict(Counter(fake_api_client.called("get_out_message")))
+
+
+def test_messages_are_polled_until_final_status(fake_api_client):
+    api_client = _answer_with(fake_api_client, {
+        "a": ["Queued", "Queued", "Sent", "Ok"],
+        "b": [None, RuntimeError("timeout"), "Failed"],
+        "c": ["Ok"],
+    })
+    events = []
+    tracker = DeliveryTracker(api_client, on_change=lambda message, previous: events.append(
+        (message.transactionId, previous, message.statusCode)), initial_delay=0.001, max_delay=0.005)
+    tracker.track(["a", "b", "c"])
+
+    assert tracker.run(timeout=5)
+    assert [event[1:] for event in events if event[0] == "a"] == [(None, "Queued"), ("Queued", "Sent"), ("Sent", "Ok")]
+    assert [event[1:] for event in events if event[0] != "a"] in ([(None, "Failed"), (None, "Ok")],
+                                                                  [(None, "Ok"), (None, "Failed")])
+    assert _polls(api_client) == {"a": 4, "b": 3, "c": 1}
+    assert tracker.stats()["completed"] == 3
+    assert tracker.stats()["errors"] == 1
+    assert len(tracker) == 0
+
+
+def test_messages_expire_after_max_polls(fake_api_client):
+    api_client = _answer_with(fake_api_client, {"a": ["Queued"]})
+    tracker = DeliveryTracker(api_client, initial_delay=0.001, max_delay=0.001, max_polls=3)
+    tracker.track(["a"])
+
+    assert tracker.run(timeout=5)
+    assert _polls(api_client) == {"a": 3}
+    assert tracker.stats()["expired"] == 1
+
+
+def test_backoff_limits_polls_of_unchanged_messages(fake_api_client):
+    api_client = _answer_with(fake_api_client, {"a": ["Queued"]})
+    tracker = DeliveryTracker(api_client, initial_delay=0.01, backoff=2, max_delay=10, jitter=0)
+    tracker.track(["a"], delay=0)
+
+    assert not tracker.run(timeout=0.2)
+    # polls at 0, 0.01, 0.03, 0.07 and 0.15 seconds
+    assert 3 <= _polls(api_client)["a"] <= 5
+
+
+class _FakeClock:
+    """
+    Time which only passes when the tracker sleeps
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_max_rate_spaces_polls(fake_api_client):
+    api_client = _answer_with(fake_api_client, dict((str(i), ["Ok"]) for i in range(10)))
+    clock = _FakeClock()
+    tracker = DeliveryTracker(api_client, max_rate=100, clock=clock.time, sleep=clock.sleep)
+    tracker.track([str(i) for i in range(10)], delay=0)
+
+    # polls at 0, 0.01, 0.02, 0.03 and 0.04 seconds
+    assert not tracker.run(timeout=0.045)
+    assert sum(_polls(api_client).values()) == 5
+    assert clock.sleeps == pytest.approx([0.01] * 5)
+    assert len(tracker) == 5
+
+
+def test_failing_on_change_does_not_stop_the_run(fake_api_client):
+    api_client = _answer_with(fake_api_client, {"a": ["Ok"], "b": ["Ok"], "c": ["Ok"]})
+    seen = []
+
+    def on_change(out_message, previous_status):
+        seen.append(out_message.transactionId)
+        if out_message.transactionId == "b":
+            raise RuntimeError("callback failed")
+
+    tracker = DeliveryTracker(api_client, on_change=on_change, max_workers=1)
+    tracker.track(["a", "b", "c"], delay=0)
+
+    assert tracker.run(timeout=5)
+    assert sorted(seen) == ["a", "b", "c"]
+    assert tracker.stats()["completed"] == 3
+    assert tracker.stats()["callback_errors"] == 1
+
+
+def test_more_than_127_distinct_states(fake_api_client):
+    statuses = dict((str(i), ["Status%d" % i, "Ok"]) for i in range(200))
+    api_client = _answer_with(fake_api_client, statuses)
+    tracker = DeliveryTracker(api_client, initial_delay=0.001, max_delay=0.001)
+    tracker.track(sorted(statuses), delay=0)
+
+    assert tracker.run(timeout=5)
+    assert tracker.stats()["changes"] == 400
@@ -0,0 +1,66 @@
+import base64
+import hashlib
+import json
+import jsonpickle
+import pytest
+from ..helpers.http_client import HttpClient
+from ..helpers.json_encoder import encode
+from ..models.out_message import OutMessage
+from ..helpers.signing import create_signer
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+@pytest.fixture
+def http_client():
+    return HttpClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY)
+
+
+def test_session_is_shared(http_client):
+    session = http_client.transport._get_session()
+
+    assert http_client.transport._get_session() is session
+    assert session.get_adapter("https://test.target365.io/")._pool_maxsize == HttpClient.DEFAULT_POOL_MAXSIZE
+
+
+def test_idle_session_is_recreated(http_client):
+    http_client.transport.pool_idle_timeout = 30
+    session = http_client.transport._get_session()
+
+    http_client.transport._last_used -= 60
+
+    assert http_client.transport._get_session() is not session
+
+
+def test_close_drops_session(http_client):
+    session = http_client.transport._get_session()
+    http_client.close()
+
+    assert http_client.transport._get_session() is not session
+
+
+@pytest.mark.parametrize("backend", ["ecdsa", "cryptography"])
+def test_signature_verifies_with_every_backend(http_client, backend):
+    pytest.importorskip(backend)
+    http_client.signer = create_signer(http_client.privateKey, backend)
+
+    key_name, timestamp, nonce, signature = http_client._get_signature(
+        "post", "https://test.target365.io/api/out-messages", "{}").split(":")
+
+    content_hash = base64.b64encode(hashlib.sha256(b"{}").digest()).decode("utf-8")
+    message = "post" + "https://test.target365.io/api/out-messages" + timestamp + nonce + content_hash
+    verifying_key = http_client.publicKey.get_verifying_key()
+
+    assert key_name == KEY_NAME
+    assert verifying_key.verify(base64.b64decode(signature), message.encode("utf-8"), hashfunc=hashlib.sha256)
+
+
+def test_encode_matches_jsonpickle_output():
+    out_message = OutMessage(sender="0000", recipient="+4798079008", content="Hei på deg", allowUnicode=None,
+                             strex={"merchantId": "mer_test", "price": 89.95})
+
+    encoded = encode([out_message, out_message])
+
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded.decode("utf-8")) == json.loads(jsonpickle.encode([out_message] * 2, unpicklable=False))
+    assert encode(encoded) is encoded
+    assert json.loads(encode(["+4798079008"]).decode("utf-8")) == ["+4798079008"]
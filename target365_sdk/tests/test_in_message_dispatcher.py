@@ -0,0 +1,95 @@
+import json
+import threading
+import time
+from ..in_message_dispatcher import InMessageDispatcher
+from ..models.in_message import InMessage
+from ..models.out_message import OutMessage
+
+
+def payload(transaction_id, sender="+4798079008", content="HELLO", **extra):
+    data = {"transactionId": transaction_id, "sender": sender, "recipient": "2002", "content": content}
+    data.update(extra)
+    return json.dumps(data).encode("utf-8")
+
+
+def test_duplicates_are_dropped():
+    handled = []
+    with InMessageDispatcher(handled.append, workers=2) as dispatcher:
+        assert dispatcher.dispatch(payload("1"))
+        assert not dispatcher.dispatch(payload("1"))
+        assert dispatcher.dispatch(json.loads(payload("2").decode("utf-8")))
+        dispatcher.join()
+
+    assert sorted(message.transactionId for message in handled) == ["1", "2"]
+    assert all(isinstance(message, InMessage) for message in handled)
+    assert dispatcher.stats()["duplicates"] == 1
+
+
+def test_unknown_fields_are_accepted():
+    handled = []
+    with InMessageDispatcher(handled.append) as dispatcher:
+        dispatcher.dispatch(payload("1", newField="value"))
+    assert handled[0].newField == "value"
+
+
+def test_messages_from_one_sender_keep_their_order():
+    handled = {}
+    lock = threading.Lock()
+
+    def handler(message):
+        time.sleep(0.001)
+        with lock:
+            handled.setdefault(message.sender, []).append(int(message.content))
+
+    with InMessageDispatcher(handler, workers=4) as dispatcher:
+        for i in range(50):
+            for sender in ("+4711111111", "+4722222222", "+4733333333"):
+                dispatcher.dispatch(payload(sender + str(i), sender=sender, content=str(i)))
+
+    assert handled == dict((sender, list(range(50))) for sender in ("+4711111111", "+4722222222", "+4733333333"))
+
+
+def test_failed_messages_are_reported_and_forgotten():
+    errors = []
+
+    def handler(message):
+        raise RuntimeError("boom")
+
+    with InMessageDispatcher(handler, on_error=lambda message, error: errors.append(error)) as dispatcher:
+        dispatcher.dispatch(payload("1"))
+        dispatcher.join()
+        assert dispatcher.dispatch(payload("1"))
+        dispatcher.join()
+
+    assert len(errors) == 2
+    assert dispatcher.stats()["errors"] == 2
+
+
+def test_failing_on_error_does_not_stop_the_worker():
+    handled = []
+
+    def handler(message):
+        if message.content == "fail":
+            raise RuntimeError("boom")
+        handled.append(message.transactionId)
+
+    def on_error(message, error):
+        raise RuntimeError("on_error broke too")
+
+    with InMessageDispatcher(handler, workers=1, on_error=on_error) as dispatcher:
+        dispatcher.dispatch(payload("1", content="fail"))
+        dispatcher.dispatch(payload("2"))
+        dispatcher.join()
+
+    assert handled == ["2"]
+    assert dispatcher.stats()["errors"] == 1
+
+
+def test_delivery_reports():
+    handled = []
+    with InMessageDispatcher(handled.append, model_class=OutMessage,
+                             ordering_key=lambda message: message.recipient) as dispatcher:
+        dispatcher.dispatch(payload("1", statusCode="Delivered"))
+
+    assert isinstance(handled[0], OutMessage)
+    assert handled[0].statusCode == "Delivered"
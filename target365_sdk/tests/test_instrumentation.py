@@ -0,0 +1,136 @@
+import threading
+import pytest
+import requests.sessions
+from .. import models
+from ..api_client import ApiClient
+from ..helpers import http_client, instrumentation
+from ..helpers.instrumentation import MetricsAggregator, RequestMetrics, endpoint_label
+from ..models.out_message import OutMessage
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+class _TickingClock:
+    """
+    Fake timer which moves on a millisecond with every reading, and by whole
+    steps with advance(), so the measured times don't depend on the machine
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.now += 0.001
+            return self.now
+
+    def advance(self, seconds):
+        with self._lock:
+            self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _TickingClock()
+    monkeypatch.setattr(http_client, "timer", clock)
+    monkeypatch.setattr(instrumentation, "timer", clock)
+    # requests times response.elapsed with its own clock
+    monkeypatch.setattr(requests.sessions, "preferred_clock", clock)
+    return clock
+
+
+def test_endpoint_label_replaces_ids():
+    assert endpoint_label("api/keywords") == "api/keywords"
+    assert endpoint_label("api/keywords/123") == "api/keywords/{id}"
+    assert endpoint_label("api/out-messages/batch") == "api/out-messages/batch"
+    assert endpoint_label("api/in-messages/no-0000/00568c6b") == "api/in-messages/{id}/{id}"
+    assert endpoint_label("api/unknown/thing/42") == "api/unknown/{id}/{id}"
+
+
+def test_observer_gets_breakdown_per_request(stub_server, clock):
+    reported = []
+    client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY, observer=reported.append)
+    client.ping()
+    client.ping()
+    client.create_out_message(OutMessage(sender="Target365", recipient="+4798079008", content="Hello"))
+    client.get_out_message("79f35793-6d70-423c-a7f7-ae9fb1024f3b")
+
+    first, second, post, missing = reported
+    assert (first.method, first.endpoint, first.status_code, first.response_bytes) == ("get", "api/ping", 200, 4)
+    assert first.connect_time > 0
+    assert second.connect_time == 0
+    assert first.sign_time > 0 and first.server_time > 0
+    assert first.total_time >= first.sign_time + first.connect_time + first.server_time
+
+    assert post.encode_time > 0
+    assert post.request_bytes > 0
+    assert post.status_code == 201
+    assert missing.endpoint == "api/out-messages/{id}"
+    assert missing.status_code == 404
+
+
+def test_observer_object_with_on_request(stub_server):
+    class Observer:
+        def __init__(self):
+            self.metrics = []
+
+        def on_request(self, metrics):
+            self.metrics.append(metrics)
+
+    observer = Observer()
+    ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY, observer=observer).ping()
+
+    assert len(observer.metrics) == 1
+
+
+def test_aggregator_exports_prometheus_text():
+    aggregator = MetricsAggregator(buckets=(0.1, 1.0))
+    for total_time, status in ((0.05, 200), (0.5, 200), (2.0, 500)):
+        metrics = RequestMetrics("get", "api/keywords/12")
+        metrics.total_time = total_time
+        metrics.sign_time = 0.001
+        metrics.status_code = status
+        metrics.response_bytes = 10
+        aggregator(metrics)
+
+    lines = aggregator.export().splitlines()
+    assert "# TYPE target365_request_duration_seconds histogram" in lines
+    assert 'target365_request_duration_seconds_bucket{method="get",endpoint="api/keywords/{id}",le="0.1"} 1' in lines
+    assert 'target365_request_duration_seconds_bucket{method="get",endpoint="api/keywords/{id}",le="1"} 2' in lines
+    assert 'target365_request_duration_seconds_bucket{method="get",endpoint="api/keywords/{id}",le="+Inf"} 3' in lines
+    assert 'target365_request_duration_seconds_count{method="get",endpoint="api/keywords/{id}"} 3' in lines
+    assert 'target365_requests_total{method="get",endpoint="api/keywords/{id}",status="500"} 1' in lines
+    assert 'target365_response_bytes_total{method="get",endpoint="api/keywords/{id}"} 30' in lines
+
+
+def test_decode_time_covers_model_decoding(monkeypatch, stub_server, clock):
+    reported = []
+    stub_server.app.add_lookup({"msisdn": "+4798079008", "firstName": "Test"})
+    client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY, observer=reported.append)
+    client.ping()
+
+    init = models.LookupResult.__init__
+
+    def slow_init(self, **kwargs):
+        clock.advance(0.05)
+        init(self, **kwargs)
+
+    monkeypatch.setattr(models.LookupResult, "__init__", slow_init)
+    assert client.lookup("+4798079008").firstName == "Test"
+    assert client.lookup("+4700000000") is None
+
+    ping, found, missing = reported
+    assert ping.decode_time < 0.05
+    assert found.decode_time >= 0.05
+    assert found.total_time >= found.decode_time + found.server_time
+    assert missing.decode_time < 0.05 and missing.status_code == 404
+
+
+def test_no_decoding_block_without_observer(monkeypatch, stub_server):
+    client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY)
+
+    def decoding():
+        raise AssertionError("decoding() entered without an observer")
+
+    monkeypatch.setattr(client.client, "decoding", decoding)
+    assert client.ping() == "pong"
@@ -0,0 +1,68 @@
+import json
+import random
+import pytest
+from ..api_client import ApiClient
+from ..helpers.json_stream import iter_json_array
+from ..models.keyword import Keyword
+from .conftest import KEY_NAME
+
+
+DOCUMENT = json.dumps([
+    1500.0, 12345678901234567890, 0.1, -2e-3, 2E+10, 0, -7, True, False, None,
+    "text with , ] and \\\" in it", u"Hei p\u00e5 deg \u2713", [], {}, [1, [2.5, {"a": [None, 1e5]}]],
+    {"keywordId": "1", "price": 89.95, "enabled": True, "tags": ["a", "b"]},
+], ensure_ascii=False).encode("utf-8")
+
+
+def _split(data, sizes):
+    position = 0
+    for size in sizes:
+        if position >= len(data):
+            return
+        yield data[position:position + size]
+        position += size
+    if position < len(data):
+        yield data[position:]
+
+
+def test_one_byte_chunks():
+    assert list(iter_json_array(_split(DOCUMENT, [1] * len(DOCUMENT)))) == json.loads(DOCUMENT)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_random_chunks(seed):
+    rng = random.Random(seed)
+    sizes = [rng.randint(1, 12) for _ in range(len(DOCUMENT))]
+    assert list(iter_json_array(_split(DOCUMENT, sizes))) == json.loads(DOCUMENT)
+
+
+def test_numbers_split_across_chunks():
+    assert list(iter_json_array([b'[1.', b'5, 2e', b'3]'])) == [1.5, 2000.0]
+    assert list(iter_json_array([b'[tr', b'ue, nu', b'll, 12', b'3]'])) == [True, None, 123]
+    assert list(iter_json_array([b' [ 1 ', b'] '])) == [1]
+    assert list(iter_json_array([b'[]'])) == []
+
+
+def test_invalid_input_raises():
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'[1, 2']))
+    with pytest.raises(ValueError):
+        list(iter_json_array([b'{"a": 1}']))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 8192])
+def test_iter_methods_parse_streamed_responses(monkeypatch, chunk_size, stub_server, api_client):
+    monkeypatch.setattr(ApiClient, "STREAM_CHUNK_SIZE", chunk_size)
+    for i in range(20):
+        api_client.create_keyword(Keyword(shortNumberId="NO-0000", keywordText=u"ORD%d \u00e6\u00f8\u00e5" % i,
+                                          mode="Text", forwardUrl="https://your-site.net/api/receive-sms",
+                                          enabled=i % 2 == 0, tags=["Foo"]))
+
+    keywords = list(api_client.iter_all_keywords(short_number_id="NO-0000"))
+    client_keys = list(api_client.iter_client_public_keys())
+
+    assert sorted(keyword.keywordText for keyword in keywords) == sorted(
+        keyword["keywordText"] for keyword in stub_server.app.keywords.values())
+    assert [keyword.enabled for keyword in sorted(keywords, key=lambda k: int(k.keywordId))] == [
+        i % 2 == 0 for i in range(20)]
+    assert [key.name for key in client_keys] == [KEY_NAME]
@@ -0,0 +1,67 @@
+import pytest
+from ..keyword_registry import KeywordRegistry
+from ..models.keyword import Keyword
+
+
+def keyword(keyword_id, text, mode="Text", short_number_id="NO-2002", enabled=True, last_modified="2019-02-07"):
+    return {"keywordId": keyword_id, "shortNumberId": short_number_id, "keywordText": text, "mode": mode,
+            "enabled": enabled, "lastModified": last_modified}
+
+
+@pytest.fixture
+def server(stub_server):
+    for data in (keyword("1", "HELLO"), keyword("2", "hello world"), keyword("3", "STOP", "StartsWith"),
+                 keyword("4", "ST", "StartsWith"), keyword("5", "", "Wildcard"),
+                 keyword("6", "OFF", enabled=False), keyword("7", "HELLO", short_number_id="NO-0000")):
+        stub_server.app.keywords[data["keywordId"]] = data
+    return stub_server
+
+
+@pytest.fixture
+def registry(server, api_client):
+    registry = KeywordRegistry(api_client)
+    assert registry.sync() == 7
+    return registry
+
+
+@pytest.mark.parametrize("text, keyword_id", [
+    ("hello", "1"),
+    ("  Hello there", "1"),
+    ("HELLO WORLD!", "1"),
+    ("hello   world again", "2"),
+    ("HELLOX", "5"),
+    ("STOPALL", "3"),
+    ("stay", "4"),
+    ("off", "5"),
+    ("", "5"),
+])
+def test_match_follows_mode_precedence(registry, text, keyword_id):
+    assert registry.match("NO-2002", text).keywordId == keyword_id
+
+
+def test_match_is_per_short_number(registry):
+    assert registry.match("NO-0000", "HELLO").keywordId == "7"
+    assert registry.match("NO-0000", "STOP") is None
+    assert registry.match("NO-9999", "HELLO") is None
+
+
+def test_sync_only_applies_changes(server, registry):
+    assert registry.sync() == 0
+
+    server.app.keywords["1"]["keywordText"] = "HI"
+    server.app.keywords["1"]["lastModified"] = "2019-02-08"
+    del server.app.keywords["5"]
+
+    assert registry.sync("NO-2002") == 2
+    assert registry.match("NO-2002", "hi").keywordId == "1"
+    assert registry.match("NO-2002", "hello") is None
+    assert registry.match("NO-0000", "hello").keywordId == "7"
+
+
+def test_apply_and_remove(registry):
+    registry.apply(Keyword(**keyword("8", "NEW", short_number_id="NO-0000")))
+    assert registry.match("NO-0000", "new").keywordId == "8"
+
+    registry.remove("8")
+    assert registry.match("NO-0000", "new") is None
+    assert [k.keywordId for k in registry.keywords("NO-0000")] == ["7"]
@@ -0,0 +1,42 @@
+import subprocess
+import sys
+from ..helpers.http_client import HttpClient
+from ..helpers.signing import Signer
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+HEAVY_MODULES = ("requests", "urllib3", "ecdsa", "cryptography", "jsonpickle", "concurrent.futures")
+
+
+def _loaded_after(statement):
+    code = "import sys\n%s\nprint(' '.join(sorted(m for m in %r if m in sys.modules)))" % (statement, HEAVY_MODULES)
+    return subprocess.check_output([sys.executable, "-c", code], universal_newlines=True).split()
+
+
+def test_importing_api_client_leaves_heavy_modules_unloaded():
+    assert _loaded_after("import target365_sdk.api_client") == []
+    assert _loaded_after("from target365_sdk import ApiClient\n"
+                         "from target365_sdk.models import OutMessage\n"
+                         "ApiClient('https://test.target365.io/', 'PythonSdkTest', '00')") == []
+
+
+def test_private_key_is_parsed_on_first_use():
+    http_client = HttpClient("https://test.target365.io/", KEY_NAME, "not a key")
+    assert http_client._signer is None
+
+    http_client = HttpClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY)
+    assert isinstance(http_client.signer, Signer)
+    assert http_client.signer is http_client.signer
+    assert http_client._get_signature("get", "https://test.target365.io/api/ping").startswith("PythonSdkTest:")
+
+
+def test_models_are_still_importable_from_api_client():
+    from ..api_client import OutMessage, PublicKey
+    from ..models import OutMessage as ModelsOutMessage
+    assert OutMessage is ModelsOutMessage
+    assert PublicKey.__name__ == "PublicKey"
+    assert _loaded_after("from target365_sdk.api_client import OutMessage, Keyword, LookupResult") == []
+
+
+def test_public_key_is_parsed_once():
+    http_client = HttpClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY)
+    assert http_client.publicKey is http_client.publicKey
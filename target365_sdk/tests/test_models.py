@@ -0,0 +1,63 @@
+import importlib.util
+import pickle
+import sys
+import pytest
+from ..models import model
+from ..models.out_message import OutMessage
+from ..models.out_message_strex import OutMessageStrex
+from ..models.strex_transaction import StrexTransaction
+
+
+def test_unknown_parameter_is_rejected():
+    with pytest.raises(Exception):
+        OutMessage(unknownField=1)
+
+
+def test_unknown_parameter_is_kept_without_validation():
+    transaction = StrexTransaction(validate_keys=False, price=10, newField="x")
+
+    assert transaction.newField == "x"
+    assert transaction.__getstate__() == {"price": 10, "newField": "x"}
+
+
+def test_nested_strex_is_converted():
+    out_message = OutMessage(sender="0000", strex={"merchantId": "mer_test"})
+
+    assert type(out_message.strex) == OutMessageStrex
+    assert OutMessage(strex=None).strex is None
+
+
+def test_model_pickles():
+    out_message = pickle.loads(pickle.dumps(OutMessage(sender="0000", strex={"merchantId": "mer_test"})))
+
+    assert out_message.sender == "0000"
+    assert out_message.strex.merchantId == "mer_test"
+
+
+def test_slotted_models(monkeypatch):
+    # the slotted layout is only used before Python 3.11, load a copy of the module as it would be there
+    monkeypatch.setattr(sys, "version_info", (3, 10, 0))
+    spec = importlib.util.spec_from_file_location("slotted_model", model.__file__)
+    slotted = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(slotted)
+    monkeypatch.undo()
+
+    class Message(slotted.Model):
+        _fields = ("sender", "content")
+
+    class Reply(Message):
+        _fields = Message._fields + ("replyTo",)
+
+    assert slotted.SLOTTED
+    assert Message.__slots__ == ("sender", "content")
+    message = Message(sender="Target365")
+    assert not message.__dict__
+    assert message.__getstate__() == {"sender": "Target365"}
+
+    reply = Reply(validate_keys=False, replyTo="1", extra="x")
+    assert reply.__getstate__() == {"replyTo": "1", "extra": "x"}
+    copy = Reply.__new__(Reply)
+    copy.__setstate__(reply.__getstate__())
+    assert (copy.replyTo, copy.extra) == ("1", "x")
+    with pytest.raises(Exception):
+        Message(unknownField=1)
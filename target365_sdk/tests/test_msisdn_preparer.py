@@ -0,0 +1,50 @@
+import pytest
+from ..models.out_message import OutMessage
+from ..msisdn_preparer import MsisdnPreparer
+
+
+def test_only_cold_numbers_are_posted_in_chunks(fake_api_client):
+    preparer = MsisdnPreparer(fake_api_client, chunk_size=2)
+
+    assert preparer.prepare(["+4711", "+4712", "+4711", "+4713"]) == 3
+    assert preparer.prepare(["+4712", "+4714"]) == 1
+    assert fake_api_client.called("prepare_msisdns") == [["+4711", "+4712"], ["+4713"], ["+4714"]]
+    assert preparer.stats()["skipped"] == 2
+
+
+def test_expired_numbers_are_prepared_again(fake_api_client):
+    preparer = MsisdnPreparer(fake_api_client, ttl=-1)
+
+    preparer.prepare(["+4711"])
+    preparer.prepare(["+4711"])
+    assert len(fake_api_client.called("prepare_msisdns")) == 2
+
+
+def test_failed_numbers_are_not_remembered(fake_api_client):
+    preparer = MsisdnPreparer(fake_api_client.fail("prepare_msisdns", RuntimeError("unavailable")))
+
+    with pytest.raises(RuntimeError):
+        preparer.prepare(["+4711"])
+    assert not preparer.is_warm("+4711")
+
+
+def test_prefetch_prepares_ahead_and_passes_messages_through(stub_server, api_client):
+    preparer = MsisdnPreparer(api_client)
+    messages = [OutMessage(sender="Target365", recipient="+47%08d" % (i % 7), content=str(i)) for i in range(20)]
+
+    passed = []
+    for message in preparer.prefetch(messages, lookahead=5):
+        assert preparer.is_warm(message.recipient)
+        passed.append(message)
+
+    assert passed == messages
+    assert stub_server.app.prepared_msisdns == set(message.recipient for message in messages)
+    assert preparer.stats()["prepared"] == 7
+
+
+def test_prefetch_keeps_going_when_prepare_fails(fake_api_client):
+    preparer = MsisdnPreparer(fake_api_client.fail("prepare_msisdns", RuntimeError("unavailable")))
+    messages = [OutMessage(recipient="+4711"), OutMessage(recipient="+4712")]
+
+    assert list(preparer.prefetch(messages, lookahead=1)) == messages
+    assert preparer.stats()["errors"] == 2
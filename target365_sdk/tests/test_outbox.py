@@ -0,0 +1,168 @@
+import socket
+import sqlite3
+import threading
+import time
+import pytest
+import requests
+from ..api_client import ApiClient
+from ..helpers.http_response import HttpResponse
+from ..helpers.transports import Http2Transport
+from ..models.out_message import OutMessage
+from ..outbox import Outbox
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+def _message(content, recipient="+4798079008", transaction_id=None):
+    return OutMessage(transactionId=transaction_id, sender="Target365", recipient=recipient, content=content)
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_outbox_sends_in_background(tmp_path, stub_server, api_client):
+    with Outbox(api_client, str(tmp_path / "outbox.db"), batch_size=10, poll_interval=0.01) as outbox:
+        transaction_ids = outbox.enqueue_many(_message(str(i)) for i in range(25))
+        outbox.enqueue(_message("again", transaction_id=transaction_ids[0]))
+
+        assert _wait_until(lambda: len(stub_server.app.out_messages) == 25)
+        assert _wait_until(lambda: len(outbox) == 0)
+        assert outbox.stats()["sent"] == 25
+    assert stub_server.app.out_messages[transaction_ids[3].lower()]["content"] == "3"
+
+
+def test_outbox_survives_restart_without_duplicates(tmp_path, stub_server, api_client):
+    path = str(tmp_path / "outbox.db")
+    outbox = Outbox(api_client, path, autostart=False)
+    outbox.enqueue_many(_message(str(i), transaction_id="tx-%d" % i) for i in range(5))
+    # first two sent, then the process died before they were deleted from the outbox
+    api_client.create_out_message_batch([_message(str(i), transaction_id="tx-%d" % i) for i in range(2)])
+    outbox.close()
+
+    restarted = Outbox(api_client, path, autostart=False)
+    assert len(restarted) == 5
+    assert restarted.flush() == 0
+    assert restarted.stats()["duplicates"] == 2
+    assert sorted(stub_server.app.out_messages) == ["tx-%d" % i for i in range(5)]
+    restarted.close()
+
+
+def test_outbox_retries_transient_and_keeps_rejected(tmp_path, fake_api_client):
+    def create_out_message_batch(body):
+        status = 503 if len(fake_api_client.called("create_out_message_batch")) == 1 else 400
+        raise requests.HTTPError(response=HttpResponse(status))
+
+    def create_out_message(body):
+        if b'"bad"' in body:
+            raise requests.HTTPError(response=HttpResponse(400))
+
+    api_client = fake_api_client.on("create_out_message_batch", create_out_message_batch) \
+        .on("create_out_message", create_out_message)
+    outbox = Outbox(api_client, str(tmp_path / "outbox.db"), retry_delay=0, autostart=False)
+    outbox.enqueue_many([_message("good", transaction_id="1"), _message("bad", transaction_id="2")])
+
+    assert outbox.flush() == 2
+    assert outbox.stats()["retries"] == 2
+    assert outbox.flush() == 0
+    assert len(api_client.called("create_out_message")) == 2
+    failed = list(outbox.failed())
+    assert [(message.transactionId, error) for message, error in failed] == [("2", "HTTP 400")]
+
+    assert outbox.requeue_failed() == 1
+    assert len(outbox) == 1
+    outbox.close()
+
+
+def test_outbox_retries_connection_errors_of_http2_transport(tmp_path):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    closed_port = listener.getsockname()[1]
+    listener.close()
+
+    api_client = ApiClient("http://127.0.0.1:%d/" % closed_port, KEY_NAME, PRIVATE_KEY,
+                           transport=Http2Transport(timeout=1.0))
+    with Outbox(api_client, str(tmp_path / "outbox.db"), retry_delay=60, autostart=False) as outbox:
+        outbox.enqueue(_message("Hello"))
+
+        assert outbox.flush() == 1
+        assert list(outbox.failed()) == []
+        assert outbox.stats()["retries"] == 1
+    api_client.close()
+
+
+def test_close_closes_the_connections_of_all_threads(tmp_path, fake_api_client):
+    outbox = Outbox(fake_api_client, str(tmp_path / "outbox.db"), autostart=False)
+    connections = []
+    closed = threading.Event()
+
+    def worker():
+        outbox.enqueue(_message("from another thread"))
+        connections.append(outbox._connection())
+        closed.wait()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    while not connections:
+        time.sleep(0.001)
+    connections.append(outbox._connection())
+
+    outbox.close()
+    closed.set()
+    thread.join()
+
+    for connection in connections:
+        with pytest.raises(sqlite3.ProgrammingError):
+            connection.execute("SELECT 1")
+    # the outbox opens a new connection when used again
+    assert len(outbox) == 1
+    outbox.close()
+
+
+def test_connections_of_finished_threads_are_released(tmp_path, fake_api_client):
+    outbox = Outbox(fake_api_client, str(tmp_path / "outbox.db"), autostart=False)
+    for i in range(20):
+        thread = threading.Thread(target=outbox.enqueue, args=(_message("request %d" % i),))
+        thread.start()
+        thread.join()
+
+    assert len(outbox) == 20
+    # only the connection of this thread is left
+    assert len(outbox._connections) == 1
+    outbox.close()
+
+
+def test_unreadable_payload_is_marked_failed(tmp_path, fake_api_client):
+    outbox = Outbox(fake_api_client, str(tmp_path / "outbox.db"), autostart=False)
+    outbox.enqueue(_message("good", transaction_id="1"))
+    with outbox._connection() as connection:
+        connection.execute("INSERT INTO outbox (transaction_id, payload, enqueued, next_attempt) "
+                           "VALUES ('2', 'not a blob', 0, 0)")
+
+    assert outbox.flush() == 0
+    assert len(fake_api_client.called("create_out_message")) == 1
+    failed = outbox._connection().execute("SELECT transaction_id, last_error FROM outbox WHERE failed = 1").fetchall()
+    assert [transaction_id for transaction_id, error in failed] == ["2"]
+    assert failed[0][1]
+    outbox.close()
+
+
+def test_sender_errors_are_logged_and_counted(tmp_path, fake_api_client, caplog):
+    outbox = Outbox(fake_api_client, str(tmp_path / "outbox.db"), poll_interval=0.01, autostart=False)
+
+    def broken_send_due(now=None):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    outbox.send_due = broken_send_due
+    outbox.start()
+    assert _wait_until(lambda: outbox.stats()["errors"] >= 2)
+    outbox.close()
+
+    assert outbox.last_error == "disk I/O error"
+    assert "sending failed" in caplog.text
+
@@ -0,0 +1,70 @@
+import time
+from ..api_client import ApiClient
+from ..helpers.http_response import HttpResponse
+from ..helpers.rate_limiter import AdaptiveRateLimiter, _parse_retry_after
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+def test_healthy_responses_grow_limits():
+    limiter = AdaptiveRateLimiter(rate=10, concurrency=2, burst=1000)
+    for _ in range(20):
+        limiter.release(limiter.acquire(), 200)
+
+    stats = limiter.stats()
+    assert stats["rate"] > 10
+    assert stats["concurrency"] > 2
+    assert stats["in_flight"] == 0
+
+
+def test_throttling_cuts_limits_once_per_window_and_pauses():
+    limiter = AdaptiveRateLimiter(rate=100, concurrency=8, burst=100)
+    started = [limiter.acquire() for _ in range(3)]
+    time.sleep(0.001)
+
+    for value in started:
+        limiter.release(value, 429, "2")
+
+    stats = limiter.stats()
+    assert stats["rate"] == 50
+    assert stats["concurrency"] == 4
+    assert stats["throttled"] == 3
+    assert 1.5 < stats["paused_for"] <= 2
+    assert 1.5 < limiter.try_acquire() <= 2
+
+
+def test_slow_responses_do_not_grow_limits():
+    limiter = AdaptiveRateLimiter(rate=10, latency_target=0.01)
+    limiter.release(limiter.acquire() - 1, 200)
+    assert limiter.stats()["rate"] == 10
+
+
+def test_call_retries_throttled_requests():
+    limiter = AdaptiveRateLimiter(backoff=0, max_retries=2)
+    responses = [HttpResponse(503), HttpResponse(429, {"Retry-After": "0"}), HttpResponse(200)]
+
+    assert limiter.call(lambda: responses.pop(0)).status_code == 200
+    assert limiter.stats()["retries"] == 2
+
+
+def test_call_gives_up_after_max_retries():
+    limiter = AdaptiveRateLimiter(backoff=0, max_retries=1)
+    assert limiter.call(lambda: HttpResponse(429)).status_code == 429
+    assert limiter.stats()["requests"] == 2
+
+
+def test_parse_retry_after():
+    now = time.time()
+    assert _parse_retry_after("3", now) == 3
+    assert _parse_retry_after(None, now) is None
+    assert 9 < _parse_retry_after(time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(now + 10)), now) <= 10
+
+
+def test_api_client_recovers_from_throttling(stub_server):
+    stub_server.app.throttle_rate = 0.3
+    stub_server.app.retry_after = 0
+    limiter = AdaptiveRateLimiter(min_rate=50, max_retries=10)
+    client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY, rate_limiter=limiter)
+    for _ in range(20):
+        assert client.ping() == "pong"
+
+    assert limiter.stats()["throttled"] == stub_server.app.status_counts[429] > 0
@@ -0,0 +1,76 @@
+import random
+import pytest
+from ..recipients import BloomFilter, PackedIntSet, RecipientList, normalize_msisdn, normalize_msisdns
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("98079008", "+4798079008"),
+    ("980 79 008", "+4798079008"),
+    ("4798079008", "+4798079008"),
+    ("+47 980-79-008", "+4798079008"),
+    ("0047 (980) 79.008", "+4798079008"),
+    ("+46701234567", "+46701234567"),
+    (98079008, "+4798079008"),
+    ("9807900", None),
+    ("+47980790a8", None),
+    ("+0123456789", None),
+    ("+1234567890123456", None),
+    ("", None),
+    (None, None),
+])
+def test_normalize_msisdn(raw, expected):
+    assert normalize_msisdn(raw) == expected
+
+
+def test_normalize_msisdns_with_other_defaults():
+    assert list(normalize_msisdns(["0701234567", "070-123 45 67", "701234567", "07012345"], "46", 9)) == \
+        ["+46701234567", "+46701234567", "+46701234567", None]
+
+
+def test_normalize_msisdn_without_national_length():
+    assert normalize_msisdn("4798765432", national_length=None) == "+4798765432"
+    assert normalize_msisdn("98765432", national_length=None) == "+4798765432"
+    assert normalize_msisdn("0701234567", "46", None) == "+46701234567"
+    assert normalize_msisdn("+46701234567", national_length=None) == "+46701234567"
+
+
+def test_recipient_list_drops_invalid_and_duplicates_keeping_order():
+    recipients = RecipientList()
+    added = recipients.extend(["98079008", "+4798079009", "4798079008", "nope", "0047 980 79 009", "+4612345678"])
+
+    assert added == 3
+    assert list(recipients) == ["+4798079008", "+4798079009", "+4612345678"]
+    assert recipients.invalid_count == 1
+    assert recipients.duplicate_count == 2
+    assert "980 79 008" in recipients
+    assert not recipients.add("98079008")
+
+
+def test_recipient_list_builds_out_messages():
+    recipients = RecipientList()
+    recipients.extend(["98079008", "98079009"])
+
+    messages = list(recipients.out_messages(sender="Target365", content="Hello"))
+    assert [message.recipient for message in messages] == ["+4798079008", "+4798079009"]
+    assert messages[0].sender == "Target365"
+
+
+def test_packed_int_set_is_exact_across_growth():
+    values = random.Random(1).sample(range(1, 10 ** 12), 5000)
+    packed = PackedIntSet(capacity=8)
+
+    assert all(packed.add(value) for value in values)
+    assert not any(packed.add(value) for value in values)
+    assert len(packed) == 5000
+    assert all(value in packed for value in values)
+    assert 4 not in packed
+
+
+def test_bloom_filter_error_rate():
+    bloom = BloomFilter(10000, error_rate=0.01)
+    for value in range(4700000000, 4700010000):
+        bloom.add(value)
+
+    assert all(value in bloom for value in range(4700000000, 4700010000))
+    false_positives = sum(1 for value in range(4800000000, 4800010000) if value in bloom)
+    assert false_positives < 300
@@ -0,0 +1,136 @@
+import base64
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import requests
+from ..helpers.http_client import HttpClient
+from ..helpers.http_response import HttpResponse
+from ..models.public_key import PublicKey
+from ..signature_verifier import SignatureVerifier, _parse_timestamp
+from .conftest import PRIVATE_KEY
+
+CALLBACK_URI = "https://your-site.net/api/receive-sms"
+BODY = '{"transactionId":"00568c6b-7baf-4869-b083-d22afc163059","sender":"+4798079008","content":"HELLO"}'
+# signs callbacks like the Target365 server with key 2017-11-17
+SERVER = HttpClient("https://test.target365.io/", "2017-11-17", PRIVATE_KEY)
+
+
+def _get_server_public_key(key_name):
+    if key_name != "2017-11-17":
+        raise requests.HTTPError(response=HttpResponse(404))
+
+    der = SERVER.publicKey.get_verifying_key().to_der()
+    return PublicKey(name=key_name, publicKeyString=base64.b64encode(der).decode("utf-8"),
+                     expiry="2099-01-01T00:00:00Z", notUsableBefore="2017-11-17T00:00:00+00:00")
+
+
+@pytest.fixture
+def api_client(fake_api_client):
+    return fake_api_client.on("get_server_public_key", _get_server_public_key)
+
+
+@pytest.mark.parametrize("backend", ["ecdsa", "cryptography"])
+def test_valid_callback_is_accepted_once(api_client, backend):
+    pytest.importorskip(backend)
+    verifier = SignatureVerifier(api_client, backend=backend)
+    header = "ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY)
+
+    assert verifier.verify("POST", CALLBACK_URI, BODY.encode("utf-8"), header)
+    assert not verifier.verify("POST", CALLBACK_URI, BODY.encode("utf-8"), header)
+    assert api_client.called("get_server_public_key") == ["2017-11-17"]
+
+
+def test_tampered_callback_is_rejected(api_client):
+    verifier = SignatureVerifier(api_client)
+    header = "ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY)
+
+    assert not verifier.verify("POST", CALLBACK_URI, BODY.replace("HELLO", "HACKED"), header)
+    assert not verifier.verify("POST", CALLBACK_URI, BODY, "ECDSA garbage")
+
+
+def test_unknown_key_is_rejected_and_cached(api_client):
+    verifier = SignatureVerifier(api_client)
+    header = "ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY).replace("2017-11-17", "forged", 1)
+
+    assert not verifier.verify("POST", CALLBACK_URI, BODY, header)
+    assert not verifier.verify("POST", CALLBACK_URI, BODY, header)
+    assert api_client.called("get_server_public_key") == ["forged"]
+
+
+def test_concurrent_replays_are_accepted_once(api_client):
+    verifier = SignatureVerifier(api_client)
+    header = "ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY)
+    verifier.get_verifier("2017-11-17")
+
+    barrier = threading.Barrier(8)
+
+    def verify(_):
+        barrier.wait()
+        return verifier.verify("POST", CALLBACK_URI, BODY, header)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        assert sorted(executor.map(verify, range(8))) == [False] * 7 + [True]
+
+
+def test_failing_key_fetch_raises_and_is_not_cached(api_client):
+    verifier = SignatureVerifier(api_client)
+    header = "ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY)
+
+    api_client.fail("get_server_public_key", requests.HTTPError(response=HttpResponse(503)))
+    with pytest.raises(requests.HTTPError):
+        verifier.verify("POST", CALLBACK_URI, BODY, header)
+
+    api_client.on("get_server_public_key", _get_server_public_key)
+    assert verifier.verify("POST", CALLBACK_URI, BODY, header)
+
+
+def test_full_nonce_cache_rejects_instead_of_forgetting(api_client):
+    verifier = SignatureVerifier(api_client, max_nonces=2)
+    headers = ["ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY) for _ in range(3)]
+
+    assert [verifier.verify("POST", CALLBACK_URI, BODY, header) for header in headers] == [True, True, False]
+    assert not verifier.verify("POST", CALLBACK_URI, BODY, headers[0])
+
+
+def test_unreadable_key_is_rejected_and_cached(api_client):
+    def get_server_public_key(key_name):
+        public_key = _get_server_public_key(key_name)
+        public_key.expiry = "next tuesday"
+        return public_key
+
+    api_client.on("get_server_public_key", get_server_public_key)
+    verifier = SignatureVerifier(api_client)
+    header = "ECDSA " + SERVER._get_signature("post", CALLBACK_URI, BODY)
+
+    assert not verifier.verify("POST", CALLBACK_URI, BODY, header)
+    assert not verifier.verify("POST", CALLBACK_URI, BODY, header)
+    assert api_client.called("get_server_public_key") == ["2017-11-17"]
+
+
+def test_slow_key_fetch_does_not_block_other_keys(api_client):
+    fetching = threading.Event()
+    release = threading.Event()
+
+    def get_server_public_key(key_name):
+        if key_name == "slow":
+            fetching.set()
+            release.wait(5)
+        return _get_server_public_key(key_name)
+
+    api_client.on("get_server_public_key", get_server_public_key)
+    verifier = SignatureVerifier(api_client)
+    slow = threading.Thread(target=verifier.get_verifier, args=("slow",))
+    slow.start()
+    fetching.wait(5)
+
+    assert verifier.get_verifier("2017-11-17") is not None
+    assert not release.is_set()
+    release.set()
+    slow.join()
+    assert verifier._key_locks == {}
+
+
+def test_parse_timestamp():
+    assert _parse_timestamp("1970-01-01T01:00:00Z") == 3600
+    assert _parse_timestamp("1970-01-01T01:00:00.1234567+01:00") == 0
+    assert _parse_timestamp(None) is None
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import pytest
+from ..models.out_message import OutMessage
+from ..sms_encoding import GSM7, UCS2, calculate_segments, summarize
+
+
+@pytest.mark.parametrize("content, allow_unicode, encoding, length, segments", [
+    ("", None, GSM7, 0, 0),
+    ("Hello World from SMS!", None, GSM7, 21, 1),
+    ("a" * 160, None, GSM7, 160, 1),
+    ("a" * 161, None, GSM7, 161, 2),
+    ("a" * 306, None, GSM7, 306, 2),
+    ("a" * 307, None, GSM7, 307, 3),
+    ("€" * 80, None, GSM7, 160, 1),
+    # 152 septets and a 2 septet character don't fit in a 153 septet part
+    ("a" * 152 + "€" + "a" * 10, None, GSM7, 164, 2),
+    ("a" * 152 + "€" + "a" * 152, None, GSM7, 306, 3),
+    ("Blåbærsyltetøy ÆØÅ", True, GSM7, 18, 1),
+    ("Привет", True, UCS2, 6, 1),
+    ("Привет" * 12, True, UCS2, 72, 2),
+    ("😀" * 35, True, UCS2, 70, 1),
+    ("a" + "😀" * 34, True, UCS2, 69, 1),
+    ("a" + "😀" * 35, True, UCS2, 71, 2),
+])
+def test_calculate_segments(content, allow_unicode, encoding, length, segments):
+    info = calculate_segments(content, allow_unicode)
+    assert (info.encoding, info.length, info.segments) == (encoding, length, segments)
+    assert info.valid
+
+
+def test_characters_outside_gsm7_are_replaced_or_rejected():
+    replaced = calculate_segments("Hi ✓ there ✓ ☺", None)
+    assert (replaced.encoding, replaced.length, replaced.segments) == (GSM7, 14, 1)
+    assert replaced.replaced_characters == ("✓", "☺")
+    assert replaced.valid
+
+    rejected = calculate_segments("Hi ✓", False)
+    assert rejected.replaced_characters == ("✓",)
+    assert not rejected.valid
+
+
+def test_extension_characters_are_counted():
+    info = calculate_segments("{price} is 10€", None)
+    assert info.extension_characters == 3
+    assert info.length == 17
+
+
+def test_summarize_batch():
+    messages = [
+        OutMessage(transactionId="1", content="Hello"),
+        OutMessage(transactionId="2", content="Привет", allowUnicode=True),
+        OutMessage(transactionId="3", content="Привет", allowUnicode=False),
+        OutMessage(transactionId="4", content="a" * 200),
+    ]
+    assert summarize(messages) == {"messages": 4, "segments": 5, "gsm7": 3, "ucs2": 1, "invalid": ["3"]}
@@ -0,0 +1,91 @@
+import pytest
+import requests
+from ..api_client import ApiClient
+from ..models.keyword import Keyword
+from ..models.out_message import OutMessage
+from ..signature_verifier import SignatureVerifier
+from .conftest import KEY_NAME
+
+OTHER_PRIVATE_KEY = "4bb4b5c9e6bb0e1d3e0bd4d4f1a1f27cfbcd6dd4bcfa0bbf8ba2e67f0c2a4d11"
+
+
+def test_ping_and_lookup(stub_server, api_client):
+    stub_server.app.add_lookup({"msisdn": "+4798079008", "firstName": "Test", "lastName": "Testesen"})
+
+    assert api_client.ping() == "pong"
+    assert api_client.lookup("+4798079008").lastName == "Testesen"
+    assert api_client.lookup("+4700000000") is None
+
+
+def test_keyword_round_trip(api_client):
+    keyword_id = api_client.create_keyword(Keyword(shortNumberId="NO-0000", keywordText="HELLO", mode="Text",
+                                                   forwardUrl="https://your-site.net/api/receive-sms",
+                                                   enabled=True, tags=["Foo"]))
+
+    keyword = api_client.get_keyword(keyword_id)
+    assert keyword.keywordText == "HELLO"
+    assert [k.keywordId for k in api_client.get_all_keywords("NO-0000", tag="foo")] == [keyword_id]
+
+    api_client.delete_keyword(keyword_id)
+    assert api_client.get_keyword(keyword_id) is None
+
+
+def test_out_messages_are_stored_and_duplicates_rejected(stub_server, api_client):
+    out_message = OutMessage(transactionId="79f35793-6d70-423c-a7f7-ae9fb1024f3b", sender="Target365",
+                             recipient="+4798079008", content="Hello World from SMS!")
+    api_client.create_out_message_batch([out_message])
+
+    assert api_client.get_out_message(out_message.transactionId).statusCode == "Queued"
+    with pytest.raises(requests.HTTPError) as error:
+        api_client.create_out_message(out_message)
+    assert error.value.response.status_code == 409
+
+
+def test_requests_signed_with_unknown_key_are_rejected(stub_server):
+    client = ApiClient(stub_server.base_uri, KEY_NAME, OTHER_PRIVATE_KEY)
+    with pytest.raises(requests.HTTPError) as error:
+        client.ping()
+    assert error.value.response.status_code == 401
+
+
+def test_throttling_and_errors_are_injected(stub_server, api_client):
+    stub_server.app.throttle_rate = 0.5
+    stub_server.app.error_rate = 0.5
+    statuses = set()
+    for _ in range(30):
+        try:
+            api_client.ping()
+            statuses.add(200)
+        except requests.HTTPError as error:
+            statuses.add(error.response.status_code)
+            if error.response.status_code == 429:
+                assert error.response.headers["Retry-After"] == "1"
+
+    assert statuses == {200, 429, 500}
+    assert sum(stub_server.app.status_counts.values()) == 30
+
+
+def test_request_rate_limit_can_be_changed_on_a_running_stub(stub_server, api_client):
+    assert api_client.ping() == "pong"
+
+    stub_server.app.max_requests_per_second = 3
+    statuses = []
+    for _ in range(6):
+        try:
+            api_client.ping()
+            statuses.append(200)
+        except requests.HTTPError as error:
+            statuses.append(error.response.status_code)
+    assert statuses[:3] == [200, 200, 200]
+    assert 429 in statuses[3:]
+
+    stub_server.app.max_requests_per_second = None
+    assert api_client.ping() == "pong"
+
+
+def test_signed_callbacks_verify_against_server_key(stub_server, api_client):
+    uri = "https://your-site.net/api/receive-sms"
+    body = b'{"transactionId":"00568c6b-7baf-4869-b083-d22afc163059"}'
+    verifier = SignatureVerifier(api_client)
+
+    assert verifier.verify("POST", uri, body, stub_server.app.sign_callback("POST", uri, body))
@@ -0,0 +1,152 @@
+import socket
+import sys
+import threading
+import types
+import pytest
+import requests
+from ..api_client import ApiClient
+from ..helpers import transports
+from ..helpers.transports import Http2Transport, InMemoryTransport
+from ..models.keyword import Keyword
+from ..models.out_message import OutMessage
+from .conftest import KEY_NAME, PRIVATE_KEY
+
+
+def _exercise(api_client, app):
+    app.add_lookup({"msisdn": "+4798079008", "firstName": "Test"})
+    for i in range(3):
+        api_client.create_keyword(Keyword(shortNumberId="NO-0000", keywordText="HI%d" % i, mode="Text"))
+    transaction_id = api_client.create_out_message(
+        OutMessage(sender="Target365", recipient="+4798079008", content="Hei på deg"))
+
+    assert api_client.ping() == "pong"
+    assert api_client.lookup("+4798079008").firstName == "Test"
+    assert api_client.lookup("+4798079009") is None
+    assert sorted(keyword.keywordText for keyword in api_client.iter_all_keywords("NO-0000")) == ["HI0", "HI1", "HI2"]
+    assert api_client.get_out_message(transaction_id).content == "Hei på deg"
+    with pytest.raises(requests.HTTPError) as error:
+        api_client.create_out_message(OutMessage(transactionId=transaction_id, recipient="+4798079008"))
+    assert error.value.response.status_code == 409
+
+
+def test_in_memory_transport_runs_requests_through_stub():
+    transport = InMemoryTransport(client_keys={KEY_NAME: PRIVATE_KEY})
+    api_client = ApiClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY, transport=transport)
+
+    _exercise(api_client, transport.app)
+
+    unknown = ApiClient("https://test.target365.io/", "UnknownKey", PRIVATE_KEY, transport=transport)
+    with pytest.raises(requests.HTTPError) as error:
+        unknown.ping()
+    assert error.value.response.status_code == 401
+
+
+def test_in_memory_transport_reports_metrics():
+    reported = []
+    transport = InMemoryTransport(client_keys={KEY_NAME: PRIVATE_KEY})
+    api_client = ApiClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY, transport=transport,
+                           observer=reported.append)
+
+    api_client.ping()
+
+    assert [(metrics.endpoint, metrics.status_code, metrics.response_bytes) for metrics in reported] == \
+        [("api/ping", 200, 4)]
+
+
+def test_http2_transport_against_stub_server(stub_server):
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+
+    transport = Http2Transport(max_connections=2)
+    api_client = ApiClient(stub_server.base_uri, KEY_NAME, PRIVATE_KEY, transport=transport)
+
+    # the stub speaks plain HTTP/1.1, HTTP/2 is only negotiated over TLS
+    _exercise(api_client, stub_server.app)
+    results = dict(api_client.lookup_many(["+4798079008", "+4798079009"] * 10, max_workers=8))
+    assert results["+4798079008"].firstName == "Test" and results["+4798079009"] is None
+
+    api_client.close()
+    assert api_client.ping() == "pong"
+    api_client.close()
+
+
+def test_http2_transport_raises_requests_errors():
+    pytest.importorskip("httpx")
+    pytest.importorskip("h2")
+
+    transport = Http2Transport(timeout=1.0)
+    api_client = ApiClient("http://127.0.0.1:%d/" % _closed_port(), KEY_NAME, PRIVATE_KEY, transport=transport)
+
+    with pytest.raises(requests.ConnectionError):
+        api_client.ping()
+    api_client.close()
+
+
+def test_http2_transport_shares_one_http2_client(monkeypatch):
+    clients = []
+
+    class Response:
+        status_code = 200
+        headers = {"Content-Type": "text/plain"}
+        content = b"pong"
+        reason_phrase = "OK"
+        elapsed = None
+        http_version = "HTTP/2"
+
+        def __init__(self, url):
+            self.url = url
+
+    class Client:
+        def __init__(self, **options):
+            self.options = options
+            self.sent = []
+            self.lock = threading.Lock()
+            clients.append(self)
+
+        def build_request(self, method, url, content=None, headers=None):
+            return method, url
+
+        def send(self, request, stream=False):
+            with self.lock:
+                self.sent.append(request)
+            return Response(request[1])
+
+        def close(self):
+            pass
+
+    httpx = types.ModuleType("httpx")
+    httpx.Client = Client
+    httpx.Limits = lambda **limits: limits
+    monkeypatch.setitem(sys.modules, "httpx", httpx)
+    monkeypatch.setattr(transports, "installed", lambda name: True)
+
+    api_client = ApiClient("https://test.target365.io/", KEY_NAME, PRIVATE_KEY, transport=Http2Transport())
+    barrier = threading.Barrier(8)
+
+    def ping():
+        barrier.wait()
+        assert api_client.ping() == "pong"
+
+    threads = [threading.Thread(target=ping) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(clients) == 1
+    assert clients[0].options["http2"] is True
+    assert clients[0].sent == [("GET", "https://test.target365.io/api/ping")] * 8
+
+
+def test_http2_transport_needs_httpx_and_h2(monkeypatch):
+    monkeypatch.setattr(transports, "installed", lambda name: name != "h2")
+    with pytest.raises(ImportError):
+        Http2Transport()
+
+
+def _closed_port():
+    listener = socket.socket()
+    listener.bind(("127.0.0.1", 0))
+    port = listener.getsockname()[1]
+    listener.close()
+    return port